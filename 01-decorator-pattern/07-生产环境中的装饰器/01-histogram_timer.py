@@ -0,0 +1,334 @@
+import time
+import json
+import operator
+import threading
+import functools
+
+# 每个 2 的幂区间被切分成的子桶数量 = 2 ** (SUB_BUCKET_BITS - 1)
+# 取 6 时每个区间有 32 个子桶，相对误差不超过 1/32 ≈ 3%
+SUB_BUCKET_BITS = 6
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+SUB_BUCKET_HALF = SUB_BUCKET_COUNT >> 1
+# 可记录的最大耗时（纳秒），约 18 分钟，超过的值会被截断到最后一个桶
+MAX_TRACKABLE_NS = (1 << 40) - 1
+
+
+def _bucket_index(value):
+    """将一个纳秒数映射到对应的桶下标 (HDR 风格的对数-线性分桶)。"""
+    if value < SUB_BUCKET_COUNT:
+        # 小数值直接精确计数
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    mantissa = value >> shift  # 落在 [SUB_BUCKET_HALF, SUB_BUCKET_COUNT) 区间内
+    return SUB_BUCKET_COUNT + (shift - 1) * SUB_BUCKET_HALF + (mantissa - SUB_BUCKET_HALF)
+
+
+def _bucket_upper_bound(index):
+    """返回某个桶能代表的最大纳秒数，用于估算分位数。"""
+    if index < SUB_BUCKET_COUNT:
+        return index
+    shift, offset = divmod(index - SUB_BUCKET_COUNT, SUB_BUCKET_HALF)
+    shift += 1
+    mantissa = offset + SUB_BUCKET_HALF
+    return ((mantissa + 1) << shift) - 1
+
+
+_BUCKET_TOTAL = _bucket_index(MAX_TRACKABLE_NS) + 1
+
+
+class LatencyHistogram:
+    """
+    一个低开销的延迟直方图。
+    每次记录只做一次下标计算和几次整数加法，不分配任何对象，也不加锁：
+    和 04-call_counter.py 一样，每个线程只写自己的分片 [各桶计数, 总耗时, 最大值, 纪元]，
+    读取时再合并。已经退出的线程的分片合并进基数；reset 不修改分片，只记下当时的计数，之后读数时减去。
+    """
+    def __init__(self, name):
+        self.name = name
+        self._local = threading.local()
+        self._shards = []                           # [(线程, 分片)]
+        self._lock = threading.Lock()               # 只在新建分片、读取和重置时使用
+        self._base = [[0] * _BUCKET_TOTAL, 0]       # 已经退出的线程留下的 [各桶计数, 总耗时]
+        self._offset = [[0] * _BUCKET_TOTAL, 0]     # 上一次 reset 时的 [各桶计数, 总耗时]
+        self._base_max = 0                          # 已经退出的线程在本纪元内的最大值
+        # 最大值不能相减，所以按纪元记录：每次 reset 纪元加一，分片记录时发现纪元变了就从头开始算最大值
+        self._epoch = 0
+
+    def record(self, elapsed_ns):
+        if elapsed_ns > MAX_TRACKABLE_NS:
+            elapsed_ns = MAX_TRACKABLE_NS
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        # 分片只有当前线程会修改，不需要加锁
+        shard[0][_bucket_index(elapsed_ns)] += 1
+        shard[1] += elapsed_ns
+        if shard[3] != self._epoch:
+            shard[3] = self._epoch
+            shard[2] = elapsed_ns
+        elif elapsed_ns > shard[2]:
+            shard[2] = elapsed_ns
+
+    def _new_shard(self):
+        shard = [[0] * _BUCKET_TOTAL, 0, 0, self._epoch]
+        # 只有每个线程第一次记录时才需要加锁
+        with self._lock:
+            self._fold_dead_shards()
+            self._shards.append((threading.current_thread(), shard))
+        self._local.shard = shard
+        return shard
+
+    def _fold_dead_shards(self):
+        """把已经退出的线程的分片合并进基数，分片列表不会随着线程的创建和退出无限增长。调用时必须持有锁。"""
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+                continue
+            self._base[0] = list(map(operator.add, self._base[0], shard[0]))
+            self._base[1] += shard[1]
+            if shard[3] == self._epoch:
+                self._base_max = max(self._base_max, shard[2])
+        self._shards = alive
+
+    def _collect(self, reset=False):
+        """
+        合并所有分片，返回上一次 reset 以来的 (各桶计数, 总次数, 总耗时, 最大值)。
+        reset=True 时在同一次加锁中把当前计数记为新的起点：读数和清零之间的记录不会丢失，
+        只会算进下一个周期。调用时不能持有锁。
+        """
+        with self._lock:
+            self._fold_dead_shards()
+            counts, total_ns, max_ns = self._base[0], self._base[1], self._base_max
+            for _, shard in self._shards:
+                # list(...) 在持有 GIL 时一次完成，不会和分片所属线程的写入交错
+                counts = list(map(operator.add, counts, list(shard[0])))
+                total_ns += shard[1]
+                if shard[3] == self._epoch:
+                    max_ns = max(max_ns, shard[2])
+            offset_counts, offset_total = self._offset
+            if reset:
+                self._offset = [counts, total_ns]
+                self._base_max = 0
+                self._epoch += 1
+        counts = list(map(operator.sub, counts, offset_counts))
+        # 总次数由各桶计数加出来，和分位数用的是同一份数据
+        return counts, sum(counts), total_ns - offset_total, max_ns
+
+    def percentile(self, p):
+        """返回第 p 百分位的耗时（纳秒），p 取值范围 0~100。"""
+        counts, total, _, max_ns = self._collect()
+        return self._percentile_from(counts, total, max_ns, p)
+
+    @staticmethod
+    def _percentile_from(counts, total, max_ns, p):
+        if total == 0:
+            return 0
+        target = max(1, int(total * p / 100 + 0.5))
+        seen = 0
+        for index, count in enumerate(counts):
+            if not count:
+                continue
+            seen += count
+            if seen >= target:
+                # 桶的上界可能大于真实最大值，用 max 截断
+                return min(_bucket_upper_bound(index), max_ns)
+        return max_ns
+
+    def snapshot(self, reset=False):
+        """返回当前统计数据的一个副本（单位：秒）。reset=True 时读数和清零在一次加锁中完成。"""
+        counts, total, total_ns, max_ns = self._collect(reset)
+        result = {"count": total, "mean": total_ns / total / 1e9 if total else 0.0}
+        for label, p in (("p50", 50), ("p90", 90), ("p99", 99)):
+            result[label] = self._percentile_from(counts, total, max_ns, p) / 1e9
+        result["max"] = max_ns / 1e9
+        return result
+
+    def reset(self):
+        self._collect(reset=True)
+
+
+class TimingRegistry:
+    """全局的计时注册表：(模块名, 函数限定名) -> LatencyHistogram。"""
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._reporter = None
+
+    def histogram(self, module, qualname):
+        """
+        取出函数对应的直方图。键是 (模块名, 限定名)，不同模块中的同名函数不会共用一个直方图。
+        快路径不加锁；未命中时加锁再检查一次，只有真正需要创建时才分配新的直方图。
+        """
+        key = (module, qualname)
+        hist = self._histograms.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.get(key)
+                if hist is None:
+                    hist = self._histograms[key] = LatencyHistogram(f"{module}.{qualname}")
+        return hist
+
+    def snapshot(self, reset=False):
+        """{"模块名.限定名": 统计}，可以直接导出为 JSON。reset=True 时每个直方图的读数和清零一起完成。"""
+        return {hist.name: hist.snapshot(reset) for hist in list(self._histograms.values())}
+
+    def reset(self):
+        for hist in list(self._histograms.values()):
+            hist.reset()
+
+    def export_json(self, path=None):
+        """将快照导出为 JSON 字符串，如果给了 path 则同时写入文件。"""
+        text = json.dumps(self.snapshot(), ensure_ascii=False, indent=2)
+        if path is not None:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return text
+
+    def start_reporter(self, interval=60.0, sink=None, reset=False):
+        """
+        启动一个后台线程，每隔 interval 秒把快照交给 sink。
+        这是一个可选功能，不调用就不会有任何后台线程。
+        """
+        if self._reporter is not None:
+            return self._reporter
+        self._reporter = _PeriodicReporter(self, interval, sink or _print_report, reset)
+        self._reporter.start()
+        return self._reporter
+
+    def stop_reporter(self):
+        if self._reporter is not None:
+            self._reporter.stop()
+            self._reporter = None
+
+
+class _PeriodicReporter(threading.Thread):
+    def __init__(self, registry, interval, sink, reset):
+        super().__init__(name="timing-reporter", daemon=True)
+        self._registry = registry
+        self._interval = interval
+        self._sink = sink
+        self._reset = reset
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self._interval):
+            self._report()
+
+    def _report(self):
+        # 先读数再清零会丢掉两步之间的记录，这里在一次加锁中同时完成
+        self._sink(self._registry.snapshot(reset=self._reset))
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        # 停止时补发最后一次报告，避免丢失最后一个周期的数据
+        self._report()
+
+
+def _print_report(snapshot):
+    for name, stats in snapshot.items():
+        print(f"[timing] {name}: count={stats['count']} "
+              f"p50={stats['p50']*1e6:.1f}us p90={stats['p90']*1e6:.1f}us "
+              f"p99={stats['p99']*1e6:.1f}us max={stats['max']*1e6:.1f}us")
+
+
+# 默认的全局注册表
+TIMINGS = TimingRegistry()
+
+
+def timer(func=None, *, mode="print", registry=None):
+    """
+    一个用于计算函数执行时间的装饰器。
+    mode="print"    : 和之前一样，每次调用都打印耗时。
+    mode="histogram": 不打印，只把耗时记录到注册表中的直方图里。
+    既可以写成 @timer，也可以写成 @timer(mode="histogram")。
+    """
+    if func is None:
+        return functools.partial(timer, mode=mode, registry=registry)
+
+    if mode == "print":
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            result = func(*args, **kwargs)
+            end_time = time.perf_counter()
+            run_time = end_time - start_time
+            print(f"函数 {func.__name__!r} 执行耗时: {run_time:.4f} 秒")
+            return result
+        return wrapper
+
+    if mode != "histogram":
+        raise ValueError(f"未知计时模式: {mode}")
+
+    # 在装饰时就把直方图和计时函数取出来，调用时不再做任何查找
+    hist = (registry or TIMINGS).histogram(func.__module__, func.__qualname__)
+    record = hist.record
+    clock = time.perf_counter_ns
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start_ns = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(clock() - start_ns)
+    wrapper.histogram = hist
+    return wrapper
+
+
+# 客户端代码（放在 __main__ 保护中，基准测试脚本可以直接加载这里的装饰器）
+if __name__ == "__main__":
+    @timer(mode="histogram")
+    def predict(x):
+        """模拟一个被高频调用的热点函数。"""
+        return sum(i * x for i in range(200))
+
+    @timer(mode="histogram")
+    def load_feature(key):
+        time.sleep(0.001)
+        return key.upper()
+
+    @timer
+    def train_one_epoch():
+        time.sleep(0.1)
+        return "epoch 完成"
+
+    # 打印模式的行为和之前完全一致
+    print(train_one_epoch())
+
+    print("---")
+    # 直方图模式：调用成千上万次也不会刷屏
+    TIMINGS.start_reporter(interval=0.2)
+    for i in range(20000):
+        predict(i)
+    for i in range(50):
+        load_feature(f"user_{i}")
+    TIMINGS.stop_reporter()
+
+    print("---")
+    # 多线程记录，同时后台线程每 10 毫秒读数并清零：每个周期的计数加起来正好等于调用次数
+    registry = TimingRegistry()
+
+    @timer(mode="histogram", registry=registry)
+    def score(x):
+        return x * 2
+
+    reports = []
+    registry.start_reporter(interval=0.01, sink=reports.append, reset=True)
+    workers = [threading.Thread(target=lambda: [score(i) for i in range(50_000)]) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    registry.stop_reporter()
+    reported = sum(report[f"{__name__}.score"]["count"] for report in reports if report)
+    print(f"4 个线程共调用 {4 * 50_000} 次，{len(reports)} 次带清零的报告合计 {reported} 次")
+
+    print("---")
+    print("导出的 JSON 快照:")
+    print(TIMINGS.export_json())
+
+    TIMINGS.reset()
+    print(f"重置后 predict 的调用次数: {TIMINGS.snapshot()[f'{__name__}.predict']['count']}")
@@ -0,0 +1,268 @@
+import sys
+import time
+import threading
+import functools
+from collections import OrderedDict, namedtuple
+
+# waits: 没有命中缓存、但等到了另一个线程正在进行的同一个计算的调用次数，既不算命中也不算未命中
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "waits", "evictions", "expirations", "currsize", "bytes"])
+
+# 和 functools.lru_cache 一样，用一个唯一的哨兵对象把位置参数和关键字参数隔开
+_KWD_MARK = object()
+
+
+def _make_key(args, kwargs):
+    key = args
+    if kwargs:
+        key += (_KWD_MARK,) + tuple(sorted(kwargs.items()))
+    return key
+
+
+class _Entry:
+    __slots__ = ("value", "size", "expire_at", "freq")
+
+    def __init__(self, value, size, expire_at):
+        self.value = value
+        self.size = size
+        self.expire_at = expire_at
+        self.freq = 1
+
+
+class _LRUPolicy:
+    """最近最少使用：OrderedDict 的尾部是最新访问的键。"""
+    def __init__(self):
+        self._order = OrderedDict()
+
+    def add(self, key, entry):
+        self._order[key] = None
+
+    def touch(self, key, entry):
+        self._order.move_to_end(key)
+
+    def remove(self, key, entry):
+        del self._order[key]
+
+    def victim(self):
+        return next(iter(self._order))
+
+    def clear(self):
+        self._order.clear()
+
+
+class _LFUPolicy:
+    """
+    最不经常使用：按访问频率分桶，每个桶内部再按 LRU 排序。
+    所有操作都是 O(1)。
+    """
+    def __init__(self):
+        self._buckets = {}
+        self._min_freq = 0
+
+    def add(self, key, entry):
+        entry.freq = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_freq = 1
+
+    def touch(self, key, entry):
+        bucket = self._buckets[entry.freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[entry.freq]
+            if self._min_freq == entry.freq:
+                self._min_freq += 1
+        entry.freq += 1
+        self._buckets.setdefault(entry.freq, OrderedDict())[key] = None
+
+    def remove(self, key, entry):
+        bucket = self._buckets[entry.freq]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[entry.freq]
+            if self._min_freq == entry.freq and self._buckets:
+                self._min_freq = min(self._buckets)
+
+    def victim(self):
+        return next(iter(self._buckets[self._min_freq]))
+
+    def clear(self):
+        self._buckets.clear()
+        self._min_freq = 0
+
+
+_POLICIES = {"lru": _LRUPolicy, "lfu": _LFUPolicy}
+
+
+class _Flight:
+    """
+    一次正在进行中的计算，后来的线程在这里等待结果。
+    绝大多数未命中没有人等待，创建一个 Event 要花好几微秒，所以 done 在第一个等待者出现时才（在锁内）创建。
+    """
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = None
+        self.value = None
+        self.error = None
+
+
+def ttl_cache(ttl=None, max_bytes=None, policy="lru", sizer=sys.getsizeof):
+    """
+    一个带过期时间和内存预算的缓存装饰器。
+    ttl      : 每个条目的存活秒数，None 表示永不过期。
+    max_bytes: 所有缓存值的总字节数上限，None 表示不限制。
+    policy   : 超出预算时的淘汰策略，"lru" 或 "lfu"。
+    sizer    : 计算一个值占用多少字节的函数，默认是 sys.getsizeof。
+    """
+    if policy not in _POLICIES:
+        raise ValueError(f"未知淘汰策略: {policy}")
+
+    def decorator(func):
+        entries = {}
+        order = _POLICIES[policy]()
+        flights = {}
+        lock = threading.Lock()
+        stats = {"hits": 0, "misses": 0, "waits": 0, "evictions": 0, "expirations": 0, "bytes": 0}
+        clock = time.monotonic
+
+        def _drop(key, entry):
+            del entries[key]
+            order.remove(key, entry)
+            stats["bytes"] -= entry.size
+
+        def _store(key, value):
+            size = sizer(value)
+            if max_bytes is not None and size > max_bytes:
+                # 单个值就超过了预算，直接不缓存
+                return
+            old = entries.get(key)
+            if old is not None:
+                _drop(key, old)
+            while max_bytes is not None and entries and stats["bytes"] + size > max_bytes:
+                victim = order.victim()
+                _drop(victim, entries[victim])
+                stats["evictions"] += 1
+            expire_at = clock() + ttl if ttl is not None else None
+            entry = _Entry(value, size, expire_at)
+            entries[key] = entry
+            order.add(key, entry)
+            stats["bytes"] += size
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs)
+            with lock:
+                entry = entries.get(key)
+                if entry is not None:
+                    if entry.expire_at is None or entry.expire_at > clock():
+                        stats["hits"] += 1
+                        order.touch(key, entry)
+                        return entry.value
+                    _drop(key, entry)
+                    stats["expirations"] += 1
+                flight = flights.get(key)
+                leader = flight is None
+                if leader:
+                    stats["misses"] += 1
+                    flight = flights[key] = _Flight()
+                else:
+                    stats["waits"] += 1
+                    if flight.done is None:
+                        flight.done = threading.Event()
+                    done = flight.done
+
+            if not leader:
+                # single-flight：同一个键已经有线程在计算了，等它算完直接用结果
+                done.wait()
+                if flight.error is not None:
+                    raise flight.error
+                return flight.value
+
+            stored = False
+            try:
+                value = func(*args, **kwargs)
+                flight.value = value
+                stored = True
+                return value
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                # 写入缓存和结束这次计算在同一次加锁中完成：之后到达的线程要么命中缓存，要么自己成为新的计算者
+                with lock:
+                    if stored:
+                        _store(key, value)
+                    del flights[key]
+                    done = flight.done
+                if done is not None:
+                    done.set()
+
+        def cache_info():
+            with lock:
+                return CacheInfo(stats["hits"], stats["misses"], stats["waits"], stats["evictions"],
+                                 stats["expirations"], len(entries), stats["bytes"])
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+                order.clear()
+                for name in stats:
+                    stats[name] = 0
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
+# 客户端代码（放在 __main__ 保护中，基准测试脚本可以直接加载这里的装饰器）
+if __name__ == "__main__":
+    # 和 lru_cache 一样可以用在递归函数上
+    @ttl_cache(ttl=60)
+    def fibonacci_with_cache(n):
+        if n < 2:
+            return n
+        return fibonacci_with_cache(n-1) + fibonacci_with_cache(n-2)
+
+    print("测试 ttl_cache 缓存的斐波那契函数:")
+    print(f"结果: {fibonacci_with_cache(100)}")
+    print(fibonacci_with_cache.cache_info())
+
+    print("---")
+    print("测试过期时间和字节预算:")
+
+    # 模拟一个查询特征向量的函数，每个结果大约 8KB
+    @ttl_cache(ttl=0.2, max_bytes=40_000, policy="lfu")
+    def load_embedding(user_id):
+        return [float(user_id)] * 1000
+
+    for user_id in range(3):
+        for _ in range(3):
+            load_embedding(user_id)   # 热点用户，频繁访问
+    for user_id in range(3, 10):
+        load_embedding(user_id)       # 冷门用户，只访问一次
+    print(f"超出预算后的统计: {load_embedding.cache_info()}")
+    load_embedding(0)
+    print(f"热点用户仍然命中: {load_embedding.cache_info()}")
+    time.sleep(0.25)
+    load_embedding(0)
+    print(f"过期后重新计算: {load_embedding.cache_info()}")
+
+    print("---")
+    print("测试 single-flight：10 个线程同时请求同一个键")
+
+    call_count = 0
+
+    @ttl_cache(ttl=10)
+    def slow_model_lookup(name):
+        global call_count
+        call_count += 1
+        time.sleep(0.2)
+        return f"model<{name}>"
+
+    threads = [threading.Thread(target=slow_model_lookup, args=("resnet",)) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"底层函数实际只执行了 {call_count} 次")
+    print(slow_model_lookup.cache_info())
@@ -0,0 +1,250 @@
+import os
+import time
+import types
+import pickle
+import sqlite3
+import hashlib
+import tempfile
+import threading
+import functools
+import multiprocessing
+from collections.abc import Hashable
+
+# 固定 pickle 协议，保证同一组参数在不同进程、不同次运行中得到相同的字节
+_PICKLE_PROTOCOL = 4
+
+
+class DiskMemoStore:
+    """
+    一个基于 SQLite 的持久化结果存储。
+    使用 WAL 日志模式：多个进程可以同时读，写入时也不会阻塞读取。
+    """
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        # 建表只需要做一次
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS memo ("
+                " key TEXT PRIMARY KEY,"
+                " func TEXT NOT NULL,"
+                " version TEXT NOT NULL,"
+                " value BLOB NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS memo_func ON memo (func, version)")
+
+    def _connect(self):
+        # SQLite 连接不能跨线程、跨进程共享，所以每个线程、每个进程各开一个
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute("SELECT value FROM memo WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def put(self, key, func_name, version, blob):
+        # 兄弟进程可能已经写入了同一个键，INSERT OR IGNORE 让先写入者胜出
+        self._connect().execute(
+            "INSERT OR IGNORE INTO memo (key, func, version, value, created) VALUES (?, ?, ?, ?, ?)",
+            (key, func_name, version, blob, time.time()),
+        )
+
+    def invalidate(self, func_name, keep_version=None):
+        """删除某个函数的缓存。给定 keep_version 时只删除其他版本的结果。"""
+        conn = self._connect()
+        if keep_version is None:
+            cur = conn.execute("DELETE FROM memo WHERE func = ?", (func_name,))
+        else:
+            cur = conn.execute("DELETE FROM memo WHERE func = ? AND version != ?", (func_name, keep_version))
+        return cur.rowcount
+
+    def count(self, func_name):
+        return self._connect().execute("SELECT COUNT(*) FROM memo WHERE func = ?", (func_name,)).fetchone()[0]
+
+
+def _hash_const(h, const):
+    """把一个常量写进哈希。嵌套的函数、lambda、推导式都以代码对象的形式出现在常量中，需要递归处理。"""
+    if isinstance(const, types.CodeType):
+        _hash_code(h, const)
+    elif isinstance(const, (tuple, frozenset)):
+        # frozenset 的迭代顺序受字符串哈希随机化影响，先按 repr 排序，保证不同进程得到相同的指纹
+        items = const if isinstance(const, tuple) else sorted(const, key=repr)
+        h.update(b"(" if isinstance(const, tuple) else b"{")
+        for item in items:
+            _hash_const(h, item)
+            h.update(b",")
+        h.update(b")")
+    else:
+        h.update(f"{type(const).__name__}:{const!r};".encode())
+
+
+def _hash_code(h, code):
+    # 只哈希 co_code 是不够的：return x*2 改成 return x*3 时，字节码完全相同，变的只是常量表
+    h.update(code.co_code)
+    for const in code.co_consts:
+        _hash_const(h, const)
+    h.update(repr(code.co_names).encode())
+    h.update(repr(code.co_varnames).encode())
+
+
+# 这些类型的 repr 在任何进程中都相同，可以直接写进哈希
+_SCALAR_TYPES = (type(None), bool, int, float, complex, str, bytes)
+
+
+def _hash_arg(h, value):
+    """
+    把一个参数按规范形式写进哈希，与 _hash_const 的做法相同。
+    直接 pickle 整组参数是不行的：set、frozenset 和以字符串为键的 dict 的迭代顺序受哈希随机化影响，
+    同一次调用在另一个解释器中会得到不同的字节。这里集合和字典的元素先各自哈希，再按摘要排序。
+    """
+    if type(value) in _SCALAR_TYPES:
+        h.update(f"{type(value).__name__}:{value!r};".encode())
+    elif type(value) in (tuple, list):
+        h.update(f"{type(value).__name__}(".encode())
+        for item in value:
+            _hash_arg(h, item)
+            h.update(b",")
+        h.update(b")")
+    elif type(value) in (set, frozenset):
+        _hash_unordered(h, type(value).__name__, ((item,) for item in value))
+    elif type(value) is dict:
+        _hash_unordered(h, "dict", value.items())
+    else:
+        # 其他类型只能依赖 pickle：要求它可哈希（不可变），并且能被 pickle
+        cls = f"{type(value).__module__}.{type(value).__qualname__}"
+        if not isinstance(value, Hashable):
+            raise TypeError(f"disk_memoize 的参数必须是不可变的，{cls} 类型的对象不可哈希")
+        try:
+            blob = pickle.dumps(value, protocol=_PICKLE_PROTOCOL)
+        except Exception as exc:
+            raise TypeError(f"disk_memoize 的参数必须能被 pickle，{cls} 类型的对象不行: {exc}") from exc
+        h.update(f"{cls}:{len(blob)}:".encode())
+        h.update(blob)
+
+
+def _hash_unordered(h, tag, entries):
+    """集合和字典：每个元素（或键值对）先单独哈希，再按摘要排序后写入，结果与迭代顺序无关。"""
+    digests = []
+    for entry in entries:
+        sub = hashlib.sha256()
+        for part in entry:
+            _hash_arg(sub, part)
+        digests.append(sub.digest())
+    h.update(f"{tag}{{".encode())
+    for digest in sorted(digests):
+        h.update(digest)
+    h.update(b"}")
+
+
+def _function_identity(func):
+    """
+    函数的名字：源文件的真实路径 + 限定名。
+    不使用 __module__：spawn 方式启动的子进程中，主脚本的模块名是 __mp_main__ 而不是 __main__，
+    父进程和子进程会因此用不同的名字，永远无法共享缓存条目。
+    """
+    return f"{os.path.realpath(func.__code__.co_filename)}:{func.__qualname__}"
+
+
+def _function_fingerprint(func, version):
+    """
+    函数的稳定指纹：源文件路径 + 限定名 + 用户给定的版本号 + 代码对象（字节码、常量、引用的名字，
+    包括嵌套函数的代码对象）+ 参数默认值。
+    修改了函数体（包括其中的常量和嵌套函数）或默认参数，都会自动得到新的指纹，旧结果不会被误用。
+    注意：函数调用的其他全局函数被修改时，指纹不会变化，这时需要手动提升 version。
+    """
+    h = hashlib.sha256()
+    h.update(_function_identity(func).encode())
+    h.update(str(version).encode())
+    _hash_code(h, func.__code__)
+    _hash_const(h, func.__defaults__ or ())
+    _hash_const(h, tuple(sorted((func.__kwdefaults__ or {}).items())))
+    return h.hexdigest()[:16]
+
+
+def disk_memoize(store, version="1"):
+    """
+    一个持久化的、跨进程共享的缓存装饰器，适用于昂贵的纯函数。
+    参数必须由基本类型、tuple、list、set、frozenset、dict 组成，或者是可哈希、能被 pickle 的对象；
+    返回值需要能被 pickle。
+    """
+    def decorator(func):
+        func_name = _function_identity(func)
+        fingerprint = _function_fingerprint(func, version)
+        stats = {"hits": 0, "misses": 0}
+
+        def _make_key(args, kwargs):
+            h = hashlib.sha256()
+            _hash_arg(h, args)
+            _hash_arg(h, kwargs)
+            return fingerprint + ":" + h.hexdigest()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs)
+            blob = store.get(key)
+            if blob is not None:
+                stats["hits"] += 1
+                return pickle.loads(blob)
+            stats["misses"] += 1
+            result = func(*args, **kwargs)
+            store.put(key, func_name, fingerprint, pickle.dumps(result, protocol=_PICKLE_PROTOCOL))
+            return result
+
+        def invalidate_old_versions():
+            """删除除当前版本以外的所有结果，通常在部署新版本后调用一次。"""
+            return store.invalidate(func_name, keep_version=fingerprint)
+
+        def cache_clear():
+            return store.invalidate(func_name)
+
+        wrapper.cache_name = func_name
+        wrapper.cache_stats = lambda: dict(stats)
+        wrapper.invalidate_old_versions = invalidate_old_versions
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
+# 客户端代码
+STORE = DiskMemoStore(os.path.join(tempfile.gettempdir(), "design_pattern_memo.sqlite"))
+
+@disk_memoize(STORE, version="1")
+def expensive_feature(n):
+    """模拟一个昂贵的纯函数：朴素递归的斐波那契。"""
+    def fib(k):
+        return k if k < 2 else fib(k-1) + fib(k-2)
+    return fib(n)
+
+
+def worker(n):
+    # 每个工作进程都会先查询磁盘缓存，兄弟进程算过的结果可以直接复用
+    start = time.perf_counter()
+    result = expensive_feature(n)
+    return n, result, time.perf_counter() - start, os.getpid()
+
+
+if __name__ == "__main__":
+    expensive_feature.cache_clear()
+
+    print("第一轮：进程池中的工作进程各自计算并写入磁盘缓存")
+    with multiprocessing.Pool(4) as pool:
+        for n, result, cost, pid in pool.map(worker, [24, 25, 26, 27]):
+            print(f"  [pid {pid}] expensive_feature({n}) = {result}, 耗时 {cost:.4f} 秒")
+
+    print("---")
+    print("第二轮：模拟热重启，新的进程池（spawn 方式启动，子进程中的模块名是 __mp_main__）直接从磁盘读取结果")
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        for n, result, cost, pid in pool.map(worker, [24, 25, 26, 27]):
+            print(f"  [pid {pid}] expensive_feature({n}) = {result}, 耗时 {cost:.4f} 秒")
+
+    print("---")
+    print(f"主进程调用 expensive_feature(27): {expensive_feature(27)}，命中统计 {expensive_feature.cache_stats()}")
+    print(f"磁盘上缓存的条目数: {STORE.count(expensive_feature.cache_name)}")
+    print(f"清理旧版本后删除了 {expensive_feature.invalidate_old_versions()} 条")
@@ -0,0 +1,241 @@
+import types
+import weakref
+import threading
+import functools
+
+
+class CallCounter:
+    """
+    一个线程安全、可以放在高频函数上的调用计数装饰器类。
+    每个线程只写自己的计数分片 (shard)，读取时再把所有分片合并，
+    所以调用路径上既没有锁，也没有 print。
+    分片只会被自己的线程修改：已经退出的线程的分片在读取或新建分片时合并进基数；
+    reset 也不修改分片，只记下当时的计数，之后读数时减去。
+    """
+    # 所有计数器实例，用于统一导出；使用 WeakSet 避免影响垃圾回收
+    _instances = weakref.WeakSet()
+    _exporters = []
+    # 分片中整数计数的个数：第 0 个是调用次数，子类可以增加更多（例如完成次数）
+    _COUNTERS = 1
+
+    def __init__(self, func=None, *, by_signature=False):
+        self._kind = None
+        if isinstance(func, (classmethod, staticmethod)):
+            # 支持写在 @classmethod / @staticmethod 上方
+            self._kind = type(func)
+            func = func.__func__
+        self.func = func
+        self._by_signature = by_signature
+        # 每个线程一个分片：[总次数, ..., {签名: 次数}]
+        self._local = threading.local()
+        self._shards = []                            # [(线程, 分片)]
+        self._base = [0] * self._COUNTERS + [{}]     # 已经退出的线程留下的计数
+        self._offset = [0] * self._COUNTERS + [{}]   # 上一次 reset 时的计数
+        self._shards_lock = threading.Lock()
+        if func is not None:
+            functools.update_wrapper(self, func)
+        CallCounter._instances.add(self)
+
+    def _shard(self):
+        """当前线程的分片。"""
+        try:
+            return self._local.shard
+        except AttributeError:
+            return self._new_shard()
+
+    def _new_shard(self):
+        shard = [0] * self._COUNTERS + [{}]
+        # 只有每个线程第一次调用时才需要加锁
+        with self._shards_lock:
+            self._fold_dead_shards()
+            self._shards.append((threading.current_thread(), shard))
+        self._local.shard = shard
+        return shard
+
+    def _fold_dead_shards(self):
+        """把已经退出的线程的分片合并进基数，分片列表不会随着线程的创建和退出无限增长。调用时必须持有锁。"""
+        alive = []
+        base_signatures = self._base[-1]
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+                continue
+            # 线程已经退出，它的分片不会再被修改
+            for i in range(self._COUNTERS):
+                self._base[i] += shard[i]
+            for signature, count in shard[-1].items():
+                base_signatures[signature] = base_signatures.get(signature, 0) + count
+        self._shards = alive
+
+    def _totals(self):
+        """从创建以来的 [总次数, ..., {签名: 次数}]，还没有减去 reset 时的计数。调用时必须持有锁。"""
+        self._fold_dead_shards()
+        totals = self._base[:-1]
+        merged = dict(self._base[-1])
+        for _, shard in self._shards:
+            for i in range(self._COUNTERS):
+                totals[i] += shard[i]
+            # dict.copy 在持有 GIL 时一次完成，不会和分片所属线程的写入交错
+            for signature, count in shard[-1].copy().items():
+                merged[signature] = merged.get(signature, 0) + count
+        return totals + [merged]
+
+    def _count(self, index):
+        """合并所有线程分片后的第 index 个计数。"""
+        with self._shards_lock:
+            self._fold_dead_shards()
+            total = self._base[index] + sum(shard[index] for _, shard in self._shards)
+            return total - self._offset[index]
+
+    def __call__(self, *args, **kwargs):
+        if self.func is None:
+            # 以 @CallCounter(by_signature=True) 的形式使用时，第一次调用传入的是被装饰函数
+            counter = type(self)(*args, by_signature=self._by_signature)
+            CallCounter._instances.discard(self)
+            return counter
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        shard[0] += 1
+        if self._by_signature:
+            signature = tuple(type(a).__name__ for a in args)
+            if kwargs:
+                # 关键字参数记为 "名字=类型"，和位置参数的类型区分开
+                signature += tuple(f"{name}={type(value).__name__}" for name, value in sorted(kwargs.items()))
+            by_sig = shard[-1]
+            by_sig[signature] = by_sig.get(signature, 0) + 1
+        return self.func(*args, **kwargs)
+
+    def __get__(self, instance, owner=None):
+        # 实现描述符协议，这样装饰器才能用在方法上
+        if self._kind is staticmethod:
+            return self
+        if self._kind is classmethod:
+            return types.MethodType(self, owner if owner is not None else type(instance))
+        if instance is None:
+            return self
+        return types.MethodType(self, instance)
+
+    @property
+    def calls(self):
+        """合并所有线程分片后的总调用次数。"""
+        return self._count(0)
+
+    def signature_counts(self):
+        with self._shards_lock:
+            merged = self._totals()[-1]
+            offset = self._offset[-1]
+        counts = {signature: count - offset.get(signature, 0) for signature, count in merged.items()}
+        return {signature: count for signature, count in counts.items() if count}
+
+    def snapshot(self):
+        result = {"name": self.func.__qualname__, "calls": self.calls}
+        if self._by_signature:
+            result["signatures"] = {", ".join(sig) or "()": n for sig, n in self.signature_counts().items()}
+        return result
+
+    def reset(self):
+        """
+        清零计数。分片仍然只由自己的线程修改，这里只记下当前的计数，
+        之后读数时减去，所以不会和正在进行的调用产生竞争。
+        """
+        with self._shards_lock:
+            self._offset = self._totals()
+
+    @classmethod
+    def add_exporter(cls, exporter):
+        """注册一个导出函数，它会收到所有计数器的快照列表。"""
+        cls._exporters.append(exporter)
+        return exporter
+
+    @classmethod
+    def export_all(cls):
+        snapshots = [counter.snapshot() for counter in list(cls._instances)]
+        for exporter in cls._exporters:
+            exporter(snapshots)
+        return snapshots
+
+
+# 客户端代码（放在 __main__ 保护中，基准测试脚本可以直接加载这里的装饰器）
+if __name__ == "__main__":
+    # 将 @CallCounter 放在你想要统计调用次数的函数上方
+    @CallCounter
+    def add_numbers(a, b):
+        """
+        一个简单的加法函数。
+        """
+        return a + b
+
+    @CallCounter(by_signature=True)
+    def scale(x, factor=1):
+        return x * factor
+
+    class FeatureStore:
+        # 装饰器类现在可以用在实例方法、类方法和静态方法上
+        @CallCounter
+        def lookup(self, key):
+            return f"{key}@{id(self) % 1000}"
+
+        @CallCounter
+        @classmethod
+        def create(cls):
+            return cls()
+
+        @CallCounter
+        @staticmethod
+        def normalize(key):
+            return key.strip().lower()
+
+    # 多线程并发调用，计数不会丢失
+    def hammer():
+        for i in range(100_000):
+            add_numbers(i, 1)
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"add_numbers 函数总共被调用了 {add_numbers.calls} 次。(预期 800000)")
+
+    # 线程退出后，分片被合并进基数，计数保持不变
+    add_numbers(1, 2)
+    print(f"再调用一次: {add_numbers.calls} 次，仍在使用的分片数: {len(add_numbers._shards)}")
+
+    # 一边调用一边 reset：reset 只记下当时的计数，不会和调用线程争抢同一个分片
+    stop = threading.Event()
+
+    def keep_calling():
+        while not stop.is_set():
+            add_numbers(0, 0)
+
+    worker = threading.Thread(target=keep_calling)
+    worker.start()
+    add_numbers.reset()
+    stop.set()
+    worker.join()
+    before = add_numbers.calls
+    add_numbers(1, 1)
+    print(f"并发 reset 之后计数继续累加: {before} -> {add_numbers.calls}")
+
+    print("---")
+    store = FeatureStore.create()
+    other = FeatureStore.create()
+    store.lookup(FeatureStore.normalize(" User_1 "))
+    other.lookup("user_2")
+    print(f"FeatureStore.lookup 被调用了 {FeatureStore.lookup.calls} 次")
+    print(f"FeatureStore.create 被调用了 {FeatureStore.create.calls} 次")
+    print(f"FeatureStore.normalize 被调用了 {FeatureStore.normalize.calls} 次")
+
+    print("---")
+    scale(2)
+    scale(2.5)
+    scale(3, factor=2)
+    print(f"按参数签名统计: {scale.signature_counts()}")
+
+    print("---")
+    # 导出钩子：可以接到监控系统，这里直接打印
+    CallCounter.add_exporter(lambda snapshots: print(f"导出 {len(snapshots)} 个计数器"))
+    for item in sorted(CallCounter.export_all(), key=lambda s: s["name"]):
+        print(item)
@@ -0,0 +1,253 @@
+import os
+import sys
+import time
+import asyncio
+import inspect
+import threading
+import functools
+import importlib.util
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "maxsize", "currsize"])
+
+
+def _load_module(name, filename):
+    """同一目录下的脚本以数字开头，不能直接 import，按路径加载；已经加载过的直接复用。"""
+    module = sys.modules.get(name)
+    if module is None:
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+# 缓存键的构造和 02 节的 ttl_cache 相同；CallCounter 沿用 04 节按线程分片的计数器
+_make_key = _load_module("ttl_cache", "02-ttl_cache.py")._make_key
+_ShardedCallCounter = _load_module("call_counter", "04-call_counter.py").CallCounter
+
+
+def timer(func):
+    """
+    一个用于计算函数执行时间的装饰器。
+    如果被装饰的是 async def 函数，计时的是 await 完成的整个过程，而不是创建协程对象的时间。
+    """
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            result = await func(*args, **kwargs)
+            end_time = time.perf_counter()
+            run_time = end_time - start_time
+            print(f"协程 {func.__name__!r} 执行耗时: {run_time:.4f} 秒")
+            return result
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start_time = time.perf_counter()
+        result = func(*args, **kwargs)
+        end_time = time.perf_counter()
+        run_time = end_time - start_time
+        print(f"函数 {func.__name__!r} 执行耗时: {run_time:.4f} 秒")
+        return result
+    return wrapper
+
+
+def timer_with_precision(precision=4):
+    """
+    一个带参数的计时装饰器，可以自定义打印精度，同样支持 async def 函数。
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start_time = time.perf_counter()
+                result = await func(*args, **kwargs)
+                run_time = time.perf_counter() - start_time
+                print(f"协程 {func.__name__!r} 执行耗时: {run_time:.{precision}f} 秒")
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            result = func(*args, **kwargs)
+            run_time = time.perf_counter() - start_time
+            print(f"函数 {func.__name__!r} 执行耗时: {run_time:.{precision}f} 秒")
+            return result
+        return wrapper
+    return decorator
+
+
+class CallCounter(_ShardedCallCounter):
+    """
+    一个用于统计函数调用次数的装饰器类，计数方式和 04 节相同：每个线程只写自己的分片。
+    对 async def 函数，calls 统计调用次数，completed 统计真正 await 完成的次数。
+    """
+    # 分片中的整数计数：[调用次数, 完成次数]
+    _COUNTERS = 2
+
+    def __init__(self, func=None, *, by_signature=False):
+        super().__init__(func, by_signature=by_signature)
+        self._is_async = inspect.iscoroutinefunction(self.func)
+        if self._is_async and hasattr(inspect, "markcoroutinefunction"):
+            # Python 3.12+：让 inspect.iscoroutinefunction(计数器) 也返回 True
+            inspect.markcoroutinefunction(self)
+
+    def __call__(self, *args, **kwargs):
+        result = super().__call__(*args, **kwargs)
+        if self.func is None:
+            return result
+        if self._is_async:
+            # 此时拿到的只是协程对象，等 await 完成后才算完成
+            return self._await(result)
+        self._shard()[1] += 1
+        return result
+
+    async def _await(self, coro):
+        result = await coro
+        # 协程可能在另一个线程的事件循环中完成，所以完成时再取当前线程的分片
+        self._shard()[1] += 1
+        return result
+
+    @property
+    def completed(self):
+        return self._count(1)
+
+    def snapshot(self):
+        result = super().snapshot()
+        result["completed"] = self.completed
+        return result
+
+
+def cache(maxsize=128):
+    """
+    一个同时支持普通函数和 async def 函数的缓存装饰器。
+    普通函数直接交给 functools.lru_cache；
+    协程函数缓存的是 await 之后的结果，并且同一个键的并发请求只会真正执行一次。
+    """
+    def decorator(func):
+        if not inspect.iscoroutinefunction(func):
+            return functools.lru_cache(maxsize=maxsize)(func)
+
+        results = OrderedDict()
+        in_flight = {}
+        stats = {"hits": 0, "misses": 0}
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs)
+            if key in results:
+                stats["hits"] += 1
+                results.move_to_end(key)
+                return results[key]
+            stats["misses"] += 1
+
+            task = in_flight.get(key)
+            if task is None:
+                # 第一个请求者创建任务，后来者直接 await 同一个任务
+                task = asyncio.ensure_future(func(*args, **kwargs))
+                in_flight[key] = task
+                task.add_done_callback(functools.partial(_on_done, key))
+            # shield：某个等待者被取消时，不会连带取消其他人共享的任务
+            return await asyncio.shield(task)
+
+        def _on_done(key, task):
+            in_flight.pop(key, None)
+            if task.cancelled() or task.exception() is not None:
+                # 失败的结果不缓存，下次调用会重试
+                return
+            results[key] = task.result()
+            results.move_to_end(key)
+            if maxsize is not None and len(results) > maxsize:
+                results.popitem(last=False)
+
+        def cache_info():
+            return CacheInfo(stats["hits"], stats["misses"], maxsize, len(results))
+
+        def cache_clear():
+            results.clear()
+            stats["hits"] = stats["misses"] = 0
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
+
+
+# 客户端代码（放在 __main__ 保护中，基准测试脚本可以直接加载这里的装饰器）
+if __name__ == "__main__":
+    @timer
+    async def infer(x):
+        """模拟一次异步推理请求。"""
+        await asyncio.sleep(0.2)
+        return x * 2
+
+    @timer_with_precision(precision=6)
+    async def preprocess(x):
+        await asyncio.sleep(0.01)
+        return x + 1
+
+    @CallCounter
+    async def health_check():
+        await asyncio.sleep(0)
+        return "ok"
+
+    backend_calls = 0
+
+    @cache(maxsize=32)
+    async def load_model(name):
+        global backend_calls
+        backend_calls += 1
+        await asyncio.sleep(0.3)
+        return f"model<{name}>"
+
+    @cache(maxsize=None)
+    def fibonacci_with_cache(n):
+        if n < 2:
+            return n
+        return fibonacci_with_cache(n-1) + fibonacci_with_cache(n-2)
+
+
+    async def main():
+        print("测试异步计时 (应约为 0.2 秒，而不是 0.0000 秒):")
+        print(f"结果: {await infer(21)}")
+        print(f"结果: {await preprocess(1)}")
+
+        print("---")
+        pending = health_check()
+        print(f"创建协程后: calls={health_check.calls}, completed={health_check.completed}")
+        await pending
+        print(f"await 之后: calls={health_check.calls}, completed={health_check.completed}")
+
+        print("---")
+        print("10 个并发请求同时加载同一个模型:")
+        models = await asyncio.gather(*(load_model("bert") for _ in range(10)))
+        print(f"结果: {set(models)}，后端实际只被调用了 {backend_calls} 次")
+        await load_model("bert")
+        print(load_model.cache_info())
+
+        print("---")
+        print("普通函数仍然使用 functools.lru_cache:")
+        print(f"结果: {fibonacci_with_cache(30)}")
+
+    asyncio.run(main())
+
+    print("---")
+    # 普通函数在多个线程中同时调用：计数方式和 04 节相同，不会丢失
+    @CallCounter
+    def add_numbers(a, b):
+        return a + b
+
+    def hammer():
+        for i in range(100_000):
+            add_numbers(i, 1)
+
+    threads = [threading.Thread(target=hammer) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"4 个线程各调用 100000 次: calls={add_numbers.calls}, completed={add_numbers.completed} (预期 400000)")
@@ -0,0 +1,286 @@
+import math
+import time
+import random
+import statistics
+import threading
+import functools
+
+# 95% 置信区间对应的 z 值
+_Z_95 = 1.96
+
+
+class _SampledStats:
+    """
+    采样得到的耗时统计，使用 Welford 算法在线计算均值和方差，
+    并根据总调用次数外推总耗时。
+    调用次数和采样间隔按线程分片：每个线程只修改自己的分片 [截至下一次采样的调用次数, 距离下一次采样还剩几次调用]，
+    已经发生的调用次数 = 两者之差。未被采样的调用只需要做一次减法，不需要加锁，也不会丢失计数。
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self._shards = []      # [(线程, 分片)]
+        self._base_calls = 0   # 已经退出的线程留下的调用次数
+        self.samples = 0
+        self.mean_ns = 0.0
+        self.m2 = 0.0
+
+    def new_shard(self):
+        """为当前线程创建分片。顺便把已经退出的线程的分片合并到基数中，分片列表不会无限增长。"""
+        shard = self.local.shard = [1, 1]
+        with self.lock:
+            alive = []
+            for thread, old in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, old))
+                else:
+                    self._base_calls += old[0] - old[1]
+            alive.append((threading.current_thread(), shard))
+            self._shards = alive
+        return shard
+
+    @property
+    def calls(self):
+        with self.lock:
+            return self._base_calls + sum(shard[0] - shard[1] for _, shard in self._shards)
+
+    def add(self, elapsed_ns):
+        """记录一次采样，返回目前的采样次数。"""
+        with self.lock:
+            self.samples += 1
+            delta = elapsed_ns - self.mean_ns
+            self.mean_ns += delta / self.samples
+            self.m2 += delta * (elapsed_ns - self.mean_ns)
+            return self.samples
+
+    def report(self):
+        calls = self.calls
+        with self.lock:
+            n, mean, m2 = self.samples, self.mean_ns, self.m2
+        total = mean * calls
+        if n > 1 and calls > 0:
+            std = math.sqrt(m2 / (n - 1))
+            # 有限总体修正：采样比例越高，误差越小；全部采样时误差为 0
+            fpc = math.sqrt(max(0.0, 1 - n / calls))
+            error = _Z_95 * calls * std / math.sqrt(n) * fpc
+        else:
+            error = float("inf") if calls else 0.0
+        return {
+            "calls": calls,
+            "samples": n,
+            "mean": mean / 1e9,
+            "total": total / 1e9,
+            "total_error_95": error / 1e9,
+        }
+
+
+# 校准是在缓存很热的空函数上做的；夹在真实的函数调用之间时，同样的计时代码实测要慢两到三倍，
+# 所以自适应模式只按预算的三分之一来计算采样率
+_BUDGET_SAFETY = 3
+_overhead_ns = None
+
+
+def _calibrate_overhead(rounds=20000, repeat=3):
+    """
+    测量装饰器本身的开销（纳秒），返回 (未被采样的调用, 被采样的调用)。
+    直接用真正的包装函数去包一个空函数，和不加装饰的空函数比较，包装层、读时钟、统计更新、
+    抽取下一个采样间隔的开销全都算在内。结果在整个进程中只测一次。
+    """
+    global _overhead_ns
+    if _overhead_ns is None:
+        def noop():
+            pass
+
+        def best_ns(fn):
+            clock = time.perf_counter_ns
+            best = float("inf")
+            for _ in range(repeat):
+                start = clock()
+                for _ in range(rounds):
+                    fn()
+                best = min(best, (clock() - start) / rounds)
+            return best
+
+        bare = best_ns(noop)
+        never = best_ns(timer_with_precision(sample_rate=1e-9)(noop))
+        always = best_ns(timer_with_precision(sample_rate=1.0)(noop))
+        unsampled = max(1.0, never - bare)
+        _overhead_ns = (unsampled, max(unsampled + 1.0, always - bare))
+    return _overhead_ns
+
+
+def timer_with_precision(precision=4, sample_rate=None, overhead_budget=None, seed=None):
+    """
+    一个带参数的计时装饰器，可以自定义打印精度，并支持采样。
+    sample_rate    : 固定采样率 (0, 1]，例如 0.01 表示平均每 100 次调用计时一次。
+    overhead_budget: 自适应模式，例如 0.01 表示计时开销最多占墙钟时间的 1%，
+                     装饰器会根据实际测得的函数耗时自动调整采样率。
+    两者都不传时，行为和之前一样：每次调用都计时并打印。
+    """
+    if sample_rate is not None and not 0 < sample_rate <= 1:
+        raise ValueError(f"采样率必须在 (0, 1] 之间: {sample_rate}")
+    if overhead_budget is not None and not 0 < overhead_budget < 1:
+        raise ValueError(f"开销预算必须在 (0, 1) 之间: {overhead_budget}")
+
+    def decorator(func):
+        if sample_rate is None and overhead_budget is None:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start_time = time.perf_counter()
+                result = func(*args, **kwargs)
+                end_time = time.perf_counter()
+                run_time = end_time - start_time
+                print(f"函数 {func.__name__!r} 执行耗时: {run_time:.{precision}f} 秒")
+                return result
+            return wrapper
+
+        rng = random.Random(seed)
+        clock = time.perf_counter_ns
+        stats = _SampledStats()
+        local = stats.local
+        overhead_ns = _calibrate_overhead() if overhead_budget is not None else None
+        # 当前采样率放在列表里，方便在闭包中修改；所有线程共用同一个采样率
+        rate = [sample_rate or 1.0]
+
+        def _next_gap(rate):
+            # 几何分布的间隔：和每次调用都掷一次骰子等价，但热路径上只需要做一次减法
+            if rate >= 1.0:
+                return 1
+            return int(math.log(1.0 - rng.random()) / math.log(1.0 - rate)) + 1
+
+        def _adapt():
+            # 每次调用的开销 ≈ 未采样调用的固定开销 + 采样率 × 采样带来的额外开销，
+            # 让它不超过 预算 × 平均调用耗时。固定开销本身就超出预算时，只能降到最低采样率
+            if stats.mean_ns <= 0:
+                return
+            unsampled_ns, sampled_ns = overhead_ns
+            allowed_ns = overhead_budget * stats.mean_ns / _BUDGET_SAFETY
+            new_rate = (allowed_ns - unsampled_ns) / (sampled_ns - unsampled_ns)
+            rate[0] = min(1.0, max(new_rate, 1e-6))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                shard = local.shard
+            except AttributeError:
+                shard = stats.new_shard()
+            shard[1] -= 1
+            if shard[1] > 0:
+                # 未被采样的调用：只修改自己线程的分片，做一次减法和一次比较
+                return func(*args, **kwargs)
+            start_ns = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                samples = stats.add(clock() - start_ns)
+                if overhead_budget is not None and samples % 32 == 0:
+                    _adapt()
+                gap = _next_gap(rate[0])
+                shard[1] = gap
+                shard[0] += gap
+
+        def timing_report():
+            report = stats.report()
+            report["sample_rate"] = rate[0]
+            return report
+
+        def print_report():
+            r = timing_report()
+            print(f"函数 {func.__name__!r}: 调用 {r['calls']} 次，采样 {r['samples']} 次 "
+                  f"(当前采样率 {r['sample_rate']:.4%})")
+            print(f"  平均耗时: {r['mean']:.{precision}f} 秒")
+            print(f"  外推总耗时: {r['total']:.{precision}f} ± {r['total_error_95']:.{precision}f} 秒 (95% 置信区间)")
+
+        wrapper.timing_report = timing_report
+        wrapper.print_report = print_report
+        return wrapper
+    return decorator
+
+
+# 客户端代码（放在 __main__ 保护中，基准测试脚本可以直接加载这里的装饰器）
+if __name__ == "__main__":
+    # 引入我们之前写的斐波那契函数
+    def fibonacci_complex(n):
+        if n < 2:
+            return n
+        return fibonacci_complex(n-1) + fibonacci_complex(n-2)
+
+    # 在一个紧凑的循环里反复调用，每次调用只有一百多微秒，每次都计时的开销就已经超过 1%
+    def score(x):
+        return fibonacci_complex(15) + x
+
+    def passthrough(func):
+        # 对照组：只套一层什么也不做的包装。所有版本都包装同一个 score，
+        # 通过 func(*args, **kwargs) 调用它的方式也完全相同，测出的差别只来自计时本身。
+        # 直接调用 score 时解释器可以把它内联成 Python 之间的调用，耗时会随进程的内存布局上下浮动好几个百分点，
+        # 这个偏差会盖过我们想测的计时开销
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            return func(*args, **kwargs)
+        return wrapper
+
+    score_plain = passthrough(score)
+    score_all = timer_with_precision(precision=6, sample_rate=1.0)(score)
+    score_sampled = timer_with_precision(precision=6, sample_rate=0.01, seed=42)(score)
+    score_budget = timer_with_precision(precision=6, overhead_budget=0.01, seed=42)(score)
+
+    def tight_loop(fn, rounds=3):
+        start = time.perf_counter_ns()
+        for i in range(rounds):
+            fn(i)
+        return time.perf_counter_ns() - start
+
+    variants = {"未加计时（空包装）": score_plain, "每次都计时": score_all, "固定 1% 采样": score_sampled, "1% 开销预算": score_budget}
+    names = list(variants)
+    # 先把每个函数都预热一遍（自适应模式也在这时收敛到稳定的采样率）
+    for fn in variants.values():
+        for _ in range(50):
+            tight_loop(fn)
+    # 机器的速度会随时间漂移，几次运行之间的差异远大于 1%，所以不比较各自独立测得的总耗时，
+    # 而是让所有函数一轮一轮地紧挨着执行（每轮只调用几次，并轮换顺序），每一轮算出各个函数相对未计时版本的耗时比，
+    # 最后取所有轮次的中位数：同一轮内机器状态几乎相同，偶尔被打断的轮次也不会影响中位数
+    ratios = {name: [] for name in names[1:]}
+    totals = dict.fromkeys(names, 0)
+    for r in range(1500):
+        elapsed = {}
+        for name in names[r % len(names):] + names[:r % len(names)]:
+            elapsed[name] = tight_loop(variants[name])
+            totals[name] += elapsed[name]
+        for name in names[1:]:
+            ratios[name].append(elapsed[name] / elapsed["未加计时（空包装）"])
+
+    def median_ci(values):
+        # 中位数的 95% 置信区间：排序后取第 n/2 ± 1.96·√n/2 个值，不需要假设服从正态分布
+        values = sorted(values)
+        n = len(values)
+        half = int(math.ceil(_Z_95 * math.sqrt(n) / 2))
+        return values[n // 2], values[max(0, n // 2 - half)], values[min(n - 1, n // 2 + half)]
+
+    print(f"未加计时的紧凑循环: 共 {totals['未加计时（空包装）'] / 1e9:.4f} 秒")
+    for name in names[1:]:
+        print("---")
+        median, low, high = median_ci(ratios[name])
+        if low <= 1:
+            # 置信区间包含 0：额外开销小到测不出来，不打印没有意义的负数
+            overhead = f"小于测量误差（95% 置信区间上限 {max(high - 1, 0):.2%}）"
+        else:
+            overhead = f"{median - 1:.2%}（95% 置信区间 {low - 1:.2%} ~ {high - 1:.2%}）"
+        print(f"{name}: 共 {totals[name] / 1e9:.4f} 秒，逐轮相对未计时的额外开销 {overhead}")
+        variants[name].print_report()
+
+    print("---")
+    # 多线程同时调用：每个线程只修改自己的分片，调用次数一次也不会丢
+    @timer_with_precision(precision=6, sample_rate=0.01, seed=7)
+    def score_threaded(x):
+        return x + 1
+
+    def hammer():
+        for i in range(100_000):
+            score_threaded(i)
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    print(f"8 个线程各调用 100000 次，统计到的调用次数: {score_threaded.timing_report()['calls']} (预期 800000)")
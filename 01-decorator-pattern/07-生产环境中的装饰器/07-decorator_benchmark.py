@@ -0,0 +1,265 @@
+import os
+import gc
+import sys
+import ast
+import glob
+import json
+import math
+import time
+import types
+import shutil
+import argparse
+import platform
+import tempfile
+import functools
+import itertools
+import statistics
+import contextlib
+import importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PATTERN_DIR = os.path.dirname(HERE)
+
+# 只保留这些语句：01~04 节的示例脚本在模块顶层直接运行演示代码，加载时要跳过
+_DEFINITIONS = (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def _find(pattern):
+    return glob.glob(os.path.join(PATTERN_DIR, pattern))[0]
+
+
+def _load_definitions(name, path):
+    """只执行脚本中的 import、函数和类定义，得到和原文完全相同的装饰器，但不运行演示代码。"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    tree.body = [node for node in tree.body if isinstance(node, _DEFINITIONS)]
+    module = types.ModuleType(name)
+    module.__file__ = path
+    exec(compile(tree, path, "exec"), module.__dict__)
+    return module
+
+
+def _load_module(name, path):
+    """07 节的脚本把演示代码放在 __main__ 保护中，可以直接当作模块加载；已经加载过的直接复用。"""
+    module = sys.modules.get(name)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+# ---
+# 被测试的装饰器：直接加载 01~04 节和本节 01~06 中的实现，而不是在这里重写一份
+
+def build_stacks(store):
+    """
+    装饰器组合：列表中的顺序就是从外到内的书写顺序。
+    返回 {名称: (装饰器列表, 是否缓存结果)}；store 是 disk_memoize 使用的 DiskMemoStore。
+    """
+    simple_timer = _load_definitions("decorator_01", _find("01-*/01-decorator_pattern.py"))
+    precision = _load_definitions("decorator_03", _find("03-*/03-decorator_pattern.py"))
+    counter = _load_definitions("decorator_04", _find("04-*/04-decorator_pattern.py"))
+    histogram = _load_module("histogram_timer", os.path.join(HERE, "01-histogram_timer.py"))
+    ttl = _load_module("ttl_cache", os.path.join(HERE, "02-ttl_cache.py"))
+    disk = _load_module("disk_memoize", os.path.join(HERE, "03-disk_memoize.py"))
+    sharded = _load_module("call_counter", os.path.join(HERE, "04-call_counter.py"))
+    coroutine_aware = _load_module("async_decorators", os.path.join(HERE, "05-async_decorators.py"))
+    sampling = _load_module("sampling_timer", os.path.join(HERE, "06-sampling_timer.py"))
+    lru_cache = functools.lru_cache(maxsize=None)
+    return {
+        "bare": ([], False),
+        "timer": ([simple_timer.timer], False),
+        "timer_with_precision": ([precision.timer_with_precision(6)], False),
+        "CallCounter": ([counter.CallCounter], False),
+        "lru_cache": ([lru_cache], True),
+        "timer+lru_cache": ([simple_timer.timer, lru_cache], True),
+        "CallCounter+timer+lru_cache": ([counter.CallCounter, simple_timer.timer, lru_cache], True),
+        "histogram_timer": ([histogram.timer(mode="histogram")], False),
+        "ttl_cache": ([ttl.ttl_cache(ttl=60)], True),
+        "disk_memoize": ([disk.disk_memoize(store)], True),
+        "sharded_CallCounter": ([sharded.CallCounter], False),
+        "async_timer": ([coroutine_aware.timer], False),
+        "async_CallCounter": ([coroutine_aware.CallCounter], False),
+        "sampled_timer(1%)": ([sampling.timer_with_precision(6, sample_rate=0.01, seed=0)], False),
+        "histogram_timer+ttl_cache": ([histogram.timer(mode="histogram"), ttl.ttl_cache(ttl=60)], True),
+    }
+
+# ---
+# 被装饰的函数：一个几乎不做事的函数，和一个有一定计算量的函数
+
+def trivial(x):
+    return x + 1
+
+def heavy(x):
+    return sum(i * i for i in range(x, x + 2000))
+
+WORKLOADS = {"trivial": trivial, "heavy": heavy}
+
+# 参数模式："distinct" 每次调用都换一个新参数，缓存永远不命中，测到的是包装层和写入缓存的真实开销；
+# "repeat" 一直使用同一个参数，只对缓存类的组合测量，测到的是缓存命中时的耗时
+MODES = ("distinct", "repeat")
+
+# 小样本下 95% 置信区间的 t 分布临界值（自由度 -> t）
+_T_95 = {1: 12.71, 2: 4.30, 3: 3.18, 4: 2.78, 5: 2.57, 6: 2.45, 7: 2.36, 8: 2.31, 9: 2.26,
+         10: 2.23, 15: 2.13, 20: 2.09, 30: 2.04, 60: 2.00, 120: 1.98}
+
+
+def _t_value(df):
+    """
+    表中没有的自由度取不超过它的最大一项：t 临界值随自由度增大而减小，较小自由度的值偏大，
+    置信区间只会略宽而不会偏窄。取下一个更大的自由度会低估临界值，例如 df=11 会用上 df=15 的 2.13。
+    """
+    if df < 1:
+        return float("inf")
+    return _T_95[max(limit for limit in _T_95 if limit <= df)]
+
+
+def apply_stack(func, stack):
+    # 先应用最内层的装饰器，和 @ 语法的顺序一致
+    for decorator in reversed(stack):
+        func = decorator(func)
+    return func
+
+
+def measure(make_func, args, repeat, min_time):
+    """
+    返回每轮测得的单次调用耗时（纳秒）列表。
+    每一轮都重新装饰一次函数，缓存从空开始；args 是参数的迭代器，
+    取参数的开销对所有用例都一样，计算额外开销时会被抵消。
+    """
+    def run(number):
+        func = make_func()
+        next_arg = args.__next__
+        # 和 timeit 一样，计时期间关闭垃圾回收，减少噪声
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            for _ in itertools.repeat(None, number):
+                func(next_arg())
+            return time.perf_counter() - start
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    # 先自动确定循环次数，保证每轮至少运行 min_time 秒
+    number = 1
+    while run(number) < min_time:
+        number *= 2
+    return [run(number) / number * 1e9 for _ in range(repeat)]
+
+
+def summarize(samples):
+    mean = statistics.fmean(samples)
+    stdev = statistics.stdev(samples) if len(samples) > 1 else 0.0
+    half_width = _t_value(len(samples) - 1) * stdev / math.sqrt(len(samples))
+    return {"mean_ns": mean, "ci95_ns": half_width, "min_ns": min(samples), "samples": samples}
+
+
+def run_suite(repeat=7, min_time=0.02):
+    results = {}
+    workdir = tempfile.mkdtemp(prefix="decorator_benchmark_")
+    store_module = _load_module("disk_memoize", os.path.join(HERE, "03-disk_memoize.py"))
+    stacks = build_stacks(store_module.DiskMemoStore(os.path.join(workdir, "memo.sqlite")))
+    # 打印类装饰器的输出重定向到 /dev/null：print 的开销仍然计算在内，但不会刷屏
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for workload_name, workload in WORKLOADS.items():
+                for mode in MODES:
+                    bare = None
+                    for stack_name, (stack, caches) in stacks.items():
+                        if mode == "repeat" and stack_name != "bare" and not caches:
+                            continue
+                        args = itertools.count() if mode == "distinct" else itertools.repeat(100)
+                        make_func = functools.partial(apply_stack, workload, stack)
+                        stats = summarize(measure(make_func, args, repeat, min_time))
+                        if bare is None:
+                            bare = stats
+                        if mode == "distinct":
+                            # 相对于未装饰版本的额外开销，误差按独立变量合并
+                            stats["overhead_ns"] = stats["mean_ns"] - bare["mean_ns"]
+                            stats["overhead_ci95_ns"] = math.hypot(stats["ci95_ns"], bare["ci95_ns"])
+                        else:
+                            # 缓存命中时跳过了函数本身，“额外开销”没有意义，改为报告相对未装饰版本的加速比
+                            stats["speedup"] = bare["mean_ns"] / stats["mean_ns"]
+                        results[f"{workload_name}/{mode}/{stack_name}"] = stats
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, tolerance):
+    """
+    与保存的基线对比。只有当均值变慢超过 tolerance，
+    并且两次测量的置信区间不重叠时才判定为回归，避免被噪声误报。
+    """
+    regressions = []
+    for name, cur in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = cur["mean_ns"] / base["mean_ns"]
+        separated = cur["mean_ns"] - cur["ci95_ns"] > base["mean_ns"] + base["ci95_ns"]
+        if ratio > 1 + tolerance and separated:
+            regressions.append((name, base["mean_ns"], cur["mean_ns"], ratio))
+    return regressions
+
+
+def print_table(report):
+    print(f"{'用例':<48}{'ns/call':>14}{'±95%':>10}{'额外开销 / 加速比':>20}")
+    for name, stats in report["results"].items():
+        if name.endswith("/bare"):
+            extra = "-"
+        elif "speedup" in stats:
+            extra = f"{stats['speedup']:.1f}x"
+        elif abs(stats["overhead_ns"]) < stats["overhead_ci95_ns"]:
+            # 差值落在置信区间内：只能说额外开销小于测量误差，不打印没有意义的负数
+            extra = f"< {stats['overhead_ci95_ns']:.1f}"
+        else:
+            extra = f"{stats['overhead_ns']:.1f} ± {stats['overhead_ci95_ns']:.1f}"
+        print(f"{name:<48}{stats['mean_ns']:>14.1f}{stats['ci95_ns']:>10.1f}{extra:>20}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量 01-decorator-pattern 中各个装饰器及其组合的单次调用开销")
+    parser.add_argument("--output", help="把结果写入这个 JSON 文件")
+    parser.add_argument("--baseline", help="与这个 JSON 基线文件对比，发现回归时返回非 0 退出码")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="允许的变慢比例，默认 10%%")
+    parser.add_argument("--repeat", type=int, default=7, help="每个用例重复测量的轮数")
+    args = parser.parse_args(argv)
+
+    report = run_suite(repeat=args.repeat)
+    print_table(report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if not regressions:
+            print(f"\n与基线 {args.baseline} 相比没有发现回归。")
+            return 0
+        print(f"\n与基线 {args.baseline} 相比发现 {len(regressions)} 处回归:")
+        for name, before, after, ratio in regressions:
+            print(f"  {name}: {before:.1f} ns -> {after:.1f} ns ({ratio - 1:+.1%})")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
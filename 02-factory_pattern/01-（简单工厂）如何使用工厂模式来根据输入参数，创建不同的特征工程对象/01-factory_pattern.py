@@ -13,14 +13,17 @@ class StandardScaler(FeatureProcessor):
     """对数据进行标准化的具体实现。"""
     def process(self, data):
         print("正在使用 StandardScaler 对数据进行标准化...")
-        return [((x - sum(data)/len(data)) / (max(data)-min(data))) for x in data] # 简化版实现
+        # 统计量只计算一次，避免在列表推导式中反复遍历数据 (否则是 O(n²))
+        mean, data_range = sum(data) / len(data), max(data) - min(data)
+        return [(x - mean) / data_range for x in data] # 简化版实现
 
 # 归一化处理器
 class MinMaxScaler(FeatureProcessor):
     """对数据进行归一化的具体实现。"""
     def process(self, data):
         print("正在使用 MinMaxScaler 对数据进行归一化...")
-        return [(x - min(data)) / (max(data) - min(data)) for x in data] # 简化版实现
+        low, high = min(data), max(data)
+        return [(x - low) / (high - low) for x in data] # 简化版实现
 
 class ProcessorFactory:
     """根据名称创建特征处理器的工厂类。"""
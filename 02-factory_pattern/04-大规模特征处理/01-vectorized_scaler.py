@@ -0,0 +1,166 @@
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# 定义特征工程的抽象基类
+class FeatureProcessor(ABC):
+    """
+    特征处理器的抽象基类。
+    fit 只负责计算统计量，transform 只负责套用统计量，
+    process 保留原来的用法：先 fit 再 transform。
+    """
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+
+    @abstractmethod
+    def fit(self, data):
+        """抽象方法：根据数据计算统计量，返回 self。"""
+        pass
+
+    @abstractmethod
+    def transform(self, data, out=None):
+        """抽象方法：用已经计算好的统计量处理数据。"""
+        pass
+
+    def process(self, data):
+        """兼容旧接口：对数据进行处理。和原来一样，传入列表时返回列表，传入数组时返回数组。"""
+        result = self.fit(data).transform(data)
+        return result.tolist() if isinstance(data, list) else result
+
+    def _as_array(self, data):
+        # 列表会被转换成数组；已经是目标 dtype 的数组不会被复制
+        return np.asarray(data, dtype=self.dtype)
+
+
+class AffineProcessor(FeatureProcessor):
+    """
+    StandardScaler 和 MinMaxScaler 本质上都是逐列的仿射变换：y = x * scale + offset。
+    fit 阶段把统计量折算成 scale 和 offset，transform 阶段只剩一次乘法和一次加法。
+    """
+    def __init__(self, dtype=np.float64):
+        super().__init__(dtype)
+        self.scale_ = None
+        self.offset_ = None
+
+    def transform(self, data, out=None):
+        if self.scale_ is None:
+            raise RuntimeError(f"{self.__class__.__name__} 还没有调用 fit")
+        x = self._as_array(data)
+        if out is None:
+            out = np.empty_like(x)
+        # 两个 ufunc 都写入同一个 out 数组，不产生临时数组；传入 out=x 即可原地处理
+        np.multiply(x, self.scale_, out=out)
+        np.add(out, self.offset_, out=out)
+        return out
+
+
+# 标准化处理器
+class StandardScaler(AffineProcessor):
+    """
+    对数据进行标准化：(x - 均值) / 标准差，二维数据按列处理。
+    注意：原来的简化版除的是极差 (最大值 - 最小值)，这里改成了除以标准差，处理结果的数值与原来不同。
+    """
+    # fit 时每一块大约包含的元素个数：一块数据可以留在 CPU 缓存中
+    block_elements = 1 << 16
+
+    def fit(self, data):
+        x = self._as_array(data)
+        rows = x.reshape(len(x), -1)
+        # 只扫描一遍内存：按行切成小块，每一块在缓存中求出自己的 (数量, 均值, 平方差之和)，
+        # 再用 Chan 等人的合并公式并入累计值（与 02-streaming_scaler.py 相同），
+        # 不会像“平方和减去和的平方”那样在数据有较大偏移量时损失精度。统计量统一用 float64 累加
+        block_rows = max(1, self.block_elements // max(1, rows.shape[1]))
+        n, mean, m2 = 0, np.zeros(rows.shape[1]), np.zeros(rows.shape[1])
+        for start in range(0, len(rows), block_rows):
+            block = rows[start:start + block_rows]
+            n_b = len(block)
+            mean_b = block.mean(axis=0, dtype=np.float64)
+            m2_b = np.square(block - mean_b).sum(axis=0)
+            total = n + n_b
+            delta = mean_b - mean
+            mean = mean + delta * (n_b / total)
+            m2 = m2 + m2_b + delta ** 2 * (n * n_b / total)
+            n = total
+        shape = x.shape[1:]
+        mean, std = mean.reshape(shape), np.sqrt(m2 / max(n, 1)).reshape(shape)
+        # 常数列的标准差为 0，此时不做缩放
+        std = np.where(std == 0, 1.0, std)
+        self.mean_, self.std_ = mean, std
+        self.scale_ = (1.0 / std).astype(self.dtype)
+        self.offset_ = (-mean / std).astype(self.dtype)
+        return self
+
+
+# 归一化处理器
+class MinMaxScaler(AffineProcessor):
+    """对数据进行归一化：(x - 最小值) / (最大值 - 最小值)，二维数据按列处理。"""
+    def fit(self, data):
+        x = self._as_array(data)
+        low = x.min(axis=0).astype(np.float64)
+        high = x.max(axis=0).astype(np.float64)
+        data_range = np.where(high == low, 1.0, high - low)
+        self.min_, self.max_ = low, high
+        self.scale_ = (1.0 / data_range).astype(self.dtype)
+        self.offset_ = (-low / data_range).astype(self.dtype)
+        return self
+
+
+class ProcessorFactory:
+    """根据名称创建特征处理器的工厂类。"""
+    @staticmethod
+    def create_processor(processor_name, dtype=np.float64):
+        """
+        工厂方法：根据传入的名称返回对应的处理器实例。
+        如果名称无效，则抛出异常。
+        """
+        if processor_name == 'standard':
+            return StandardScaler(dtype=dtype)
+        elif processor_name == 'minmax':
+            return MinMaxScaler(dtype=dtype)
+        else:
+            raise ValueError(f"未知处理器类型: {processor_name}")
+
+
+# 客户端代码：原来的用法保持不变
+data = [10, 20, 30, 40, 50]
+
+standard_processor = ProcessorFactory.create_processor('standard')
+print(f"标准化后的数据: {standard_processor.process(data)}")
+mean, data_range = sum(data) / len(data), max(data) - min(data)
+print(f"（原来的简化版除以极差，结果不同: {[(x - mean) / data_range for x in data]}）")
+minmax_processor = ProcessorFactory.create_processor('minmax')
+print(f"归一化后的数据: {minmax_processor.process(data)}")
+
+print("---")
+# fit 和 transform 分离：在训练集上 fit，在新数据上直接 transform
+train = np.array([[1.0, 100.0], [2.0, 200.0], [3.0, 300.0]])
+scaler = ProcessorFactory.create_processor('minmax').fit(train)
+print(f"二维数据按列归一化:\n{scaler.transform([[2.5, 150.0]])}")
+
+print("---")
+# 百万行的 float32 特征矩阵，原地处理，不额外占用内存
+rows, cols = 1_000_000, 8
+rng = np.random.default_rng(0)
+matrix = rng.normal(loc=50, scale=10, size=(rows, cols)).astype(np.float32)
+# 对照：用 mean 和 std 分别计算（会多次扫描数据），在原地 transform 之前算好
+expected_mean, expected_std = matrix.mean(axis=0, dtype=np.float64), matrix.std(axis=0, dtype=np.float64)
+
+start = time.perf_counter()
+scaler = ProcessorFactory.create_processor('standard', dtype=np.float32).fit(matrix)
+fit_time = time.perf_counter() - start
+start = time.perf_counter()
+scaler.transform(matrix, out=matrix)
+transform_time = time.perf_counter() - start
+print(f"{rows} x {cols} 的 float32 矩阵: fit 耗时 {fit_time:.4f} 秒, 原地 transform 耗时 {transform_time:.4f} 秒")
+print(f"一遍扫描得到的统计量与 mean / std 分别计算的差异: 均值 {np.abs(scaler.mean_ - expected_mean).max():.1e}，"
+      f"标准差 {np.abs(scaler.std_ - expected_std).max():.1e}")
+print(f"处理后每列的均值约为 {np.abs(matrix.mean(axis=0)).max():.1e}，标准差约为 {matrix.std(axis=0, dtype=np.float64).mean():.4f}")
+print(f"矩阵的 dtype 仍然是 {matrix.dtype}，占用 {matrix.nbytes / 1e6:.0f} MB")
+
+print("---")
+# 对比原来的 O(n²) 纯 Python 写法（只取 3000 个数据点，否则要等很久）
+column = matrix[:3000, 0].tolist()
+start = time.perf_counter()
+[(x - min(column)) / (max(column) - min(column)) for x in column]
+print(f"原来的列表推导式处理 3000 个数据点耗时 {time.perf_counter() - start:.4f} 秒")
@@ -0,0 +1,264 @@
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from itertools import islice
+
+import numpy as np
+
+# 定义特征工程的抽象基类
+class FeatureProcessor(ABC):
+    """
+    特征处理器的抽象基类。
+    和上一节相比多了 partial_fit：数据可以一块一块地喂进来，统计量逐步累积。
+    scale_ 和 offset_ 在第一次被用到时才根据统计量计算：逐块 fit 上千块数据时，
+    中间每一块都重新折算一遍是白费的，统计量没有变化时也不需要重新计算。
+    """
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self._scale = None
+        self._offset = None
+        self._stale = False  # 统计量变了，但 _scale / _offset 还没有重新计算
+
+    @abstractmethod
+    def partial_fit(self, chunk):
+        """抽象方法：用一块数据更新统计量，返回 self。"""
+        pass
+
+    @abstractmethod
+    def merge(self, other):
+        """抽象方法：合并另一个独立计算的同类处理器的统计量，返回 self。"""
+        pass
+
+    @abstractmethod
+    def _update_affine(self):
+        """根据当前统计量重新计算 _scale 和 _offset。"""
+        pass
+
+    @property
+    def scale_(self):
+        if self._stale:
+            self._update_affine()
+            self._stale = False
+        return self._scale
+
+    @property
+    def offset_(self):
+        if self._stale:
+            self._update_affine()
+            self._stale = False
+        return self._offset
+
+    def fit(self, data):
+        self._reset()
+        return self.partial_fit(data)
+
+    def _reset(self):
+        self._scale = None
+        self._offset = None
+        self._stale = False
+
+    def transform(self, data, out=None):
+        if self.scale_ is None:
+            raise RuntimeError(f"{self.__class__.__name__} 还没有调用 fit / partial_fit")
+        x = np.asarray(data, dtype=self.dtype)
+        if out is None:
+            out = np.empty_like(x)
+        np.multiply(x, self.scale_, out=out)
+        np.add(out, self.offset_, out=out)
+        return out
+
+    def transform_stream(self, chunks):
+        """惰性地逐块处理数据：返回一个生成器，每次只持有一块数据。"""
+        for chunk in chunks:
+            yield self.transform(chunk)
+
+    def process(self, data):
+        """兼容旧接口：对数据进行处理。和上一节一样，传入列表时返回列表，传入数组时返回数组。"""
+        result = self.fit(data).transform(data)
+        return result.tolist() if isinstance(data, list) else result
+
+    def _as_2d(self, chunk):
+        x = np.asarray(chunk, dtype=np.float64)
+        return x.reshape(-1, 1) if x.ndim == 1 else x
+
+
+# 增量标准化处理器
+class IncrementalStandardScaler(FeatureProcessor):
+    """
+    可以逐块 fit 的标准化处理器。
+    每一块先用 NumPy 算出自己的 (数量, 均值, 平方差之和)，
+    再用 Chan 等人的并行合并公式并入累计值，数值上和 Welford 算法一样稳定。
+    """
+    def __init__(self, dtype=np.float64):
+        super().__init__(dtype)
+        self._reset()
+
+    def _reset(self):
+        super()._reset()
+        self.n_samples_ = 0
+        self.mean_ = None
+        self.m2_ = None
+
+    def partial_fit(self, chunk):
+        x = self._as_2d(chunk)
+        if len(x) == 0:
+            return self
+        n_b = len(x)
+        mean_b = x.mean(axis=0)
+        m2_b = ((x - mean_b) ** 2).sum(axis=0)
+        self._combine(n_b, mean_b, m2_b)
+        return self
+
+    def merge(self, other):
+        if other.n_samples_:
+            self._combine(other.n_samples_, other.mean_, other.m2_)
+        return self
+
+    def _combine(self, n_b, mean_b, m2_b):
+        n_a = self.n_samples_
+        if n_a == 0:
+            self.n_samples_, self.mean_, self.m2_ = n_b, mean_b.copy(), m2_b.copy()
+        else:
+            n = n_a + n_b
+            delta = mean_b - self.mean_
+            # 合并公式只依赖两块各自的均值之差，不会出现“大数相减”导致的精度损失
+            self.mean_ = self.mean_ + delta * (n_b / n)
+            self.m2_ = self.m2_ + m2_b + delta ** 2 * (n_a * n_b / n)
+            self.n_samples_ = n
+        self._stale = True
+
+    @property
+    def var_(self):
+        return self.m2_ / self.n_samples_
+
+    def _update_affine(self):
+        std = np.sqrt(self.var_)
+        std = np.where(std == 0, 1.0, std)
+        self._scale = (1.0 / std).astype(self.dtype)
+        self._offset = (-self.mean_ / std).astype(self.dtype)
+
+
+# 增量归一化处理器
+class IncrementalMinMaxScaler(FeatureProcessor):
+    """可以逐块 fit 的归一化处理器：只需要维护每列的最小值和最大值。"""
+    def __init__(self, dtype=np.float64):
+        super().__init__(dtype)
+        self._reset()
+
+    def _reset(self):
+        super()._reset()
+        self.n_samples_ = 0
+        self.min_ = None
+        self.max_ = None
+
+    def partial_fit(self, chunk):
+        x = self._as_2d(chunk)
+        if len(x) == 0:
+            return self
+        self._combine(len(x), x.min(axis=0), x.max(axis=0))
+        return self
+
+    def merge(self, other):
+        if other.n_samples_:
+            self._combine(other.n_samples_, other.min_, other.max_)
+        return self
+
+    def _combine(self, n_b, low, high):
+        if self.n_samples_ == 0:
+            self.min_, self.max_ = low.copy(), high.copy()
+            self._stale = True
+        elif (low < self.min_).any() or (high > self.max_).any():
+            # 极值没有变化时，scale_ 和 offset_ 也不会变，不需要标记重新计算
+            np.minimum(self.min_, low, out=self.min_)
+            np.maximum(self.max_, high, out=self.max_)
+            self._stale = True
+        self.n_samples_ += n_b
+
+    def _update_affine(self):
+        data_range = np.where(self.max_ == self.min_, 1.0, self.max_ - self.min_)
+        self._scale = (1.0 / data_range).astype(self.dtype)
+        self._offset = (-self.min_ / data_range).astype(self.dtype)
+
+
+class ProcessorFactory:
+    """根据名称创建特征处理器的工厂类。"""
+    @staticmethod
+    def create_processor(processor_name, dtype=np.float64):
+        """
+        工厂方法：根据传入的名称返回对应的处理器实例。
+        如果名称无效，则抛出异常。
+        """
+        if processor_name == 'standard':
+            return IncrementalStandardScaler(dtype=dtype)
+        elif processor_name == 'minmax':
+            return IncrementalMinMaxScaler(dtype=dtype)
+        else:
+            raise ValueError(f"未知处理器类型: {processor_name}")
+
+
+def lazy_data_loader(file_path):
+    """
+    一个惰性数据加载器，和迭代器模式一节中的写法一样，每次只返回一行数据。
+    """
+    with open(file_path, 'r') as f:
+        next(f)  # 跳过表头
+        for line in f:
+            yield [float(v) for v in line.split(',')]
+
+
+def chunked(rows, chunk_size):
+    """把逐行产出的生成器攒成一块一块的 NumPy 数组。"""
+    rows = iter(rows)
+    while True:
+        block = list(islice(rows, chunk_size))
+        if not block:
+            return
+        yield np.array(block)
+
+
+# 客户端代码：准备一个模拟的大文件
+file_path = os.path.join(tempfile.gettempdir(), 'streaming_features.csv')
+rng = np.random.default_rng(0)
+with open(file_path, 'w') as f:
+    f.write('age,income\n')
+    for age, income in zip(rng.integers(18, 80, 200_000), rng.normal(8000, 2000, 200_000)):
+        f.write(f'{age},{income:.2f}\n')
+
+# 第一遍：逐块 fit，内存中始终只有一块数据
+scaler = ProcessorFactory.create_processor('standard')
+for chunk in chunked(lazy_data_loader(file_path), chunk_size=10_000):
+    scaler.partial_fit(chunk)
+print(f"逐块 fit 完成，共 {scaler.n_samples_} 行，均值 {scaler.mean_}，标准差 {np.sqrt(scaler.var_)}")
+
+# 第二遍：惰性地逐块 transform
+stream = scaler.transform_stream(chunked(lazy_data_loader(file_path), chunk_size=10_000))
+first_chunk = next(stream)
+print(f"第一块处理后的前 3 行:\n{first_chunk[:3]}")
+
+print("---")
+# 分片：每个分片独立计算统计量，最后再合并
+full = np.loadtxt(file_path, delimiter=',', skiprows=1)
+shards = np.array_split(full, 4)
+merged = ProcessorFactory.create_processor('standard')
+for shard in shards:
+    merged.merge(ProcessorFactory.create_processor('standard').partial_fit(shard))
+print(f"4 个分片合并后的均值与整体计算的差异: {np.abs(merged.mean_ - full.mean(axis=0)).max():.2e}")
+print(f"4 个分片合并后的标准差与整体计算的差异: {np.abs(np.sqrt(merged.var_) - full.std(axis=0)).max():.2e}")
+
+minmax = ProcessorFactory.create_processor('minmax')
+for shard in shards:
+    minmax.merge(ProcessorFactory.create_processor('minmax').partial_fit(shard))
+print(f"合并后的最小值 {minmax.min_}，最大值 {minmax.max_}")
+# 和上一节的接口一致：传入列表时返回列表
+print(f"列表输入的 process 结果: {ProcessorFactory.create_processor('minmax').process([10, 20, 30, 40, 50])}")
+
+print("---")
+# 数值稳定性：数据有一个很大的偏移量时，“平方和减去和的平方”的朴素公式会失效
+values = 1e9 + rng.normal(0, 1, 100_000)
+naive_var = (values ** 2).mean() - values.mean() ** 2
+stable = ProcessorFactory.create_processor('standard')
+for block in np.array_split(values, 100):
+    stable.partial_fit(block)
+print(f"真实方差约为 1.0，朴素公式得到 {naive_var:.4f}，增量合并得到 {stable.var_[0]:.4f}")
+
+os.remove(file_path)
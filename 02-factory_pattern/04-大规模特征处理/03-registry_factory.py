@@ -0,0 +1,199 @@
+import sys
+import time
+import importlib
+import threading
+from importlib import metadata
+
+# 特征工程的抽象基类（不可变）放在 frozen_processor.py 中，延迟加载的处理器模块也继承同一个类
+from frozen_processor import FeatureProcessor
+
+
+class ProcessorFactory:
+    """
+    基于注册表的工厂类。
+    新增处理器只需要注册，不需要修改工厂代码；
+    处理器所在的模块在第一次被请求时才导入；
+    相同名称、相同配置的处理器只创建一次，之后直接复用。
+    只有不可变的实例才会进入池中；配置中有列表、数组这类不可哈希（也就是可变）的值时，每次都创建新实例。
+    池的大小有上限，满了之后淘汰最早放入的实例。
+    """
+    # 名称 -> 处理器类（已经导入的）
+    _registry = {}
+    # 名称 -> "模块路径:类名"（尚未导入的）
+    _lazy_registry = {}
+    # (名称, 配置) -> 处理器实例
+    _pool = {}
+    max_pooled = 1024
+    _lock = threading.Lock()
+    _stats = {"created": 0, "unpooled": 0, "evicted": 0}
+    # 线程 id -> 这个线程复用池中实例的次数。每个线程只写自己的键，快路径上不需要加锁也不会丢失计数
+    _reused = {}
+
+    @classmethod
+    def register(cls, name):
+        """类装饰器：把处理器类注册到工厂中。"""
+        def decorator(processor_cls):
+            cls._registry[name] = processor_cls
+            return processor_cls
+        return decorator
+
+    @classmethod
+    def register_lazy(cls, name, target):
+        """只登记“去哪里找这个类”，真正的导入推迟到第一次被请求时。"""
+        cls._lazy_registry[name] = target
+
+    @classmethod
+    def load_entry_points(cls, group="feature_processors"):
+        """
+        把已安装的第三方包通过 entry point 声明的处理器登记为延迟加载。
+        这一步只读取包的元数据，不会导入任何处理器模块。
+        """
+        for entry_point in metadata.entry_points(group=group):
+            cls._lazy_registry.setdefault(entry_point.name, entry_point.value)
+
+    @classmethod
+    def _resolve(cls, name):
+        processor_cls = cls._registry.get(name)
+        if processor_cls is not None:
+            return processor_cls
+        target = cls._lazy_registry.get(name)
+        if target is None:
+            raise ValueError(f"未知处理器类型: {name}")
+        module_name, _, attr = target.partition(":")
+        # 导入在锁外进行：被导入的模块可能在导入时注册自己，甚至调用工厂，持有不可重入的锁会死锁。
+        # 两个线程同时导入同一个模块是安全的，importlib 自己会保证模块只执行一次
+        processor_cls = getattr(importlib.import_module(module_name), attr)
+        with cls._lock:
+            return cls._registry.setdefault(name, processor_cls)
+
+    @classmethod
+    def create_processor(cls, processor_name, **config):
+        """
+        工厂方法：根据名称和配置返回处理器实例。
+        同样的名称和配置会返回同一个（不可变的）实例。
+        """
+        key = (processor_name, tuple(sorted(config.items())))
+        try:
+            # 快路径：池中已有的实例直接返回，不加锁
+            processor = cls._pool.get(key)
+        except TypeError:
+            # 配置中有不可哈希的值：调用方之后还可能修改它，所以不放进池中共享
+            processor = cls._resolve(processor_name)(**config)
+            with cls._lock:
+                cls._stats["created"] += 1
+                cls._stats["unpooled"] += 1
+            return processor
+        if processor is not None:
+            cls._count_reuse()
+            return processor
+        # 导入模块和创建实例都在锁外进行（构造函数里也可能再调用工厂），锁只用来把结果放进池中。
+        # 两个线程同时创建同一个配置时，先放进池中的那个胜出，另一个实例直接丢弃
+        processor = cls._resolve(processor_name)(**config)
+        with cls._lock:
+            cls._stats["created"] += 1
+            if not getattr(processor, "_frozen", False):
+                # 可变的实例不能在调用方之间共享
+                cls._stats["unpooled"] += 1
+                return processor
+            pooled = cls._pool.get(key)
+            if pooled is not None:
+                cls._count_reuse()
+                return pooled
+            if len(cls._pool) >= cls.max_pooled:
+                # dict 保持插入顺序，第一个键就是最早放入的实例
+                del cls._pool[next(iter(cls._pool))]
+                cls._stats["evicted"] += 1
+            cls._pool[key] = processor
+        return processor
+
+    @classmethod
+    def _count_reuse(cls):
+        thread_id = threading.get_ident()
+        cls._reused[thread_id] = cls._reused.get(thread_id, 0) + 1
+
+    @classmethod
+    def pool_info(cls):
+        return {"pooled": len(cls._pool), **cls._stats, "reused": sum(cls._reused.values()),
+                "registered": sorted(set(cls._registry) | set(cls._lazy_registry))}
+
+
+# 标准化处理器
+@ProcessorFactory.register('standard')
+class StandardScaler(FeatureProcessor):
+    """用给定的均值和标准差对数据进行标准化。"""
+    def __init__(self, mean=0.0, std=1.0):
+        super().__init__(mean=mean, std=std)
+
+    def process(self, data):
+        mean, std = self.mean, self.std
+        return [(x - mean) / std for x in data]
+
+# 归一化处理器
+@ProcessorFactory.register('minmax')
+class MinMaxScaler(FeatureProcessor):
+    """用给定的最小值和最大值对数据进行归一化。"""
+    def __init__(self, low=0.0, high=1.0):
+        super().__init__(low=low, high=high)
+
+    def process(self, data):
+        low, data_range = self.low, self.high - self.low
+        return [(x - low) / data_range for x in data]
+
+# 这两个处理器在单独的模块里，只登记位置，不立即导入
+ProcessorFactory.register_lazy('log', 'lazy_processors:LogScaler')
+ProcessorFactory.register_lazy('robust', 'lazy_processors:RobustScaler')
+ProcessorFactory.load_entry_points()
+
+
+# 客户端代码
+data = [10, 20, 30, 40, 50]
+
+print(f"启动时 lazy_processors 是否已导入: {'lazy_processors' in sys.modules}")
+print(f"标准化后的数据: {ProcessorFactory.create_processor('standard', mean=30, std=10).process(data)}")
+print(f"归一化后的数据: {ProcessorFactory.create_processor('minmax', low=10, high=50).process(data)}")
+print(f"使用 standard/minmax 之后 lazy_processors 是否已导入: {'lazy_processors' in sys.modules}")
+
+print("---")
+# lazy_processors 模块在导入时不做任何事（没有副作用），导入与否只能通过 sys.modules 观察
+print("第一次请求 'log'：这时才导入 lazy_processors 模块")
+print(f"对数变换后的数据: {ProcessorFactory.create_processor('log', base=10).process(data)}")
+print(f"第一次请求 'log' 之后 lazy_processors 是否已导入: {'lazy_processors' in sys.modules}")
+
+print("---")
+# 模拟特征服务：每个请求都调用一次工厂
+def handle_request(features):
+    scaler = ProcessorFactory.create_processor('standard', mean=30, std=10)
+    return scaler.process(features)
+
+start = time.perf_counter()
+for _ in range(100_000):
+    handle_request(data)
+print(f"处理 10 万个请求耗时 {time.perf_counter() - start:.4f} 秒")
+print(f"工厂统计: {ProcessorFactory.pool_info()}")
+
+print("---")
+# 池中的实例是共享的，所以必须是不可变的
+shared = ProcessorFactory.create_processor('standard', mean=30, std=10)
+try:
+    shared.mean = 0
+except AttributeError as e:
+    print(e)
+
+# 延迟加载的处理器继承的是同一个 FeatureProcessor，同样是不可变的
+print(f"RobustScaler 是否是 FeatureProcessor: {issubclass(ProcessorFactory._resolve('robust'), FeatureProcessor)}")
+robust = ProcessorFactory.create_processor('robust', median=30, iqr=20)
+try:
+    robust.median = 0
+except AttributeError as e:
+    print(e)
+
+# 配置中有列表这样的可变值时不会进入池中，每次都得到新的实例
+low, high = [0.0, 0.0], [1.0, 1.0]
+first = ProcessorFactory.create_processor('minmax', low=low, high=high)
+print(f"列表配置的实例是否被复用: {first is ProcessorFactory.create_processor('minmax', low=low, high=high)}")
+print(f"工厂统计: {ProcessorFactory.pool_info()}")
+
+try:
+    ProcessorFactory.create_processor('invalid')
+except ValueError as e:
+    print(e)
@@ -0,0 +1,250 @@
+import os
+import time
+import contextlib
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# 进程池、共享内存数组和切分函数与 03-strategy_pattern 的并行排序共用
+from parallel_utils import Attached, SharedArray, get_executor, split_range
+
+# 元素个数低于这个阈值时不启用进程池，避免小数据反而被进程间通信拖慢
+DEFAULT_PARALLEL_THRESHOLD = 1_000_000
+
+# ---
+# 在子进程中执行的函数：只通过共享内存的名字、形状和切片位置通信，不传输数组本身
+
+def _block_stats(spec, rows, cols, kind):
+    with Attached(spec) as (data,):
+        block = data[rows, cols]
+        stats = _local_stats(block, kind)
+        # 关闭共享内存之前，必须先释放所有引用它的数组视图
+        del data, block
+        return stats
+
+
+def _block_transform(in_spec, out_spec, rows, cols, scale, offset):
+    with Attached(in_spec, out_spec) as (data, target):
+        x, out = data[rows, cols], target[rows, cols]
+        np.multiply(x, scale, out=out)
+        np.add(out, offset, out=out)
+        del data, target, x, out
+
+
+# 定义特征工程的抽象基类
+class FeatureProcessor(ABC):
+    """
+    特征处理器的抽象基类，新增了并行执行模式。
+    n_jobs             : 使用的进程数，1 表示单进程。
+    split              : "rows" 按行切分（统计量在父进程中合并），"columns" 按列切分。
+    parallel_threshold : 元素个数低于该值时始终单进程执行。
+    """
+    kind = None
+
+    def __init__(self, dtype=np.float64, n_jobs=1, split="rows", parallel_threshold=DEFAULT_PARALLEL_THRESHOLD):
+        if split not in ("rows", "columns"):
+            raise ValueError(f"未知切分方式: {split}")
+        self.dtype = np.dtype(dtype)
+        self.n_jobs = n_jobs
+        self.split = split
+        self.parallel_threshold = parallel_threshold
+        self.scale_ = None
+        self.offset_ = None
+
+    @abstractmethod
+    def _affine_from_stats(self, stats):
+        """抽象方法：把合并后的统计量折算成 scale_ 和 offset_。"""
+        pass
+
+    @abstractmethod
+    def _merge_stats(self, a, b):
+        """抽象方法：合并两个按行切分得到的部分统计量。"""
+        pass
+
+    def _use_pool(self, x):
+        return self.n_jobs > 1 and x.size >= self.parallel_threshold and x.ndim == 2
+
+    def _blocks(self, x):
+        n_rows, n_cols = x.shape
+        if self.split == "rows":
+            return [(rows, slice(None)) for rows in split_range(n_rows, self.n_jobs)]
+        return [(slice(None), cols) for cols in split_range(n_cols, self.n_jobs)]
+
+    def fit(self, data):
+        if isinstance(data, SharedArray) and data.array.dtype == self.dtype and self._use_pool(data.array):
+            # 数据本来就在共享内存里，连一次复制都不需要
+            stats = self._parallel_stats(data)
+        else:
+            x = np.asarray(data.array if isinstance(data, SharedArray) else data, dtype=self.dtype)
+            if not self._use_pool(x):
+                stats = _local_stats(x, self.kind)
+            else:
+                with SharedArray.from_array(x) as shared:
+                    stats = self._parallel_stats(shared)
+        self._affine_from_stats(stats)
+        return self
+
+    def _parallel_stats(self, shared):
+        executor = get_executor(self.n_jobs)
+        blocks = self._blocks(shared.array)
+        futures = [executor.submit(_block_stats, shared.spec, rows, cols, self.kind)
+                   for rows, cols in blocks]
+        parts = [f.result() for f in futures]
+        if self.split == "columns":
+            # 按列切分时每个子进程算的就是完整的列统计量，直接拼接即可
+            return (parts[0][0],) + tuple(np.concatenate([p[i] for p in parts]) for i in (1, 2))
+        merged = parts[0]
+        for part in parts[1:]:
+            merged = self._merge_stats(merged, part)
+        return merged
+
+    def transform(self, data, out=None):
+        """
+        data 和 out 都可以是 SharedArray。多进程执行时：
+          * data 已经在共享内存中（并且 dtype 一致）时直接使用，否则先复制一份到共享内存；
+          * out 是 SharedArray 时，子进程直接写入它，返回它的数组视图；
+            out 是普通数组或 None 时，结果需要从共享内存再复制一遍。
+        这是一个受内存带宽限制的操作，每多一次复制就多一遍完整的内存读写，所以大数据最好两端都用 SharedArray。
+        """
+        if self.scale_ is None:
+            raise RuntimeError(f"{self.__class__.__name__} 还没有调用 fit")
+        shared_data = isinstance(data, SharedArray) and data.array.dtype == self.dtype
+        x = data.array if shared_data else np.asarray(
+            data.array if isinstance(data, SharedArray) else data, dtype=self.dtype)
+        shared_out = isinstance(out, SharedArray)
+        if shared_out and (out.array.shape != x.shape or out.array.dtype != self.dtype):
+            raise ValueError(f"out 的形状和 dtype 必须是 {x.shape}, {self.dtype}")
+        if not self._use_pool(x):
+            target = out.array if shared_out else (np.empty_like(x) if out is None else out)
+            np.multiply(x, self.scale_, out=target)
+            np.add(target, self.offset_, out=target)
+            return target
+        with contextlib.ExitStack() as stack:
+            shared_in = data if shared_data else stack.enter_context(SharedArray.from_array(x))
+            target = out if shared_out else stack.enter_context(SharedArray(x.shape, self.dtype))
+            self._parallel_transform(shared_in, target)
+            if shared_out:
+                return out.array
+            if out is None:
+                return target.array.copy()
+            out[...] = target.array
+            return out
+
+    def _parallel_transform(self, shared_in, shared_out):
+        executor = get_executor(self.n_jobs)
+        futures = []
+        for rows, cols in self._blocks(shared_in.array):
+            # 按列切分时每个子进程只需要对应列的 scale 和 offset
+            scale = self.scale_ if self.split == "rows" else self.scale_[cols]
+            offset = self.offset_ if self.split == "rows" else self.offset_[cols]
+            futures.append(executor.submit(_block_transform, shared_in.spec, shared_out.spec,
+                                           rows, cols, scale, offset))
+        for f in futures:
+            f.result()
+
+    def process(self, data):
+        """兼容旧接口：对数据进行处理。"""
+        return self.fit(data).transform(data)
+
+
+def _local_stats(x, kind):
+    if kind == "standard":
+        mean = x.mean(axis=0, dtype=np.float64)
+        return len(x), mean, ((x - mean) ** 2).sum(axis=0, dtype=np.float64)
+    return len(x), x.min(axis=0).astype(np.float64), x.max(axis=0).astype(np.float64)
+
+
+# 标准化处理器
+class StandardScaler(FeatureProcessor):
+    """对数据进行标准化，部分统计量用 Chan 公式合并。"""
+    kind = "standard"
+
+    def _merge_stats(self, a, b):
+        (n_a, mean_a, m2_a), (n_b, mean_b, m2_b) = a, b
+        n = n_a + n_b
+        delta = mean_b - mean_a
+        return n, mean_a + delta * (n_b / n), m2_a + m2_b + delta ** 2 * (n_a * n_b / n)
+
+    def _affine_from_stats(self, stats):
+        n, mean, m2 = stats
+        std = np.sqrt(m2 / n)
+        std = np.where(std == 0, 1.0, std)
+        self.mean_, self.std_ = mean, std
+        self.scale_ = (1.0 / std).astype(self.dtype)
+        self.offset_ = (-mean / std).astype(self.dtype)
+
+
+# 归一化处理器
+class MinMaxScaler(FeatureProcessor):
+    """对数据进行归一化，部分统计量逐列取最小值和最大值。"""
+    kind = "minmax"
+
+    def _merge_stats(self, a, b):
+        return a[0] + b[0], np.minimum(a[1], b[1]), np.maximum(a[2], b[2])
+
+    def _affine_from_stats(self, stats):
+        _, low, high = stats
+        data_range = np.where(high == low, 1.0, high - low)
+        self.min_, self.max_ = low, high
+        self.scale_ = (1.0 / data_range).astype(self.dtype)
+        self.offset_ = (-low / data_range).astype(self.dtype)
+
+
+class ProcessorFactory:
+    """根据名称创建特征处理器的工厂类。"""
+    @staticmethod
+    def create_processor(processor_name, **options):
+        """
+        工厂方法：根据传入的名称返回对应的处理器实例。
+        如果名称无效，则抛出异常。
+        """
+        if processor_name == 'standard':
+            return StandardScaler(**options)
+        elif processor_name == 'minmax':
+            return MinMaxScaler(**options)
+        else:
+            raise ValueError(f"未知处理器类型: {processor_name}")
+
+
+# 客户端代码：使用进程池时必须放在 __main__ 保护中
+if __name__ == "__main__":
+    n_jobs = os.cpu_count() or 1
+    print(f"本机 CPU 核数: {n_jobs}")
+
+    # 小数据：低于阈值，自动走单进程
+    small = ProcessorFactory.create_processor('minmax', n_jobs=n_jobs)
+    print(f"小数据归一化结果: {small.process([[10], [20], [30], [40], [50]]).ravel()}")
+
+    print("---")
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(loc=50, scale=10, size=(2_000_000, 16))
+    print(f"大矩阵: {matrix.shape}, {matrix.nbytes / 1e6:.0f} MB")
+
+    serial = ProcessorFactory.create_processor('standard', n_jobs=1)
+    start = time.perf_counter()
+    expected = serial.process(matrix)
+    print(f"单进程: {time.perf_counter() - start:.4f} 秒")
+
+    for split in ("rows", "columns"):
+        parallel = ProcessorFactory.create_processor('standard', n_jobs=max(2, n_jobs), split=split)
+        parallel.process(matrix[:200_000])  # 预热：第一次调用会启动进程池
+        start = time.perf_counter()
+        result = parallel.process(matrix)
+        cost = time.perf_counter() - start
+        print(f"{max(2, n_jobs)} 个进程，按{'行' if split == 'rows' else '列'}切分: {cost:.4f} 秒，"
+              f"与单进程结果的最大差异 {np.abs(result - expected).max():.2e}")
+
+    print("---")
+    # 如果数据本来就是在共享内存中生成的，fit 时连复制到共享内存的那一步也可以省掉
+    with SharedArray.from_array(matrix) as shared:
+        parallel = ProcessorFactory.create_processor('standard', n_jobs=max(2, n_jobs))
+        start = time.perf_counter()
+        parallel.fit(shared)
+        print(f"直接在共享内存上 fit: {time.perf_counter() - start:.4f} 秒")
+        # 输出也放在共享内存中：子进程直接写入，输入和输出都没有额外的复制
+        with SharedArray(matrix.shape, matrix.dtype) as shared_out:
+            start = time.perf_counter()
+            result = parallel.transform(shared, out=shared_out)
+            print(f"直接在共享内存上 transform: {time.perf_counter() - start:.4f} 秒，"
+                  f"与单进程结果的最大差异 {np.abs(result - expected).max():.2e}")
+            del result  # 关闭共享内存之前，先释放引用它的数组视图
@@ -0,0 +1,255 @@
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# 分块处理时每块包含的元素个数：足够小以留在 CPU 缓存中，又足够大以摊薄 Python 的调用开销
+BLOCK_ELEMENTS = 1 << 16
+
+
+class SummaryStats:
+    """
+    逐列的汇总统计量：数量、均值、标准差、最小值、最大值。
+    这些统计量在仿射变换 y = a * x + b 下可以直接推算，不需要重新扫描数据。
+    """
+    def __init__(self, n, mean, std, low, high):
+        self.n, self.mean, self.std, self.low, self.high = n, mean, std, low, high
+
+    @classmethod
+    def of(cls, x):
+        return cls(len(x), x.mean(axis=0, dtype=np.float64), x.std(axis=0, dtype=np.float64),
+                   x.min(axis=0).astype(np.float64), x.max(axis=0).astype(np.float64))
+
+    def affine(self, scale, offset):
+        scale = np.asarray(scale, dtype=np.float64)
+        offset = np.asarray(offset, dtype=np.float64)
+        low, high = self.low * scale + offset, self.high * scale + offset
+        # 缩放系数为负时，最小值和最大值会互换
+        return SummaryStats(self.n, self.mean * scale + offset, self.std * np.abs(scale),
+                            np.minimum(low, high), np.maximum(low, high))
+
+
+# 抽象产品：特征处理器
+class FeatureProcessor(ABC):
+    @abstractmethod
+    def fit(self, data):
+        pass
+
+    @abstractmethod
+    def transform(self, data, out=None):
+        pass
+
+    def process(self, data):
+        return self.fit(data).transform(data)
+
+
+class AffineProcessor(FeatureProcessor):
+    """逐列仿射变换 y = x * scale + offset 的公共实现。"""
+    scale_ = None
+    offset_ = None
+
+    @abstractmethod
+    def fit_stats(self, stats):
+        """抽象方法：直接根据汇总统计量计算 scale_ 和 offset_。"""
+        pass
+
+    def fit(self, data):
+        return self.fit_stats(SummaryStats.of(np.asarray(data, dtype=np.float64)))
+
+    def transform(self, data, out=None):
+        x = np.asarray(data, dtype=np.float64)
+        if out is None:
+            out = np.empty_like(x)
+        np.multiply(x, self.scale_, out=out)
+        np.add(out, self.offset_, out=out)
+        return out
+
+
+# 具体产品：标准化处理器
+class StandardScaler(AffineProcessor):
+    def fit_stats(self, stats):
+        std = np.where(stats.std == 0, 1.0, stats.std)
+        self.scale_, self.offset_ = 1.0 / std, -stats.mean / std
+        return self
+
+# 具体产品：归一化处理器
+class MinMaxScaler(AffineProcessor):
+    def fit_stats(self, stats):
+        data_range = np.where(stats.high == stats.low, 1.0, stats.high - stats.low)
+        self.scale_, self.offset_ = 1.0 / data_range, -stats.low / data_range
+        return self
+
+# 具体产品：对数变换，它不是仿射变换，无法和前后的缩放合并
+class Log1pTransformer(FeatureProcessor):
+    def fit(self, data):
+        return self
+
+    def transform(self, data, out=None):
+        x = np.asarray(data, dtype=np.float64)
+        return np.log1p(x, out=out)
+
+# ---
+
+# 抽象工厂：定义一个创建产品的接口
+class ProcessorFactory(ABC):
+    @abstractmethod
+    def create_processor(self):
+        pass
+
+# 具体工厂：创建标准化处理器
+class StandardScalerFactory(ProcessorFactory):
+    def create_processor(self):
+        return StandardScaler()
+
+# 具体工厂：创建归一化处理器
+class MinMaxScalerFactory(ProcessorFactory):
+    def create_processor(self):
+        return MinMaxScaler()
+
+# 具体工厂：创建对数变换处理器
+class Log1pFactory(ProcessorFactory):
+    def create_processor(self):
+        return Log1pTransformer()
+
+# 具体工厂：把多个工厂按顺序组合成一条流水线
+class PipelineFactory(ProcessorFactory):
+    def __init__(self, factories):
+        self._factories = list(factories)
+
+    def create_processor(self):
+        return FusedPipeline([factory.create_processor() for factory in self._factories])
+
+# ---
+
+
+class FusedPipeline(FeatureProcessor):
+    """
+    多个处理器组成的流水线，对外表现得就像一个处理器。
+    连续的仿射变换会被合并成一次乘加；所有阶段按行分块执行，
+    每一块数据在缓存中依次经过所有阶段，整个流水线只扫描一遍内存。
+    """
+    def __init__(self, stages):
+        self.stages = stages
+        self._segments = []
+        self.last_transform = None  # 最近一次 transform 实际扫描了几遍内存、分配了几个数组
+
+    def fit(self, data):
+        x = np.asarray(data, dtype=np.float64)
+        self._segments = []
+        stats = None
+        current = x  # 最近一次被真正计算出来的中间结果
+        pending = []  # 还没有落地的连续仿射阶段，只在统计量层面推算
+        for stage in self.stages:
+            if isinstance(stage, AffineProcessor):
+                if stats is None:
+                    stats = SummaryStats.of(current)
+                stage.fit_stats(stats)
+                stats = stats.affine(stage.scale_, stage.offset_)
+                pending.append(stage)
+                continue
+            # 遇到非仿射阶段：先把积压的仿射阶段合并成一段，再真正计算出中间结果供它 fit
+            if pending:
+                scale, offset = self._compose(pending)
+                self._segments.append(("affine", scale, offset))
+                current = current * scale + offset
+                pending = []
+            stage.fit(current)
+            self._segments.append(("stage", stage))
+            current = stage.transform(current)
+            stats = None
+        if pending:
+            scale, offset = self._compose(pending)
+            self._segments.append(("affine", scale, offset))
+        return self
+
+    @staticmethod
+    def _compose(affine_stages):
+        # (x * a1 + b1) * a2 + b2 = x * (a1 * a2) + (b1 * a2 + b2)
+        scale, offset = 1.0, 0.0
+        for stage in affine_stages:
+            scale, offset = scale * stage.scale_, offset * stage.scale_ + stage.offset_
+        return scale, offset
+
+    def transform(self, data, out=None):
+        """
+        out 为 None 时返回一个新数组；需要在多次调用之间复用输出内存时，显式地传入 out。
+        """
+        x = np.asarray(data, dtype=np.float64)
+        passes = allocations = 0
+        if x is not data:
+            # 输入是列表或者不是 float64：转换本身就是一遍完整的扫描，外加一个新数组
+            passes, allocations = 1, 1
+        if out is None:
+            out = np.empty_like(x)
+            allocations += 1
+        if len(x) and self._segments:
+            passes += 1
+        self.last_transform = {"memory_passes": passes, "allocations": allocations}
+        row_size = int(np.prod(x.shape[1:]))
+        rows_per_block = max(1, BLOCK_ELEMENTS // max(1, row_size))
+        for start in range(0, len(x), rows_per_block):
+            src = x[start:start + rows_per_block]
+            dst = out[start:start + rows_per_block]
+            for segment in self._segments:
+                if segment[0] == "affine":
+                    np.multiply(src, segment[1], out=dst)
+                    np.add(dst, segment[2], out=dst)
+                else:
+                    segment[1].transform(src, out=dst)
+                # 第一个阶段之后，后续阶段都在输出块上原地计算
+                src = dst
+        return out
+
+    def report(self):
+        """
+        对比逐阶段执行，统计融合之后每次 transform 节省了多少遍扫描和多少次数组分配。
+        两边都是单次调用的数字：融合一侧取最近一次 transform 实际的计数；
+        逐阶段一侧是 float64 输入时各阶段各自 transform 的代价（仿射阶段的乘法和加法各扫描一遍，每个阶段分配一个输出数组）。
+        """
+        if self.last_transform is None:
+            raise RuntimeError("还没有调用过 transform")
+        naive_passes = sum(2 if isinstance(stage, AffineProcessor) else 1 for stage in self.stages)
+        return {
+            "stages": len(self.stages),
+            "fused_segments": len(self._segments),
+            "memory_passes_naive_per_call": naive_passes,
+            "memory_passes_fused_per_call": self.last_transform["memory_passes"],
+            "allocations_naive_per_call": len(self.stages),
+            "allocations_fused_per_call": self.last_transform["allocations"],
+        }
+
+
+# 客户端代码
+rng = np.random.default_rng(0)
+data = rng.exponential(scale=100, size=(2_000_000, 8))
+
+# 逐阶段执行：每个阶段都完整地扫描一遍数据，并分配一个新的中间数组
+factories = [StandardScalerFactory(), MinMaxScalerFactory(), Log1pFactory(), StandardScalerFactory(), MinMaxScalerFactory()]
+start = time.perf_counter()
+result = data
+for factory in factories:
+    result = factory.create_processor().process(result)
+naive_time = time.perf_counter() - start
+print(f"逐阶段执行 {len(factories)} 个处理器: {naive_time:.4f} 秒")
+
+# 通过流水线工厂创建一个融合后的处理器
+pipeline = PipelineFactory(factories).create_processor()
+start = time.perf_counter()
+pipeline.fit(data)
+fit_time = time.perf_counter() - start
+start = time.perf_counter()
+fused = pipeline.transform(data)
+transform_time = time.perf_counter() - start
+print(f"融合流水线: fit {fit_time:.4f} 秒, transform {transform_time:.4f} 秒")
+print(f"与逐阶段执行结果的最大差异: {np.abs(fused - result).max():.2e}")
+print(f"融合报告（不传 out）: {pipeline.report()}")
+
+# 通过 out 显式复用输出缓冲区，之后的调用不再分配新数组，也不会覆盖之前返回的结果
+buffer = np.empty_like(data)
+start = time.perf_counter()
+for _ in range(3):
+    pipeline.transform(data, out=buffer)
+print(f"3 次 transform（out= 复用缓冲区）: 平均 {(time.perf_counter() - start) / 3:.4f} 秒")
+print(f"之前返回的结果没有被覆盖: {not np.shares_memory(fused, buffer) and np.array_equal(fused, buffer)}")
+print(f"融合报告（out= 复用缓冲区）: {pipeline.report()}")
+print(f"0 行输入: {pipeline.transform(np.empty((0, 8))).shape}")
@@ -0,0 +1,27 @@
+"""
+03-registry_factory.py 和 lazy_processors.py 共用的处理器基类。
+单独放在一个很轻的模块里：延迟加载的处理器模块也要继承它，又不能反过来导入带演示代码的工厂脚本。
+"""
+from abc import ABC, abstractmethod
+
+
+class FeatureProcessor(ABC):
+    """
+    特征处理器的抽象基类。
+    统计量通过构造参数传入（例如离线训练好的均值和标准差），
+    创建之后对象就不可修改，因此可以安全地在多个请求、多个线程之间共享。
+    """
+    def __init__(self, **params):
+        for name, value in params.items():
+            object.__setattr__(self, name, value)
+        object.__setattr__(self, "_frozen", True)
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"{self.__class__.__name__} 是不可变对象，不能修改属性 {name!r}")
+        object.__setattr__(self, name, value)
+
+    @abstractmethod
+    def process(self, data):
+        """抽象方法：对数据进行处理。"""
+        pass
@@ -0,0 +1,32 @@
+"""
+一个“重量级”的处理器模块，用来演示 03-registry_factory.py 中的延迟导入。
+只有当工厂第一次被请求创建 'log' 或 'robust' 处理器时，这个模块才会被导入。
+"""
+import math
+import statistics
+
+from frozen_processor import FeatureProcessor
+
+
+class LogScaler(FeatureProcessor):
+    """对数据取 log(1 + x)，常用于长尾分布的计数类特征。"""
+    def __init__(self, base=math.e):
+        super().__init__(base=base, _log_base=math.log(base))
+
+    def process(self, data):
+        log_base = self._log_base
+        return [math.log1p(x) / log_base for x in data]
+
+
+class RobustScaler(FeatureProcessor):
+    """用中位数和四分位距做缩放，对异常值不敏感。没有给定统计量时，每次都从传入的数据中计算，不会保存下来。"""
+    def __init__(self, median=None, iqr=None):
+        super().__init__(median=median, iqr=iqr)
+
+    def process(self, data):
+        median = self.median
+        iqr = self.iqr
+        if median is None or iqr is None:
+            q1, q2, q3 = statistics.quantiles(data, n=4)
+            median, iqr = q2, (q3 - q1) or 1.0
+        return [(x - median) / iqr for x in data]
@@ -0,0 +1,97 @@
+"""
+多进程处理大数组时共用的工具：进程池、共享内存数组和切分函数。
+04-parallel_processor.py 和 03-strategy_pattern 中的 03-parallel_sort.py 都从这里导入，
+同一个进程里的特征处理和排序共用同一组进程池。
+"""
+import atexit
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 按进程数分别缓存进程池：n_jobs 不同的调用各用各的，不会互相关掉对方正在使用的进程池
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def get_executor(n_jobs):
+    """同样大小的进程池只创建一次，之后所有调用共用，避免每次都付出启动进程的开销。"""
+    with _executors_lock:
+        executor = _executors.get(n_jobs)
+        if executor is None:
+            executor = _executors[n_jobs] = ProcessPoolExecutor(max_workers=n_jobs)
+        return executor
+
+
+@atexit.register
+def _shutdown_executors():
+    with _executors_lock:
+        for executor in _executors.values():
+            executor.shutdown()
+        _executors.clear()
+
+
+class SharedArray:
+    """
+    一块放在共享内存里的 NumPy 数组。
+    子进程只需要知道名字、形状和 dtype 就能直接读写，不需要 pickle 整个数组。
+    """
+    def __init__(self, shape, dtype):
+        dtype = np.dtype(dtype)
+        nbytes = max(1, int(np.prod(shape)) * dtype.itemsize)
+        self._shm = shared_memory.SharedMemory(create=True, size=nbytes)
+        self.array = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+
+    @classmethod
+    def from_array(cls, data):
+        shared = cls(data.shape, data.dtype)
+        shared.array[...] = data
+        return shared
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    @property
+    def spec(self):
+        """子进程重新连接这块内存所需的全部信息。"""
+        return self._shm.name, self.array.shape, self.array.dtype.str
+
+    def close(self):
+        del self.array
+        self._shm.close()
+        self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Attached:
+    """
+    在子进程中按 spec 连接到父进程创建的共享数组。
+    进程池的子进程和父进程共用同一个 resource_tracker，重复登记不会有副作用；
+    共享内存的删除 (unlink) 始终由创建它的父进程负责。
+    """
+    def __init__(self, *specs):
+        self._shms = [shared_memory.SharedMemory(name=name) for name, _, _ in specs]
+        self.arrays = [np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+                       for shm, (_, shape, dtype) in zip(self._shms, specs)]
+
+    def __enter__(self):
+        return self.arrays
+
+    def __exit__(self, *exc):
+        # 关闭共享内存之前，必须先释放所有引用它的数组视图
+        self.arrays.clear()
+        for shm in self._shms:
+            shm.close()
+
+
+def split_range(length, parts):
+    """把 [0, length) 尽量均匀地切成 parts 段，返回 slice 列表。"""
+    bounds = np.linspace(0, length, parts + 1).astype(int)
+    return [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
@@ -0,0 +1,342 @@
+import os
+import json
+import time
+import random
+import tempfile
+from abc import ABC, abstractmethod
+from collections import Counter
+from itertools import islice
+
+try:
+    import numpy as np
+except ImportError:  # 没有安装 NumPy 时，自动策略只是少了一个候选项
+    np = None
+
+# 定义排序策略的抽象基类
+class SortingStrategy(ABC):
+    """排序策略的抽象基类。"""
+    @abstractmethod
+    def sort(self, data):
+        """抽象方法：对数据进行排序，返回一个新的有序列表。"""
+        pass
+
+# 插入排序：数据量很小时，没有任何额外开销
+class InsertionSortStrategy(SortingStrategy):
+    """插入排序算法的具体实现。"""
+    def sort(self, data):
+        result = list(data)
+        for i in range(1, len(result)):
+            item = result[i]
+            j = i - 1
+            while j >= 0 and result[j] > item:
+                result[j + 1] = result[j]
+                j -= 1
+            result[j + 1] = item
+        return result
+
+# Timsort：Python 内置的排序算法，对部分有序的数据特别快
+class TimSortStrategy(SortingStrategy):
+    """直接调用内置的 sorted()。"""
+    def sort(self, data):
+        return sorted(data)
+
+# 计数排序：整数且取值范围不大时是 O(n + k)
+class CountingSortStrategy(SortingStrategy):
+    """计数排序算法的具体实现，只适用于整数。"""
+    def sort(self, data):
+        if not data:
+            return []
+        counts = Counter(data)  # 计数在 C 代码中完成
+        result = []
+        extend = result.extend
+        for value in range(min(counts), max(counts) + 1):
+            count = counts.get(value)
+            if count:
+                extend([value] * count)
+        return result
+
+# 按不同键计数：取值范围很大、但不同的值很少时，只需要对这些不同的值排序
+class DistinctKeySortStrategy(SortingStrategy):
+    """
+    统计每个不同的键出现的次数，只对不同的键排序，再按次数展开，O(n + d log d)。
+    只用于整数和字符串：相等的元素无法区分，不需要考虑稳定性。
+    """
+    def sort(self, data):
+        counts = Counter(data)
+        result = []
+        extend = result.extend
+        for key in sorted(counts):
+            extend([key] * counts[key])
+        return result
+
+# 基数排序：取值范围较小的整数，超出计数排序的范围时使用
+class RadixSortStrategy(SortingStrategy):
+    """
+    减去最小值后放进 uint8 / uint16 数组。NumPy 对 16 位及以下整数的稳定排序就是基数排序，
+    整个过程在 C 代码中完成，是 O(n) 的。
+    """
+    def sort(self, data):
+        if not data:
+            return []
+        low = min(data)
+        span = max(data) - low
+        dtype = np.uint8 if span < 1 << 8 else np.uint16 if span < 1 << 16 else np.int64
+        keys = (np.asarray(data, dtype=np.int64) - low).astype(dtype)
+        return (np.sort(keys, kind="stable").astype(np.int64) + low).tolist()
+
+# NumPy 排序：大规模数值数据，排序在 C 代码中完成
+class NumpySortStrategy(SortingStrategy):
+    """转换成 NumPy 数组排序，再转换回列表。"""
+    def sort(self, data):
+        return np.sort(np.asarray(data), kind="stable").tolist()
+
+
+# 默认阈值；调用 AutoSortStrategy.calibrate() 后会被本机测量的结果替换。
+# 值为 None 表示这个策略在本机上从来没有赢过，永远不选它
+DEFAULT_THRESHOLDS = {
+    "insertion_max_n": 16,          # 不超过这个长度时使用插入排序
+    "counting_max_range_ratio": 2,  # 整数的 (最大值 - 最小值) 不超过 n 的这个倍数时使用计数排序
+    "radix_min_n": 10_000,          # 取值范围小于 2**16 的整数不少于这个长度时使用基数排序
+    "distinct_max_ratio": 0.05,     # 估计的不同键个数不超过 n 的这个比例时，按不同的键计数后排序
+    "numpy_min_n": 50_000,          # 数值数据不少于这个长度时使用 NumPy
+    "presorted_max_descent_ratio": 0.01,  # 相邻逆序对占比低于这个值时视为“基本有序”，交给 Timsort
+}
+SAMPLE_SIZE = 512
+# distinct_max_ratio 的上限：不同的键再多，O(n + d log d) 相对 Timsort 就没有优势了，
+# 校准结果或旧的校准文件超过这个值时一律截断
+DISTINCT_MAX_RATIO_LIMIT = 0.1
+RADIX_MAX_SPAN = 1 << 16
+INT64_MIN, INT64_MAX = -(1 << 63), (1 << 63) - 1
+
+
+class AutoSortStrategy(SortingStrategy):
+    """
+    自动选择排序算法的策略。
+    它先花很少的时间检查输入的特征（长度、元素类型、有序程度、取值范围），
+    再把排序工作交给最合适的具体策略。对 Sorter 来说，它和其他策略没有区别。
+    """
+    def __init__(self, thresholds=None, calibration_path=None):
+        self.thresholds = dict(DEFAULT_THRESHOLDS)
+        if calibration_path and os.path.exists(calibration_path):
+            with open(calibration_path, encoding="utf-8") as f:
+                self.thresholds.update(json.load(f))
+        if thresholds:
+            self.thresholds.update(thresholds)
+        if self.thresholds["distinct_max_ratio"] is not None:
+            self.thresholds["distinct_max_ratio"] = min(self.thresholds["distinct_max_ratio"],
+                                                        DISTINCT_MAX_RATIO_LIMIT)
+        self.strategies = {
+            "insertion": InsertionSortStrategy(),
+            "timsort": TimSortStrategy(),
+            "counting": CountingSortStrategy(),
+        }
+        self.strategies["distinct"] = DistinctKeySortStrategy()
+        if np is not None:
+            self.strategies["radix"] = RadixSortStrategy()
+            self.strategies["numpy"] = NumpySortStrategy()
+        self.last_choice = None
+
+    @staticmethod
+    def profile(data):
+        """
+        只看一个小样本来提取输入的特征：有序程度、元素类型、取值范围和不同键的占比。
+        样本由开头一段和随机位置的一段连续窗口组成，避免只看开头被误导。
+        不同键的占比是相对整个输入估计的（见 _estimate_distinct），而不是样本里的占比。
+        """
+        n = len(data)
+        sample = list(islice(data, SAMPLE_SIZE))
+        descents = sum(1 for a, b in zip(sample, sample[1:]) if a > b)
+        if n > 2 * SAMPLE_SIZE:
+            start = random.randrange(SAMPLE_SIZE, n - SAMPLE_SIZE)
+            window = data[start:start + SAMPLE_SIZE]
+            descents += sum(1 for a, b in zip(window, window[1:]) if a > b)
+            sample += window
+        sample_types = set(map(type, sample))
+        # 只对整数和字符串统计不同的键：其他类型可能不可哈希，或者相等的元素仍然可以区分
+        distinct_ratio = None
+        if sample_types in ({int}, {str}):
+            distinct_ratio = _estimate_distinct(sample, n) / n
+        return {
+            "n": n,
+            "sample": sample,
+            "sample_types": sample_types,
+            "descent_ratio": descents / max(1, len(sample) - 2),
+            "distinct_ratio": distinct_ratio,
+        }
+
+    def choose(self, data):
+        t = self.thresholds
+        n = len(data)
+        if n <= t["insertion_max_n"]:
+            return "insertion"
+        info = self.profile(data)
+        if info["descent_ratio"] <= t["presorted_max_descent_ratio"]:
+            return "timsort"
+        sample_types = info["sample_types"]
+        # O(n) 的确认（全部元素的类型、真实的取值范围）都由 C 代码完成，并且只做一次
+        all_same_type = None
+        if sample_types == {int}:
+            # 样本的取值范围已经足够小时，才值得花 O(n) 去确认全部元素都是整数以及真实的取值范围
+            sample = info["sample"]
+            sample_span = max(sample) - min(sample)
+            max_range = t["counting_max_range_ratio"] * n
+            use_radix = "radix" in self.strategies and _reached(n, t["radix_min_n"])
+            if sample_span <= max_range or (use_radix and sample_span < RADIX_MAX_SPAN):
+                all_same_type = set(map(type, data)) == {int}
+                if all_same_type:
+                    low, high = min(data), max(data)
+                    if high - low <= max_range:
+                        return "counting"
+                    if use_radix and high - low < RADIX_MAX_SPAN and INT64_MIN <= low and high <= INT64_MAX:
+                        return "radix"
+        distinct_ratio = info["distinct_ratio"]
+        if (distinct_ratio is not None and t["distinct_max_ratio"] is not None
+                and distinct_ratio <= t["distinct_max_ratio"]):
+            if all_same_type is None:
+                all_same_type = set(map(type, data)) == sample_types
+            if all_same_type:
+                return "distinct"
+        if "numpy" in self.strategies and _reached(n, t["numpy_min_n"]) and sample_types in ({int}, {float}):
+            # 样本之外可能混有其他类型，这里用 C 代码做一次 O(n) 的类型检查
+            if all_same_type is None:
+                all_same_type = set(map(type, data)) == sample_types
+            if all_same_type:
+                return "numpy"
+        return "timsort"
+
+    def sort(self, data):
+        self.last_choice = self.choose(data)
+        return self.strategies[self.last_choice].sort(data)
+
+    @classmethod
+    def calibrate(cls, path, repeat=3):
+        """
+        在本机上做一次性的测量，找出各个策略之间的分界点，并保存到 path。
+        之后创建 AutoSortStrategy(calibration_path=path) 即可使用这些阈值。
+        """
+        def best_time(strategy, data):
+            return min(_timed(strategy.sort, data) for _ in range(repeat))
+
+        tim, ins, cnt = TimSortStrategy(), InsertionSortStrategy(), CountingSortStrategy()
+        distinct = DistinctKeySortStrategy()
+        thresholds = dict(DEFAULT_THRESHOLDS)
+
+        # 1. 插入排序与 Timsort 的分界点
+        thresholds["insertion_max_n"] = 0
+        for n in (4, 8, 16, 32, 64):
+            data = [random.random() for _ in range(n)]
+            if best_time(ins, data) < best_time(tim, data):
+                thresholds["insertion_max_n"] = n
+
+        # 2. 计数排序在多大的取值范围内仍然比 Timsort 快
+        n = 50_000
+        thresholds["counting_max_range_ratio"] = 0
+        for ratio in (0.01, 0.1, 0.5, 1, 2, 4, 8):
+            data = [random.randrange(max(1, int(n * ratio))) for _ in range(n)]
+            if best_time(cnt, data) < best_time(tim, data):
+                thresholds["counting_max_range_ratio"] = ratio
+
+        # 3. 不同的键占比多少时，按不同的键计数仍然比 Timsort 快（键是取值范围很大的字符串）
+        n = 50_000
+        thresholds["distinct_max_ratio"] = None
+        for distinct_count in (10, 50, 200, 1000, 5000):
+            keys = [f"key_{random.randrange(10 ** 9)}" for _ in range(distinct_count)]
+            data = [random.choice(keys) for _ in range(n)]
+            if best_time(distinct, data) >= best_time(tim, data):
+                break
+            # 记录的是相对整个输入的真实比例，和 profile 估计出来的比例含义相同
+            thresholds["distinct_max_ratio"] = min(len(set(data)) / n, DISTINCT_MAX_RATIO_LIMIT)
+
+        # 4. 基数排序和 NumPy（都包括列表与数组之间的转换）从多大的数据量开始比 Timsort 快。
+        # 从来没有赢过时写入 None，而不是 JSON 标准中不存在的 Infinity
+        thresholds["radix_min_n"] = None
+        thresholds["numpy_min_n"] = None
+        if np is not None:
+            radix, nps = RadixSortStrategy(), NumpySortStrategy()
+            for n in (1_000, 10_000, 100_000, 500_000):
+                data = [random.randrange(RADIX_MAX_SPAN) for _ in range(n)]
+                if best_time(radix, data) < best_time(tim, data):
+                    thresholds["radix_min_n"] = n
+                    break
+            for n in (1_000, 10_000, 100_000, 500_000):
+                data = [random.random() for _ in range(n)]
+                if best_time(nps, data) < best_time(tim, data):
+                    thresholds["numpy_min_n"] = n
+                    break
+
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(thresholds, f, indent=2, allow_nan=False)
+        return thresholds
+
+
+def _estimate_distinct(sample, n):
+    """
+    根据样本估计整个输入中有多少个不同的键（Chao1 估计）。
+    样本中只出现一次的键越多，说明还有越多的键没有被抽到；每个键都重复出现时，样本里的不同键基本就是全部。
+    样本中不同键的占比不随 n 变化：对一百万个几乎各不相同的元素，它和对一千个元素一样接近 1，
+    所以需要的是不同键的个数，再和 n 比较。
+    """
+    counts = Counter(sample)
+    seen = len(counts)
+    if len(sample) >= n:
+        return seen
+    frequencies = Counter(counts.values())
+    once, twice = frequencies.get(1, 0), frequencies.get(2, 0)
+    if twice:
+        estimate = seen + once * once / (2 * twice)
+    else:
+        estimate = seen + once * (once - 1) / 2
+    return min(n, estimate)
+
+
+def _reached(n, threshold):
+    """threshold 为 None（或者旧版校准文件中的 Infinity）表示永远达不到。"""
+    return threshold is not None and n >= threshold
+
+
+def _timed(func, data):
+    start = time.perf_counter()
+    func(data)
+    return time.perf_counter() - start
+
+
+class Sorter:
+    """排序上下文类，它持有并使用一个排序策略。"""
+    def __init__(self, strategy: SortingStrategy):
+        self._strategy = strategy
+
+    def set_strategy(self, strategy: SortingStrategy):
+        self._strategy = strategy
+
+    def sort_data(self, data):
+        return self._strategy.sort(data)
+
+
+# 客户端代码（放在 __main__ 保护中，基准测试脚本可以直接加载这里的策略）：一次性的本机校准，结果保存到磁盘
+if __name__ == "__main__":
+    calibration_path = os.path.join(tempfile.gettempdir(), "auto_sort_calibration.json")
+    if not os.path.exists(calibration_path):
+        print("首次运行，正在进行本机校准...")
+        print(f"校准结果: {AutoSortStrategy.calibrate(calibration_path)}")
+    auto = AutoSortStrategy(calibration_path=calibration_path)
+    print(f"使用的阈值: {auto.thresholds}")
+
+    sorter = Sorter(auto)
+    n = 300_000
+    inputs = {
+        "很短的列表": [64, 34, 25, 12, 22, 11, 90],
+        "基本有序的整数": list(range(n))[:-10] + [random.randrange(n) for _ in range(10)],
+        "大量重复的整数": [random.randrange(1000) for _ in range(n)],
+        "取值范围较小的整数": [random.randrange(60_000) for _ in range(n // 10)],
+        "少量不同的大整数": [random.choice((10 ** 12, 7 * 10 ** 12, -3, 42)) for _ in range(n)],
+        "少量不同的字符串": [random.choice(("train", "valid", "test")) for _ in range(n)],
+        "随机浮点数": [random.random() for _ in range(n)],
+        "随机字符串": [f"user_{random.randrange(10 ** 9)}" for _ in range(n // 10)],
+    }
+
+    for name, data in inputs.items():
+        print("---")
+        auto_time = _timed(sorter.sort_data, data)
+        tim_time = _timed(sorted, data)
+        assert sorter.sort_data(data) == sorted(data)
+        print(f"{name}: 自动选择 {auto.last_choice!r}，耗时 {auto_time:.4f} 秒（直接 sorted() 耗时 {tim_time:.4f} 秒）")
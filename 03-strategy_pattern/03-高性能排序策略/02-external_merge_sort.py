@@ -0,0 +1,273 @@
+import os
+import sys
+import heapq
+import time
+import array
+import random
+import struct
+import tempfile
+from abc import ABC, abstractmethod
+from itertools import islice
+
+# 定义排序策略的抽象基类
+class SortingStrategy(ABC):
+    """排序策略的抽象基类。"""
+    @abstractmethod
+    def sort(self, data):
+        """抽象方法：对数据进行排序。"""
+        pass
+
+
+# ---
+# 临时文件使用的紧凑二进制格式
+
+class ArrayCodec:
+    """定长数值：直接用 array 模块按机器格式读写，每个 float64 只占 8 个字节。"""
+    def __init__(self, typecode):
+        self.typecode = typecode
+        self.itemsize = array.array(typecode).itemsize
+
+    def write(self, f, items):
+        array.array(self.typecode, items).tofile(f)
+
+    def read(self, f, buffer_items):
+        while True:
+            block = array.array(self.typecode)
+            try:
+                block.fromfile(f, buffer_items)
+            except EOFError:
+                # 文件末尾不足一个缓冲区时，fromfile 会读入剩余部分后再抛出 EOFError
+                pass
+            if not block:
+                return
+            yield from block
+
+
+class StrCodec:
+    """变长字符串：4 字节长度前缀 + UTF-8 编码的内容。"""
+    _header = struct.Struct("<I")
+    itemsize = 32  # 估算的平均长度，只用于计算读缓冲区的大小
+
+    def write(self, f, items):
+        pack = self._header.pack
+        f.write(b"".join(pack(len(b)) + b for b in (s.encode("utf-8") for s in items)))
+
+    def read(self, f, buffer_items):
+        unpack, size = self._header.unpack, self._header.size
+        while True:
+            header = f.read(size)
+            if not header:
+                return
+            (length,) = unpack(header)
+            yield f.read(length).decode("utf-8")
+
+
+CODECS = {
+    "float64": lambda: ArrayCodec("d"),
+    "int64": lambda: ArrayCodec("q"),
+    "str": StrCodec,
+}
+
+
+class ExternalSortResult:
+    """
+    sort() 的返回值：按顺序逐个产出排序结果的迭代器。
+    stats 只属于这一次排序：sort() 返回时有序段和归并轮数就已经填好，遍历结束后再补上总耗时。
+    临时文件在遍历结束、调用 close() 或对象被回收时删除。
+    """
+    def __init__(self, items, workdir, stats):
+        self.stats = stats
+        self._items = items
+        self._workdir = workdir
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return next(self._items)
+
+    def close(self):
+        """提前结束遍历并删除临时文件。"""
+        self._items.close()
+        self._workdir.cleanup()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ExternalMergeSortStrategy(SortingStrategy):
+    """
+    外部归并排序：数据比内存大时使用。
+    1. 分批读取输入，每批实际占用的内存不超过 memory_limit，排序后写入临时文件（一个“有序段”）；
+    2. 用堆对所有有序段做 k 路归并，结果以迭代器的形式逐个产出，或者直接写入输出文件。
+    """
+    def __init__(self, memory_limit=64 * 1024 * 1024, temp_dir=None, codec="float64",
+                 parse=None, key=None, max_fan_in=64):
+        if codec not in CODECS:
+            raise ValueError(f"未知的编码格式: {codec}")
+        self.memory_limit = memory_limit
+        self.temp_dir = temp_dir
+        self.codec = CODECS[codec]()
+        self.parse = parse
+        self.key = key
+        self.max_fan_in = max_fan_in
+
+    def _read_input(self, data):
+        """输入可以是文本文件路径（每行一条记录），也可以是任意可迭代对象。"""
+        if isinstance(data, (str, os.PathLike)):
+            parse = self.parse or (lambda line: line.rstrip("\n"))
+            with open(data, "r", encoding="utf-8") as f:
+                for line in f:
+                    yield parse(line)
+        else:
+            yield from data
+
+    def _runs(self, items, workdir):
+        """把输入切成若干个有序段，每个有序段写入一个临时文件。"""
+        items = iter(items)
+        paths = []
+        getsizeof, limit = sys.getsizeof, self.memory_limit
+        while True:
+            # 一边读一边累计每条记录实际占用的内存：对象本身 + 列表中的一个指针。
+            # 不能只看第一条记录来估算，字符串之类的变长记录长短不一
+            batch = []
+            append = batch.append
+            used = 0
+            for item in items:
+                append(item)
+                used += getsizeof(item) + 8
+                if used >= limit:
+                    break
+            if not batch:
+                return paths
+            batch.sort(key=self.key)
+            path = os.path.join(workdir, f"run_{len(paths):05d}.bin")
+            with open(path, "wb") as f:
+                self.codec.write(f, batch)
+            paths.append(path)
+            del batch
+
+    def _merge(self, paths):
+        """k 路归并：每个有序段只保留一个读缓冲区在内存中。"""
+        buffer_items = max(1, self.memory_limit // (len(paths) + 1) // max(1, self.codec.itemsize))
+        files = [open(path, "rb") for path in paths]
+        try:
+            # heapq.merge 内部维护一个大小为 k 的堆，并且对相等的元素保持各段的先后顺序（稳定）
+            yield from heapq.merge(*(self.codec.read(f, buffer_items) for f in files), key=self.key)
+        finally:
+            for f in files:
+                f.close()
+
+    def sort(self, data):
+        """
+        返回一个 ExternalSortResult，按顺序逐个产出排序后的元素。
+        切分有序段（以及有序段太多时的预先归并）在调用时就完成，最后一轮归并随着遍历进行。
+        """
+        start = time.perf_counter()
+        workdir = tempfile.TemporaryDirectory(dir=self.temp_dir, prefix="extsort_")
+        try:
+            paths = self._runs(self._read_input(data), workdir.name)
+            stats = {"runs": len(paths), "merge_passes": 1}
+            # 有序段太多时，先分组归并成更少、更长的有序段，避免同时打开过多文件
+            while len(paths) > self.max_fan_in:
+                merged = []
+                for i in range(0, len(paths), self.max_fan_in):
+                    group = paths[i:i + self.max_fan_in]
+                    path = os.path.join(workdir.name, f"merge_{stats['merge_passes']}_{i:05d}.bin")
+                    with open(path, "wb") as f:
+                        for block in _batched(self._merge(group), 65536):
+                            self.codec.write(f, block)
+                    for p in group:
+                        os.remove(p)
+                    merged.append(path)
+                paths = merged
+                stats["merge_passes"] += 1
+        except BaseException:
+            workdir.cleanup()
+            raise
+        return ExternalSortResult(self._final_merge(paths, workdir, stats, start), workdir, stats)
+
+    def _final_merge(self, paths, workdir, stats, start):
+        try:
+            yield from self._merge(paths)
+        finally:
+            workdir.cleanup()
+        stats["seconds"] = time.perf_counter() - start
+
+    def sort_to_file(self, data, output_path, format_item=str):
+        """把排序结果写入文本文件，每行一条记录。返回这一次排序的统计，其中 records 是写入的记录数。"""
+        count = 0
+        with self.sort(data) as result, open(output_path, "w", encoding="utf-8") as f:
+            for block in _batched(result, 65536):
+                f.write("".join(f"{format_item(item)}\n" for item in block))
+                count += len(block)
+        result.stats["records"] = count
+        return result.stats
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        block = list(islice(iterator, size))
+        if not block:
+            return
+        yield block
+
+
+class Sorter:
+    """排序上下文类，它持有并使用一个排序策略。"""
+    def __init__(self, strategy: SortingStrategy):
+        self._strategy = strategy
+
+    def set_strategy(self, strategy: SortingStrategy):
+        self._strategy = strategy
+
+    def sort_data(self, data):
+        return self._strategy.sort(data)
+
+
+# 客户端代码（放在 __main__ 保护中，基准测试脚本可以直接加载这里的策略）：准备一个模拟的大文件，每行一个浮点数
+if __name__ == "__main__":
+    workdir = tempfile.gettempdir()
+    input_path = os.path.join(workdir, "external_sort_input.txt")
+    output_path = os.path.join(workdir, "external_sort_output.txt")
+    n = 500_000
+    with open(input_path, "w") as f:
+        f.write("".join(f"{random.uniform(-1e6, 1e6)!r}\n" for _ in range(n)))
+    print(f"输入文件: {os.path.getsize(input_path) / 1e6:.1f} MB，{n} 行")
+
+    # 内存预算只有 1 MB，远小于数据本身，所以数据会被切成很多个有序段
+    strategy = ExternalMergeSortStrategy(memory_limit=1024 * 1024, codec="float64", parse=float, max_fan_in=8)
+    sorter = Sorter(strategy)
+
+    print("---")
+    print("以迭代器的形式读取前 5 个结果:")
+    result = sorter.sort_data(input_path)
+    print(f"sort_data 返回时，有序段已经生成: {result.stats}")
+    print([round(x, 2) for x in islice(result, 5)])
+    result.close()  # 提前结束遍历时，临时文件同样会被清理
+
+    print("---")
+    stats = strategy.sort_to_file(input_path, output_path, format_item=repr)
+    print(f"已写入 {stats['records']} 行到输出文件，统计: {stats}")
+    with open(output_path) as f:
+        values = [float(line) for line in f]
+    assert values == sorted(values)
+    print("校验通过：输出文件已完全有序")
+
+    print("---")
+    print("也可以对任意迭代器排序，例如字符串:")
+    words = (f"user_{random.randrange(10 ** 6):06d}" for _ in range(50_000))
+    string_strategy = ExternalMergeSortStrategy(memory_limit=512 * 1024, codec="str")
+    with Sorter(string_strategy).sort_data(words) as result:
+        print(list(islice(result, 3)))
+    # 长短不一的记录：按实际大小累计，长记录多的批次会更早写入磁盘，不会超出内存预算
+    lines = ("x" * random.choice((10, 10, 10, 5000)) for _ in range(2_000))
+    with Sorter(string_strategy).sort_data(lines) as result:
+        print(f"变长字符串: {sum(1 for _ in result)} 条，切成 {result.stats['runs']} 个有序段")
+
+    os.remove(input_path)
+    os.remove(output_path)
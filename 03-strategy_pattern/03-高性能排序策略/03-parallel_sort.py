@@ -0,0 +1,204 @@
+import os
+import sys
+import glob
+import time
+import random
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+# 进程池、共享内存数组和切分函数与 02-factory_pattern 的并行特征处理共用一份实现。
+# 路径要在模块顶层加入：spawn 方式启动的子进程会重新执行这里，才能找到同一个模块
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, glob.glob(os.path.join(_ROOT, "02-factory_pattern", "04-*"))[0])
+from parallel_utils import Attached, SharedArray, get_executor, split_range
+
+# 元素个数低于这个阈值时直接在当前进程中排序，避免小数据反而被进程间协调拖慢
+DEFAULT_PARALLEL_THRESHOLD = 1_000_000
+# 每个桶从样本中抽取的候选分割点个数：越大，各个桶的大小越均匀
+OVERSAMPLE = 64
+# float64 能精确表示的最大整数
+FLOAT_EXACT_LIMIT = 2 ** 53
+
+
+# 定义排序策略的抽象基类
+class SortingStrategy(ABC):
+    """排序策略的抽象基类。"""
+    @abstractmethod
+    def sort(self, data):
+        """抽象方法：对数据进行排序。"""
+        pass
+
+
+# ---
+# 在子进程中执行的函数：只通过共享内存的名字和切片位置通信，不传输数组本身
+
+def _sort_chunk(keys_spec, runs_spec, perm_spec, chunk, splitters):
+    """第一步：对自己负责的一段做稳定排序，再用分割点把它切成若干个桶，返回每个桶的边界。"""
+    with Attached(keys_spec, runs_spec, perm_spec) as (keys, runs, perm):
+        part = keys[chunk]
+        order = np.argsort(part, kind="stable")
+        runs[chunk] = part[order]
+        perm[chunk] = order + chunk.start
+        # side="left"：与分割点相等的元素都进入后一个桶，相等的键永远不会被分到两个桶里
+        return np.searchsorted(runs[chunk], splitters, side="left")
+
+
+def _merge_bucket(runs_spec, perm_spec, out_keys_spec, out_perm_spec, pieces, out_start):
+    """
+    第二步：把各段中属于同一个桶的部分按段的顺序拼接起来，再做一次稳定排序。
+    每一段本身已经有序，NumPy 的稳定排序会识别这些有序段，实际做的就是一次归并。
+    """
+    with Attached(runs_spec, perm_spec, out_keys_spec, out_perm_spec) as (runs, perm, out_keys, out_perm):
+        keys = np.concatenate([runs[a:b] for a, b in pieces])
+        positions = np.concatenate([perm[a:b] for a, b in pieces])
+        order = np.argsort(keys, kind="stable")
+        stop = out_start + len(keys)
+        out_keys[out_start:stop] = keys[order]
+        out_perm[out_start:stop] = positions[order]
+
+
+def _exact_as_float(values):
+    """整数和浮点数混在一起时会被提升成 float64，绝对值超过 2**53 的整数会丢失精度，排序结果可能出错。"""
+    return all(-FLOAT_EXACT_LIMIT <= v <= FLOAT_EXACT_LIMIT
+               for v in values if isinstance(v, (int, np.integer)))
+
+
+class ParallelSortStrategy(SortingStrategy):
+    """
+    多进程样本排序 (sample sort)，适用于大规模的数值数据。
+    1. 从键中抽样，选出 n_jobs - 1 个分割点，把取值范围分成 n_jobs 个桶；
+    2. 每个子进程对一段数据做稳定排序，并报告这一段落在各个桶中的边界；
+    3. 每个子进程负责一个桶，把各段中属于这个桶的部分归并后写到输出的对应位置。
+    所有数组都放在共享内存中，子进程之间只传递名字和切片位置。
+    排序是稳定的，并支持 key 参数：实际排序的是键，最后按照得到的排列取回原始元素。
+    """
+    def __init__(self, n_jobs=None, key=None, parallel_threshold=DEFAULT_PARALLEL_THRESHOLD):
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.key = key
+        self.parallel_threshold = parallel_threshold
+        self.last_mode = None
+
+    def _keys(self, data):
+        """把数据（或 key 的结果）转换成数值数组；无法无损转换时返回 None，交给内置排序处理。"""
+        if self.key is None and isinstance(data, np.ndarray):
+            return data if data.dtype.kind in "iuf" else None
+        raw = data if self.key is None else list(map(self.key, data))
+        if not isinstance(raw[0], (int, float, np.number)):
+            return None
+        # dtype 由全部的键共同决定：只看第一个键时，后面的浮点键会被截断成整数
+        keys = np.asarray(raw)
+        # 超出 int64 范围的整数或混入其他类型时会得到 object 数组
+        if keys.dtype.kind not in "iuf":
+            return None
+        if keys.dtype.kind == "f" and not _exact_as_float(raw):
+            return None
+        return keys
+
+    def sort(self, data):
+        n = len(data)
+        keys = self._keys(data) if n else None
+        if keys is None:
+            self.last_mode = "builtin"
+            return sorted(data, key=self.key)
+        if self.n_jobs < 2 or n < self.parallel_threshold:
+            self.last_mode = "serial"
+            if keys is data:
+                return np.sort(data, kind="stable")
+            perm = np.argsort(keys, kind="stable")
+        else:
+            self.last_mode = "parallel"
+            perm = self._parallel_argsort(keys)
+        if isinstance(data, np.ndarray):
+            return data[perm]
+        # 列表按排列取回原始对象：整数仍然是整数，key 排序时元素本身保持不变
+        return [data[i] for i in perm.tolist()]
+
+    def _parallel_argsort(self, keys):
+        n, n_jobs = len(keys), self.n_jobs
+        chunks = split_range(n, n_jobs)
+        sample = np.sort(keys[np.random.randint(0, n, size=n_jobs * OVERSAMPLE)])
+        splitters = sample[OVERSAMPLE::OVERSAMPLE][:n_jobs - 1]
+
+        executor = get_executor(n_jobs)
+        with SharedArray(keys.shape, keys.dtype) as shared_keys, \
+                SharedArray(keys.shape, keys.dtype) as runs, \
+                SharedArray(keys.shape, np.int64) as perm, \
+                SharedArray(keys.shape, keys.dtype) as out_keys, \
+                SharedArray(keys.shape, np.int64) as out_perm:
+            shared_keys.array[...] = keys
+            futures = [executor.submit(_sort_chunk, shared_keys.spec, runs.spec, perm.spec, chunk, splitters)
+                       for chunk in chunks]
+            # bounds[i] 是第 i 段中各个桶的起止位置（相对于段的开头）
+            bounds = [np.concatenate(([0], f.result(), [chunk.stop - chunk.start]))
+                      for f, chunk in zip(futures, chunks)]
+
+            futures = []
+            out_start = 0
+            for bucket in range(len(splitters) + 1):
+                # 按段的顺序拼接，相等的键仍然保持原始的先后顺序
+                pieces = [(chunk.start + b[bucket], chunk.start + b[bucket + 1])
+                          for chunk, b in zip(chunks, bounds) if b[bucket + 1] > b[bucket]]
+                size = sum(b - a for a, b in pieces)
+                if size:
+                    futures.append(executor.submit(_merge_bucket, runs.spec, perm.spec, out_keys.spec,
+                                                   out_perm.spec, pieces, out_start))
+                out_start += size
+            for f in futures:
+                f.result()
+            return out_perm.array.copy()
+
+
+class Sorter:
+    """排序上下文类，它持有并使用一个排序策略。"""
+    def __init__(self, strategy: SortingStrategy):
+        self._strategy = strategy
+
+    def set_strategy(self, strategy: SortingStrategy):
+        self._strategy = strategy
+
+    def sort_data(self, data):
+        return self._strategy.sort(data)
+
+
+def _best_time(func, data, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(data)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+# 客户端代码：使用进程池时必须放在 __main__ 保护中
+if __name__ == "__main__":
+    cpu_count = os.cpu_count() or 1
+    print(f"本机 CPU 核数: {cpu_count}")
+
+    # 小数据：低于阈值，直接在当前进程中排序
+    sorter = Sorter(ParallelSortStrategy())
+    print(f"小数据: {sorter.sort_data([64, 34, 25, 12, 22, 11, 90])}，模式 {sorter._strategy.last_mode!r}")
+    print(f"字符串: {sorter.sort_data(['pear', 'apple', 'fig'])}，模式 {sorter._strategy.last_mode!r}")
+
+    print("---")
+    # 稳定性与 key：按分数排序，分数相同的记录保持原来的先后顺序
+    records = [(f"id_{i}", random.randrange(100)) for i in range(200_000)]
+    strategy = ParallelSortStrategy(n_jobs=max(2, cpu_count), key=lambda r: r[1], parallel_threshold=10_000)
+    result = Sorter(strategy).sort_data(records)
+    assert result == sorted(records, key=lambda r: r[1])
+    print(f"按 key 并行排序 {len(records)} 条记录，与 sorted(key=...) 完全一致（稳定），模式 {strategy.last_mode!r}")
+
+    print("---")
+    data = np.random.default_rng(0).random(5_000_000)
+    expected = np.sort(data, kind="stable")
+    serial_time = _best_time(ParallelSortStrategy(n_jobs=1).sort, data)
+    print(f"基准: {len(data):,} 个 float64，单进程 {serial_time:.4f} 秒")
+    jobs = sorted({2, 4, 8, cpu_count} & set(range(2, max(2, cpu_count) + 1))) or [2]
+    for n_jobs in jobs:
+        strategy = ParallelSortStrategy(n_jobs=n_jobs)
+        strategy.sort(data[:1_000_000])  # 预热：第一次调用会启动进程池
+        cost = _best_time(strategy.sort, data)
+        assert np.array_equal(strategy.sort(data), expected)
+        print(f"{n_jobs} 个进程: {cost:.4f} 秒，加速比 {serial_time / cost:.2f}x")
+    if cpu_count < 2:
+        print("（本机只有一个核，多个进程只能轮流执行，这里看不到加速效果）")
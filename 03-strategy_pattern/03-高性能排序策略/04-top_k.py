@@ -0,0 +1,214 @@
+import time
+import heapq
+import random
+import tracemalloc
+from abc import ABC, abstractmethod
+from itertools import count, islice
+
+try:
+    import numpy as np
+except ImportError:  # 没有安装 NumPy 时，数组也走堆选择
+    np = None
+
+# k 不超过 n 的这个比例时用堆选择（O(n log k)），否则完整排序后截取更快
+HEAP_MAX_RATIO = 0.1
+
+
+# 定义排序策略的抽象基类
+class SortingStrategy(ABC):
+    """排序策略的抽象基类。"""
+    @abstractmethod
+    def sort(self, data):
+        """抽象方法：对数据进行排序。"""
+        pass
+
+# 快速排序的具体策略
+class QuickSortStrategy(SortingStrategy):
+    """直接调用 Python 内置的排序函数。"""
+    def sort(self, data):
+        return sorted(data)
+
+
+class StreamingTopK:
+    """
+    在线维护“到目前为止最大的 k 个元素”，内存始终是 O(k)。
+    内部是一个大小为 k 的最小堆，堆顶是当前第 k 名；新元素不比它大时直接丢弃，只花一次比较。
+    键相同的元素先到的排在前面，与 sorted(..., reverse=True) 的稳定性一致。
+    """
+    def __init__(self, k, key=None):
+        if k < 0:
+            raise ValueError(f"k 不能为负数: {k}")
+        self.k = k
+        self.key = key
+        self.seen = 0
+        self._heap = []
+        self._counter = count()
+
+    def push(self, item):
+        self.seen += 1
+        value = item if self.key is None else self.key(item)
+        heap = self._heap
+        if len(heap) < self.k:
+            # 序号取负：键相同时，后到的元素更“小”，会先被淘汰
+            heapq.heappush(heap, (value, -next(self._counter), item))
+        elif heap and value > heap[0][0]:
+            heapq.heapreplace(heap, (value, -next(self._counter), item))
+
+    def extend(self, iterable):
+        """批量推送：先填满堆，之后只有比第 k 名大的元素才会进入堆，循环中的变量都绑定到局部。"""
+        iterator = iter(iterable)
+        for item in islice(iterator, self.k - len(self._heap)):
+            self.push(item)
+        if not self._heap or len(self._heap) < self.k:
+            return self
+        heap, key, counter, heapreplace = self._heap, self.key, self._counter, heapq.heapreplace
+        threshold = heap[0][0]
+        seen = 0
+        for item in iterator:
+            seen += 1
+            value = item if key is None else key(item)
+            if value > threshold:
+                heapreplace(heap, (value, -next(counter), item))
+                threshold = heap[0][0]
+        # 被丢弃的元素不需要序号：它们不会再与任何元素比较先后
+        self.seen += seen
+        return self
+
+    def result(self):
+        """按从大到小的顺序返回当前的前 k 名，不会改变内部状态。"""
+        return [entry[2] for entry in sorted(self._heap, reverse=True)]
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class Sorter:
+    """
+    排序上下文类，它持有并使用一个排序策略。
+    只需要前 k 名时，用 top_k / partial_sort 代替完整排序。
+    """
+    def __init__(self, strategy: SortingStrategy):
+        self._strategy = strategy
+
+    def set_strategy(self, strategy: SortingStrategy):
+        self._strategy = strategy
+
+    def sort_data(self, data):
+        return self._strategy.sort(data)
+
+    @staticmethod
+    def top_k(data, k, key=None, axis=-1):
+        """
+        返回最大的 k 个元素，按从大到小排列，结果与 sorted(data, key=key, reverse=True)[:k] 相同。
+        data 可以是列表、NumPy 数组或任意迭代器（迭代器只会被遍历一次，内存为 O(k)）。
+        不传 key 的多维 NumPy 数组沿 axis（默认最后一维）分别选出前 k 名，例如每个样本分数最高的 k 个类别；
+        传了 key 时按第一维逐个元素（行）计算键。
+        """
+        if k <= 0:
+            return []
+        if np is not None and isinstance(data, np.ndarray) and key is None:
+            if data.ndim == 0:
+                raise ValueError("top_k 需要至少一维的数组")
+            # 把要选择的那一维移到最后，之后都用切片 [..., a:b]，不需要构造下标数组
+            x = np.moveaxis(data, axis, -1)
+            n = x.shape[-1]
+            if k >= n:
+                return np.moveaxis(np.sort(x)[..., ::-1], -1, axis)
+            # argpartition 是 O(n) 的快速选择，只有选出来的 k 个元素需要排序
+            chosen = np.argpartition(x, n - k)[..., n - k:]
+            part = np.take_along_axis(x, chosen, axis=-1)
+            return np.moveaxis(np.sort(part)[..., ::-1], -1, axis)
+        if not hasattr(data, "__len__") or k <= len(data) * HEAP_MAX_RATIO:
+            return StreamingTopK(k, key).extend(data).result()
+        return sorted(data, key=key, reverse=True)[:k]
+
+    @staticmethod
+    def partial_sort(data, k, key=None, axis=-1):
+        """
+        部分排序：返回一个新列表（数组），前 k 个元素是最小的 k 个并且已经按升序排好，
+        其余元素的顺序不作保证。与 C++ 的 std::partial_sort 对应。
+        不传 key 的多维 NumPy 数组与 top_k 一样沿 axis 分别处理。
+        """
+        if np is not None and isinstance(data, np.ndarray) and key is None:
+            if data.ndim == 0:
+                raise ValueError("partial_sort 需要至少一维的数组")
+            x = np.moveaxis(data, axis, -1)
+            k = max(0, min(k, x.shape[-1]))
+            if k == 0:
+                return data.copy()
+            order = np.argpartition(x, k - 1)
+            head = order[..., :k]
+            order[..., :k] = np.take_along_axis(
+                head, np.argsort(np.take_along_axis(x, head, axis=-1), kind="stable"), axis=-1)
+            return np.moveaxis(np.take_along_axis(x, order, axis=-1), -1, axis)
+        n = len(data)
+        k = max(0, min(k, n))
+        keys = data if key is None else [key(item) for item in data]
+        if k > n * HEAP_MAX_RATIO:
+            order = sorted(range(n), key=keys.__getitem__)
+            return [data[i] for i in order]
+        # nsmallest 对相同的键保持原始顺序，所以前 k 个元素的排序是稳定的
+        head = heapq.nsmallest(k, range(n), key=keys.__getitem__)
+        chosen = set(head)
+        return [data[i] for i in head] + [item for i, item in enumerate(data) if i not in chosen]
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+# 客户端代码：从一百万条预测结果中选出分数最高的 10 条
+sorter = Sorter(QuickSortStrategy())
+predictions = [(f"item_{i}", random.random()) for i in range(1_000_000)]
+score = lambda p: p[1]
+
+full, full_time = _timed(sorted, predictions, key=score, reverse=True)
+best, top_time = _timed(sorter.top_k, predictions, 10, key=score)
+assert best == full[:10]
+print(f"完整排序后截取前 10 名: {full_time:.4f} 秒")
+print(f"top_k（堆选择）:       {top_time:.4f} 秒，结果相同")
+print(f"第 1 名: {best[0]}")
+
+print("---")
+if np is not None:
+    scores = np.random.default_rng(0).random(10_000_000)
+    full, full_time = _timed(np.sort, scores)
+    best, top_time = _timed(sorter.top_k, scores, 100)
+    assert np.array_equal(best, full[::-1][:100])
+    print(f"NumPy 数组: np.sort {full_time:.4f} 秒，top_k（argpartition）{top_time:.4f} 秒")
+
+    partial, partial_time = _timed(sorter.partial_sort, scores, 100)
+    assert np.array_equal(partial[:100], full[:100])
+    print(f"partial_sort 前 100 个: {partial_time:.4f} 秒，前 100 个与完整排序一致")
+
+    # 二维数组：每个样本（行）分数最高的 3 个类别
+    logits = np.random.default_rng(1).random((4, 1000))
+    best = sorter.top_k(logits, 3)
+    assert np.array_equal(best, -np.sort(-logits, axis=1)[:, :3])
+    print(f"二维数组 {logits.shape} 的 top_k(k=3): 形状 {best.shape}，每行与按行完整排序的前 3 个一致")
+    assert np.array_equal(sorter.partial_sort(logits, 3, axis=0)[:3], np.sort(logits, axis=0)[:3])
+
+print("---")
+print(f"列表的 partial_sort: {sorter.partial_sort([64, 34, 25, 12, 22, 11, 90], 3)}")
+
+print("---")
+# 流式 top-k：预测结果由生成器逐条产生，从不把它们全部放进内存
+def prediction_stream(n):
+    for i in range(n):
+        yield (f"item_{i}", random.random())
+
+best, stream_time = _timed(sorter.top_k, prediction_stream(1_000_000), 10, key=score)
+# tracemalloc 本身会显著拖慢内存分配，所以单独跑一遍来测量峰值内存
+tracemalloc.start()
+sorter.top_k(prediction_stream(1_000_000), 10, key=score)
+peak = tracemalloc.get_traced_memory()[1]
+tracemalloc.stop()
+print(f"流式 top_k 处理 100 万条: {stream_time:.4f} 秒，峰值内存 {peak / 1024:.1f} KB")
+
+# 也可以长期持有一个 StreamingTopK，随着训练不断推送新结果
+leaderboard = StreamingTopK(3, key=score)
+for batch in range(5):
+    leaderboard.extend(islice(prediction_stream(10_000), 10_000))
+print(f"已处理 {leaderboard.seen} 条，当前前 3 名: {[round(p[1], 6) for p in leaderboard.result()]}")
@@ -0,0 +1,320 @@
+import os
+import ast
+import csv
+import sys
+import glob
+import json
+import math
+import time
+import types
+import random
+import argparse
+import importlib.util
+import platform
+import traceback
+import tracemalloc
+import contextlib
+
+# ---
+# 策略注册表：基准测试会遍历这里登记的每一个策略
+
+STRATEGIES = {}
+# 策略能处理哪些输入：{名称: 判断函数}。不支持的用例直接标记为 unsupported，不去运行它
+SUPPORTS = {}
+
+
+def register(name, supports=None):
+    """类装饰器：把排序策略登记到基准测试中。supports(data) 返回 False 的输入不会交给这个策略。"""
+    def decorator(strategy_cls):
+        STRATEGIES[name] = strategy_cls
+        if supports is not None:
+            SUPPORTS[name] = supports
+        return strategy_cls
+    return decorator
+
+
+def _all_int(data):
+    # bool 是 int 的子类，但不是计数排序要处理的整数
+    return all(type(x) is int for x in data)
+
+
+# ---
+# 被测试的策略：直接从原文件加载并登记，测量的就是真正在用的实现，而不是在这里重写的一份
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+# 只保留这些语句：01 节的示例脚本在模块顶层直接运行演示代码，加载时要跳过
+_DEFINITIONS = (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+
+
+def _load_definitions(name, path):
+    """只执行脚本中的 import、函数和类定义，得到和原文完全相同的类，但不运行演示代码。"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    tree.body = [node for node in tree.body if isinstance(node, _DEFINITIONS)]
+    module = types.ModuleType(name)
+    module.__file__ = path
+    exec(compile(tree, path, "exec"), module.__dict__)
+    return module
+
+
+def _load_module(filename, module_name):
+    """本节的脚本把演示代码放在 __main__ 保护中，可以直接当作模块加载；已经加载过的直接复用。"""
+    module = sys.modules.get(module_name)
+    if module is None:
+        path = os.path.join(HERE, filename)
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        # 进程池需要按模块名找到子进程中执行的函数
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+    return module
+
+
+# 01 节的冒泡排序（原地修改输入）和快速排序（返回新列表）
+_basic = _load_definitions("strategy_pattern", glob.glob(
+    os.path.join(os.path.dirname(HERE), "01-*", "01-strategy_pattern.py"))[0])
+register("bubble")(_basic.BubbleSortStrategy)
+register("quick")(_basic.QuickSortStrategy)
+
+try:
+    _auto = _load_module("01-auto_sort_strategy.py", "auto_sort_strategy")
+except ImportError:
+    _auto = None
+if _auto is not None:
+    # AutoSortStrategy 内部使用的具体策略也单独登记
+    register("insertion")(_auto.InsertionSortStrategy)
+    register("counting", supports=_all_int)(_auto.CountingSortStrategy)
+    if _auto.np is not None:
+        register("numpy")(_auto.NumpySortStrategy)
+
+    @register("auto")
+    class AutoStrategy(_auto.SortingStrategy):
+        """01 节的 AutoSortStrategy，使用默认阈值。"""
+        def __init__(self):
+            self._strategy = _auto.AutoSortStrategy()
+
+        def sort(self, data):
+            return self._strategy.sort(data)
+
+try:
+    _external = _load_module("02-external_merge_sort.py", "external_merge_sort")
+except ImportError:
+    _external = None
+if _external is not None:
+    @register("external")
+    class ExternalStrategy(_external.SortingStrategy):
+        """02 节的 ExternalMergeSortStrategy。内存预算只有 1 MB，较大的输入会真正落盘并归并。"""
+        def sort(self, data):
+            codec = "str" if data and isinstance(data[0], str) else "int64"
+            strategy = _external.ExternalMergeSortStrategy(memory_limit=1024 * 1024, codec=codec)
+            return list(strategy.sort(data))
+
+try:
+    _parallel = _load_module("03-parallel_sort.py", "parallel_sort")
+except ImportError:  # 并行排序依赖 NumPy
+    _parallel = None
+if _parallel is not None:
+    @register("parallel")
+    class ParallelStrategy(_parallel.SortingStrategy):
+        """03 节的 ParallelSortStrategy。降低并行阈值，让十万规模的输入也走多进程的路径。"""
+        def __init__(self):
+            self._strategy = _parallel.ParallelSortStrategy(n_jobs=2, parallel_threshold=50_000)
+
+        def sort(self, data):
+            return self._strategy.sort(data)
+
+
+# ---
+# 输入分布：每个函数返回 n 个整数；字符串版本由整数按保序的方式转换得到
+
+def _random(n, rng):
+    return [rng.randrange(n * 10) for _ in range(n)]
+
+def _nearly_sorted(n, rng):
+    data = list(range(n))
+    for _ in range(max(1, n // 100)):  # 随机交换 1% 的位置
+        i, j = rng.randrange(n), rng.randrange(n)
+        data[i], data[j] = data[j], data[i]
+    return data
+
+DISTRIBUTIONS = {
+    "random": _random,
+    "sorted": lambda n, rng: list(range(n)),
+    "reversed": lambda n, rng: list(range(n, 0, -1)),
+    "nearly_sorted": _nearly_sorted,
+    "many_duplicates": lambda n, rng: [rng.randrange(10) for _ in range(n)],
+}
+
+# 定长、补零的字符串与原来的整数顺序相同，所以两种类型的输入具有相同的“形状”
+DTYPES = {
+    "int": lambda values: values,
+    "str": lambda values: [f"key_{v:012d}" for v in values],
+}
+
+# 由前面的规模推算出的耗时超过预算的这个倍数时，不再运行，直接标记为 skipped
+SKIP_FACTOR = 2
+
+
+def predict(history, n):
+    """
+    根据已经测得的 (规模, 耗时) 推算规模 n 的耗时。
+    增长指数取最近两个点的实测值，并限制在 [1, 2] 之间；只有一个点时按最坏的平方增长推算。
+    """
+    if not history:
+        return 0.0
+    n1, t1 = history[-1]
+    exponent = 2.0
+    if len(history) > 1:
+        n0, t0 = history[-2]
+        exponent = min(2.0, max(1.0, math.log(max(t1, 1e-9) / max(t0, 1e-9)) / math.log(n1 / n0)))
+    return t1 * (n / n1) ** exponent
+
+
+def measure(strategy, original, repeat, budget):
+    """
+    返回 (最短耗时, 峰值内存字节数, 是否修改了输入, 结果是否正确)。
+    每一轮都在一份新的副本上排序：原地排序的策略不会在第二轮拿到已经排好的数据，复制的时间也不计入。
+    已经超出预算的用例不再测量峰值内存，峰值内存返回 None。
+    """
+    best = float("inf")
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            data = list(original)
+            start = time.perf_counter()
+            result = strategy.sort(data)
+            best = min(best, time.perf_counter() - start)
+        # 只报告真正改动了输入的情况：原样返回输入列表本身的策略（例如输入已经有序）不算修改
+        mutated = data != original
+        correct = list(result) == sorted(original)
+        if best > budget:
+            return best, None, mutated, correct
+        # tracemalloc 会显著拖慢内存分配，所以峰值内存单独测一遍
+        data = list(original)
+        tracemalloc.start()
+        strategy.sort(data)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return best, peak, mutated, correct
+
+
+FIELDS = ["strategy", "distribution", "dtype", "n", "seconds", "peak_kb", "mutated", "status", "error"]
+
+
+def run_suite(sizes, budget, repeat=3, seed=0):
+    # 每个 (分布, 类型, 规模) 的输入只生成一次，所有策略排序的是完全相同的数据
+    inputs = {}
+
+    def get_input(dist_name, dtype_name, n):
+        case = (dist_name, dtype_name, n)
+        if case not in inputs:
+            # 字符串种子在不同进程中得到相同的随机序列，int 和 str 两种类型共享同一组取值
+            rng = random.Random(f"{seed}:{dist_name}:{n}")
+            inputs[case] = DTYPES[dtype_name](DISTRIBUTIONS[dist_name](n, rng))
+        return inputs[case]
+
+    results = []
+    for name, strategy_cls in STRATEGIES.items():
+        strategy = strategy_cls()
+        supports = SUPPORTS.get(name)
+        for dist_name in DISTRIBUTIONS:
+            for dtype_name in DTYPES:
+                history = []  # 已测得的 (规模, 耗时)
+                for n in sorted(sizes):
+                    row = dict.fromkeys(FIELDS)
+                    row.update(strategy=name, distribution=dist_name, dtype=dtype_name, n=n, status="ok")
+                    results.append(row)
+                    # 不让一个 O(n²) 的策略在大规模上拖住整个基准测试
+                    predicted = predict(history, n)
+                    if predicted > budget * SKIP_FACTOR:
+                        row["status"] = "skipped"
+                        continue
+                    original = get_input(dist_name, dtype_name, n)
+                    # 是否支持在运行之前检查：策略内部抛出的任何异常都是真正的错误，不能被当作“不支持”
+                    if supports is not None and not supports(original):
+                        row["status"] = "unsupported"
+                        continue
+                    try:
+                        seconds, peak, mutated, correct = measure(
+                            strategy, original, repeat if predicted < budget else 1, budget)
+                    except Exception as exc:
+                        row.update(status="error", error=f"{type(exc).__name__}: {exc}")
+                        traceback.print_exc()
+                        break
+                    row.update(seconds=seconds, peak_kb=None if peak is None else peak / 1024, mutated=mutated)
+                    if not correct:
+                        row["status"] = "wrong"
+                    elif seconds > budget:
+                        row["status"] = "over_budget"
+                    history.append((n, seconds))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "sizes": sorted(sizes),
+            "budget_seconds": budget,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def print_table(report):
+    print(f"{'策略':<12}{'分布':<18}{'类型':<6}{'n':>9}{'秒':>11}{'峰值 KB':>11}{'修改输入':>10}  状态")
+    for row in report["results"]:
+        seconds = "-" if row["seconds"] is None else f"{row['seconds']:.5f}"
+        peak = "-" if row["peak_kb"] is None else f"{row['peak_kb']:.1f}"
+        mutated = "-" if row["mutated"] is None else ("是" if row["mutated"] else "否")
+        print(f"{row['strategy']:<12}{row['distribution']:<18}{row['dtype']:<6}{row['n']:>9}"
+              f"{seconds:>11}{peak:>11}{mutated:>10}  {row['status']}")
+
+
+def write_csv(report, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(report["results"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="在多种输入分布和规模上比较所有已注册的排序策略")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000],
+                        help="输入规模列表")
+    parser.add_argument("--budget", type=float, default=0.5, help="单次排序的耗时预算（秒），超出的会被标记")
+    parser.add_argument("--repeat", type=int, default=3, help="每个用例重复测量的轮数，取最短耗时")
+    parser.add_argument("--strategies", nargs="+", choices=sorted(STRATEGIES), help="只测试这些策略")
+    parser.add_argument("--json", help="把结果写入这个 JSON 文件")
+    parser.add_argument("--csv", help="把结果写入这个 CSV 文件")
+    args = parser.parse_args(argv)
+
+    if args.strategies:
+        for name in set(STRATEGIES) - set(args.strategies):
+            del STRATEGIES[name]
+
+    report = run_suite(args.sizes, args.budget, repeat=args.repeat)
+    print_table(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n结果已写入 {args.json}")
+    if args.csv:
+        write_csv(report, args.csv)
+        print(f"结果已写入 {args.csv}")
+
+    flagged = sorted({row["strategy"] for row in report["results"]
+                      if row["status"] in ("over_budget", "skipped")})
+    if flagged:
+        print(f"\n超出 {args.budget} 秒预算的策略: {', '.join(flagged)}")
+    wrong = [row for row in report["results"] if row["status"] == "wrong"]
+    errors = [row for row in report["results"] if row["status"] == "error"]
+    for row in errors:
+        print(f"\n{row['strategy']} 在 {row['distribution']}/{row['dtype']}/{row['n']} 上出错: {row['error']}")
+    if wrong:
+        print(f"\n{len(wrong)} 个用例的排序结果不正确！")
+    return 1 if wrong or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
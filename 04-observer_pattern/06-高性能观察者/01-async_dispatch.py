@@ -0,0 +1,298 @@
+import time
+import random
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+
+# 抽象观察者
+class Observer(ABC):
+    @abstractmethod
+    def update(self, subject):
+        """当主题状态改变时，此方法会被调用。"""
+        pass
+
+# 抽象主题
+class Subject(ABC):
+    @abstractmethod
+    def attach(self, observer: Observer):
+        """注册一个观察者。"""
+        pass
+
+    @abstractmethod
+    def detach(self, observer: Observer):
+        """移除一个观察者。"""
+        pass
+
+    @abstractmethod
+    def notify(self):
+        """通知所有观察者。"""
+        pass
+
+# ---
+# 异步分发：每个观察者一个有界队列和一个工作线程
+
+OVERFLOW_POLICIES = ("block", "drop_oldest", "latest")
+
+
+class _Snapshot:
+    """
+    通知发出那一刻的主题快照。
+    观察者在工作线程中执行时，主题的状态可能已经变了好几次；
+    快照固定了 status，其余属性仍然转发给真正的主题。
+    """
+    __slots__ = ("_subject", "status", "notified_at")
+
+    def __init__(self, subject, status):
+        self._subject = subject
+        self.status = status
+        self.notified_at = time.perf_counter()
+
+    def __getattr__(self, name):
+        return getattr(self._subject, name)
+
+
+class _ObserverWorker:
+    """
+    一个观察者专用的有界队列和工作线程。
+    overflow 决定队列满时怎么办：
+      "block"       : 训练循环等待，直到队列有空位（不丢数据）；
+      "drop_oldest" : 丢弃最旧的一条通知；
+      "latest"      : 只保留最新的一条，适合只关心当前状态的观察者（例如进度条）。
+    """
+    def __init__(self, observer, maxsize, overflow):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"未知的溢出策略: {overflow}")
+        self.observer = observer
+        self.maxsize = 1 if overflow == "latest" else maxsize
+        self.overflow = overflow
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._busy = False
+        self._closed = False
+        self.stats = {"enqueued": 0, "delivered": 0, "dropped": 0, "errors": 0, "max_latency": 0.0}
+        self._thread = threading.Thread(target=self._run, name=f"observer-{observer.__class__.__name__}",
+                                        daemon=True)
+        self._thread.start()
+
+    def put(self, snapshot):
+        with self._cond:
+            if self._closed:
+                # 工作线程已经退出，再入队的通知永远不会被处理
+                raise RuntimeError(f"观察者 {self.observer.__class__.__name__} 的工作线程已经关闭")
+            if len(self._queue) >= self.maxsize:
+                if self.overflow == "block":
+                    while len(self._queue) >= self.maxsize and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        raise RuntimeError(f"观察者 {self.observer.__class__.__name__} 的工作线程已经关闭")
+                else:
+                    self._queue.popleft()
+                    self.stats["dropped"] += 1
+            self._queue.append(snapshot)
+            self.stats["enqueued"] += 1
+            self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                snapshot = self._queue.popleft()
+                self._busy = True
+                self._cond.notify_all()  # 唤醒因队列已满而等待的训练循环
+            failed = False
+            try:
+                self.observer.update(snapshot)
+            except Exception as e:
+                # 一个观察者出错不应该影响训练循环和其他观察者
+                failed = True
+                print(f"观察者 {self.observer.__class__.__name__} 出错: {e!r}")
+            latency = time.perf_counter() - snapshot.notified_at
+            with self._cond:
+                self._busy = False
+                # 统计只在锁内修改；出错的通知记为 errors，不算成功送达
+                self.stats["errors" if failed else "delivered"] += 1
+                self.stats["max_latency"] = max(self.stats["max_latency"], latency)
+                self._cond.notify_all()
+
+    def lag(self):
+        """还没有处理完的通知数：队列中的加上正在处理的。"""
+        with self._cond:
+            return len(self._queue) + self._busy
+
+    def flush(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._queue or self._busy:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+
+# 具体主题：训练监控器
+class TrainingMonitor(Subject):
+    """
+    mode="sync"  : 和原来一样，在训练循环中依次调用每个观察者；
+    mode="async" : 每个观察者有自己的有界队列和工作线程，notify 只负责入队，立即返回。
+    """
+    def __init__(self, mode="sync", maxsize=64, overflow="block"):
+        if mode not in ("sync", "async"):
+            raise ValueError(f"未知的通知模式: {mode}")
+        self.mode = mode
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self._observers = []
+        # 以观察者对象本身为键：字典持有对象的引用，不会像 id() 那样在对象被回收后被别的对象复用
+        self._workers = {}
+        self._status = None  # 训练状态
+
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        self._status = value
+        # 状态改变时，通知所有观察者
+        self.notify()
+
+    def attach(self, observer: Observer, maxsize=None, overflow=None):
+        """maxsize 和 overflow 可以为每个观察者单独指定，默认使用监控器的设置。"""
+        if any(existing is observer for existing in self._observers):
+            # 重复注册会多出一个工作线程，每条通知也会被处理两次
+            raise ValueError(f"观察者 {observer.__class__.__name__} 已经注册过了")
+        print(f"观察者 {observer.__class__.__name__} 已注册。")
+        self._observers.append(observer)
+        if self.mode == "async":
+            self._workers[observer] = _ObserverWorker(
+                observer, maxsize or self.maxsize, overflow or self.overflow)
+
+    def detach(self, observer: Observer):
+        print(f"观察者 {observer.__class__.__name__} 已移除。")
+        self._observers = [existing for existing in self._observers if existing is not observer]
+        worker = self._workers.pop(observer, None)
+        if worker is not None:
+            worker.flush()
+            worker.close()
+
+    def notify(self):
+        if self.mode == "sync":
+            for observer in self._observers:
+                observer.update(self)
+            return
+        snapshot = _Snapshot(self, self._status)
+        for observer in self._observers:
+            self._workers[observer].put(snapshot)
+
+    def observer_stats(self):
+        """
+        每个观察者的积压（lag）、丢弃数、出错数和最大延迟，以观察者对象为键：
+        同一个类的两个观察者各有各的统计，不会互相覆盖。
+        """
+        result = {}
+        for observer, worker in self._workers.items():
+            with worker._cond:
+                stats = dict(worker.stats)
+            result[observer] = {"lag": worker.lag(), **stats}
+        return result
+
+    def flush(self, timeout=None):
+        """等待所有已经发出的通知都被处理完，返回是否在 timeout 秒内完成。"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for worker in self._workers.values():
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if not worker.flush(remaining):
+                return False
+        return True
+
+    def close(self):
+        """训练结束时调用：先处理完积压的通知，再停止所有工作线程。"""
+        self.flush()
+        for worker in self._workers.values():
+            worker.close()
+        # 保留已经关闭的工作线程：之后的 notify 会抛出 RuntimeError，而不是悄悄地丢掉通知
+
+    def run_training_step(self, epoch):
+        time.sleep(0.002)  # 模拟一个训练步骤
+        acc = random.uniform(0.5, 0.95)
+        self.status = {"epoch": epoch, "accuracy": acc}
+
+# 具体观察者1：日志记录器
+class Logger(Observer):
+    def __init__(self):
+        self.lines = []
+
+    def update(self, subject: Subject):
+        if subject.status:
+            self.lines.append(f"Epoch {subject.status['epoch']} 的准确率为 {subject.status['accuracy']:.2f}")
+
+# 具体观察者2：检查点写入器，每次要花 20 毫秒把模型写到磁盘
+class CheckpointWriter(Observer):
+    def __init__(self):
+        self.saved = []
+
+    def update(self, subject: Subject):
+        time.sleep(0.02)
+        self.saved.append(subject.status["epoch"])
+
+# 具体观察者3：进度条，只关心最新的状态
+class ProgressBar(Observer):
+    def __init__(self):
+        self.last_epoch = None
+
+    def update(self, subject: Subject):
+        time.sleep(0.005)
+        self.last_epoch = subject.status["epoch"]
+
+
+def train(monitor, epochs):
+    start = time.perf_counter()
+    for i in range(epochs):
+        monitor.run_training_step(i)
+    return time.perf_counter() - start
+
+
+# 客户端代码
+epochs = 100
+
+print("--- 同步通知 ---")
+monitor = TrainingMonitor(mode="sync")
+monitor.attach(Logger())
+monitor.attach(CheckpointWriter())
+monitor.attach(ProgressBar())
+print(f"训练循环耗时: {train(monitor, epochs):.3f} 秒（每个 epoch 都要等所有观察者执行完）")
+
+print("\n--- 异步通知 ---")
+monitor = TrainingMonitor(mode="async", maxsize=16)
+logger, writer, progress = Logger(), CheckpointWriter(), ProgressBar()
+monitor.attach(logger)                                  # 默认 block：一条都不丢
+monitor.attach(writer, overflow="drop_oldest")          # 写不过来时只保留最近的 16 个检查点
+monitor.attach(progress, overflow="latest")             # 只显示最新的进度
+monitor.attach(Logger(), maxsize=4, overflow="latest")  # 同一个类的第二个观察者，统计单独计算
+try:
+    monitor.attach(logger)
+except ValueError as e:
+    print(f"重复注册: ValueError: {e}")
+print(f"训练循环耗时: {train(monitor, epochs):.3f} 秒")
+for observer, stats in monitor.observer_stats().items():
+    print(f"  {observer.__class__.__name__}: 积压 {stats['lag']}，已处理 {stats['delivered']}，丢弃 {stats['dropped']}，出错 {stats['errors']}")
+
+start = time.perf_counter()
+monitor.close()
+print(f"close() 等待积压处理完: {time.perf_counter() - start:.3f} 秒")
+try:
+    monitor.status = {"epoch": epochs, "accuracy": 0.9}
+except RuntimeError as e:
+    print(f"close() 之后再发通知: RuntimeError: {e}")
+print(f"Logger 记录了 {len(logger.lines)} 条，CheckpointWriter 保存了 {len(writer.saved)} 个检查点"
+      f"（最后一个是 epoch {writer.saved[-1]}），ProgressBar 停在 epoch {progress.last_epoch}")
@@ -0,0 +1,286 @@
+import time
+import random
+from abc import ABC, abstractmethod
+
+# 抽象观察者
+class Observer(ABC):
+    @abstractmethod
+    def update(self, subject):
+        """当主题状态改变时，此方法会被调用。"""
+        pass
+
+    def update_batch(self, subject, batch):
+        """使用批量投递策略时调用，batch 是按顺序缓存的状态字典列表。默认逐条交给 update。"""
+        for status in batch:
+            self.update(_FixedStatus(status))
+
+# 抽象主题
+class Subject(ABC):
+    @abstractmethod
+    def attach(self, observer: Observer):
+        """注册一个观察者。"""
+        pass
+
+    @abstractmethod
+    def detach(self, observer: Observer):
+        """移除一个观察者。"""
+        pass
+
+    @abstractmethod
+    def notify(self):
+        """通知所有观察者。"""
+        pass
+
+
+class _FixedStatus:
+    """把一条缓存的状态包装成只读的“主题”，供不支持批量的观察者逐条处理。"""
+    __slots__ = ("status",)
+
+    def __init__(self, status):
+        self.status = status
+
+# ---
+# 投递策略：决定一次状态更新要不要、以什么形式交给观察者
+
+class DeliveryPolicy(ABC):
+    """
+    batch=False 时，到期的那一次更新照常调用 observer.update(subject)，中间的更新被跳过；
+    batch=True  时，每一次更新都会被缓存，到期时把缓存的状态一次性交给 observer.update_batch。
+    max_batch  : 批量模式下缓存的上限。谓词可能很久都不为真，缓存攒到这么多条时不等到期，直接投递一批。
+    trailing   : 非批量模式下是否记住最后一次被跳过的更新，在 drain（训练结束或移除观察者）时补发，
+                 观察者最后看到的总是最新的状态。
+    """
+    trailing = False
+
+    def __init__(self, batch=False, max_batch=10_000):
+        if max_batch < 1:
+            raise ValueError(f"max_batch 必须是正整数: {max_batch}")
+        self.batch = batch
+        self.max_batch = max_batch
+        self._buffer = []
+        self._pending = None  # 非批量模式下最后一次被跳过、还没有投递的更新
+
+    @abstractmethod
+    def _due(self, status):
+        """抽象方法：这一次更新之后是否应该投递。"""
+        pass
+
+    def offer(self, status):
+        """返回 None 表示这次不投递；否则返回要投递的内容（批量模式下是一个列表）。"""
+        due = self._due(status)
+        if self.batch:
+            self._buffer.append(status)
+            if not due and len(self._buffer) < self.max_batch:
+                return None
+            batch, self._buffer = self._buffer, []
+            return batch
+        if due:
+            self._pending = None
+            return status
+        if self.trailing:
+            self._pending = status
+        return None
+
+    def drain(self):
+        """
+        取出还没有投递的内容，训练结束时调用。
+        批量模式下返回缓存的列表（可能为空）；非批量模式下返回最后一次被跳过的更新，没有时返回 None。
+        """
+        if self.batch:
+            batch, self._buffer = self._buffer, []
+            return batch
+        pending, self._pending = self._pending, None
+        return pending
+
+
+class EveryN(DeliveryPolicy):
+    """每 n 次更新投递一次。"""
+    def __init__(self, n, batch=False, max_batch=10_000):
+        super().__init__(batch, max_batch)
+        self.n = n
+        self._count = 0
+
+    def _due(self, status):
+        self._count += 1
+        if self._count < self.n:
+            return False
+        self._count = 0
+        return True
+
+
+class Throttle(DeliveryPolicy):
+    """
+    每 interval_ms 毫秒最多投递一次。非批量模式默认带 trailing：
+    限频窗口里被跳过的最后一次更新会在 drain 时补发，不会因为训练恰好在窗口中间结束而丢掉最终状态。
+    """
+    def __init__(self, interval_ms, batch=False, max_batch=10_000, trailing=True):
+        super().__init__(batch, max_batch)
+        self.trailing = trailing
+        self.interval = interval_ms / 1000
+        self._last = float("-inf")
+
+    def _due(self, status):
+        now = time.monotonic()
+        if now - self._last < self.interval:
+            return False
+        self._last = now
+        return True
+
+
+class When(DeliveryPolicy):
+    """只在 predicate(status) 为真时投递，例如准确率超过阈值。"""
+    def __init__(self, predicate, batch=False, max_batch=10_000):
+        super().__init__(batch, max_batch)
+        self.predicate = predicate
+
+    def _due(self, status):
+        return self.predicate(status)
+
+# ---
+
+# 具体主题：训练监控器
+class TrainingMonitor(Subject):
+    def __init__(self):
+        # 每个元素是 (观察者, 投递策略)，策略为 None 表示每次更新都通知
+        self._subscriptions = []
+        self._status = None  # 训练状态
+        self.invocations = 0
+
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        self._status = value
+        # 状态改变时，通知所有观察者
+        self.notify()
+
+    def attach(self, observer: Observer, policy: DeliveryPolicy = None):
+        print(f"观察者 {observer.__class__.__name__} 已注册。")
+        self._subscriptions.append((observer, policy))
+
+    def detach(self, observer: Observer):
+        print(f"观察者 {observer.__class__.__name__} 已移除。")
+        for subscription in self._subscriptions:
+            if subscription[0] is observer:
+                self._deliver_remaining(*subscription)
+                self._subscriptions.remove(subscription)
+                return
+        raise ValueError(f"观察者 {observer.__class__.__name__} 没有注册")
+
+    def notify(self):
+        status = self._status
+        for observer, policy in self._subscriptions:
+            if policy is None:
+                observer.update(self)
+                self.invocations += 1
+                continue
+            payload = policy.offer(status)
+            if payload is None:
+                continue
+            if policy.batch:
+                observer.update_batch(self, payload)
+            else:
+                observer.update(self)
+            self.invocations += 1
+
+    def _deliver_remaining(self, observer, policy):
+        if policy is None:
+            return
+        remaining = policy.drain()
+        if policy.batch:
+            if remaining:
+                observer.update_batch(self, remaining)
+                self.invocations += 1
+        elif remaining is not None:
+            # 补发的是被跳过的那一次更新本身，而不是主题当前的状态
+            observer.update(_FixedStatus(remaining))
+            self.invocations += 1
+
+    def flush(self):
+        """把所有策略中还没有投递的状态（批量缓存、trailing 更新）交给观察者，训练结束时调用。"""
+        for observer, policy in self._subscriptions:
+            self._deliver_remaining(observer, policy)
+
+    def run_training_step(self, step):
+        acc = min(0.99, 0.5 + step / 400_000 + random.uniform(-0.02, 0.02))
+        self.status = {"step": step, "accuracy": acc, "loss": 1 - acc}
+
+# 具体观察者1：日志记录器
+class Logger(Observer):
+    def __init__(self):
+        self.calls = 0
+
+    def update(self, subject: Subject):
+        self.calls += 1
+        self.last_line = f"Step {subject.status['step']} 的准确率为 {subject.status['accuracy']:.4f}"
+
+# 具体观察者2：指标写入器，一次写入一批数据比逐条写入便宜得多
+class MetricWriter(Observer):
+    def __init__(self):
+        self.calls = 0
+        self.rows = 0
+
+    def update(self, subject: Subject):
+        self.update_batch(subject, [subject.status])
+
+    def update_batch(self, subject, batch):
+        self.calls += 1
+        self.rows += len(batch)
+
+# 具体观察者3：检查点保存器，只在准确率足够高时保存
+class Checkpointer(Observer):
+    def __init__(self):
+        self.calls = 0
+        self.best = 0.0
+
+    def update(self, subject: Subject):
+        self.calls += 1
+        self.best = max(self.best, subject.status["accuracy"])
+
+
+def train(monitor, steps):
+    start = time.perf_counter()
+    for step in range(steps):
+        monitor.run_training_step(step)
+    monitor.flush()
+    return time.perf_counter() - start
+
+
+# 客户端代码
+steps = 200_000
+
+print("--- 每次更新都通知所有观察者 ---")
+monitor = TrainingMonitor()
+monitor.attach(Logger())
+monitor.attach(MetricWriter())
+monitor.attach(Checkpointer())
+cost = train(monitor, steps)
+print(f"{steps} 步，观察者被调用 {monitor.invocations} 次，耗时 {cost:.3f} 秒")
+
+print("\n--- 按投递策略通知 ---")
+# 谓词可以带状态：准确率超过 0.9 并且刷新了最佳值时才保存检查点
+best = {"accuracy": 0.9}
+def improved(status):
+    if status["accuracy"] <= best["accuracy"]:
+        return False
+    best["accuracy"] = status["accuracy"]
+    return True
+
+monitor = TrainingMonitor()
+logger, writer, checkpointer = Logger(), MetricWriter(), Checkpointer()
+monitor.attach(logger, EveryN(10_000))                              # 每 1 万步打印一次
+monitor.attach(writer, Throttle(50, batch=True))                    # 最多每 50 毫秒写一批
+monitor.attach(checkpointer, When(improved))
+throttled_logger = Logger()
+monitor.attach(throttled_logger, Throttle(50))                      # 最多每 50 毫秒打印一次，结束时补发最后一步
+rare_writer = MetricWriter()
+monitor.attach(rare_writer, When(lambda status: False, batch=True, max_batch=5_000))  # 谓词一直不为真
+cost = train(monitor, steps)
+print(f"{steps} 步，观察者被调用 {monitor.invocations} 次，耗时 {cost:.3f} 秒")
+print(f"Logger: {logger.calls} 次，最后一条: {logger.last_line}")
+print(f"MetricWriter: {writer.calls} 次，共写入 {writer.rows} 行（一行都没有丢）")
+print(f"Checkpointer: {checkpointer.calls} 次，最佳准确率 {checkpointer.best:.4f}")
+print(f"限频的 Logger: {throttled_logger.calls} 次，最后一条: {throttled_logger.last_line}")
+print(f"谓词从不为真的 MetricWriter: {rare_writer.calls} 次，共写入 {rare_writer.rows} 行（缓存最多 5000 条）")
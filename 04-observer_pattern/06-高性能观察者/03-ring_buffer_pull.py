@@ -0,0 +1,279 @@
+import os
+import math
+import time
+import random
+import tracemalloc
+import contextlib
+from abc import ABC, abstractmethod
+from collections import deque
+
+import numpy as np
+
+# 抽象观察者
+class Observer(ABC):
+    @abstractmethod
+    def update(self, subject):
+        """当主题状态改变时，此方法会被调用。"""
+        pass
+
+# 抽象主题
+class Subject(ABC):
+    @abstractmethod
+    def attach(self, observer: Observer):
+        """注册一个观察者。"""
+        pass
+
+    @abstractmethod
+    def detach(self, observer: Observer):
+        """移除一个观察者。"""
+        pass
+
+    @abstractmethod
+    def notify(self):
+        """通知所有观察者。"""
+        pass
+
+# ---
+
+class _Rolling:
+    """
+    一个指标最近 window 个值的滚动统计。
+    总和随追加增量更新；最小值和最大值用单调队列维护，队首就是答案，每次追加均摊 O(1)。
+    """
+    __slots__ = ("values", "total", "mins", "maxs")
+
+    def __init__(self, window):
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        # 单调队列中的元素是 (行号, 值)
+        self.mins = deque()
+        self.maxs = deque()
+
+    def push(self, row, value):
+        values = self.values
+        if len(values) == values.maxlen:
+            self.total -= values[0]
+        values.append(value)
+        self.total += value
+        leaving = row - values.maxlen  # 这一行之前、已经离开窗口的最后一行
+        mins, maxs = self.mins, self.maxs
+        while mins and mins[-1][1] >= value:
+            mins.pop()
+        mins.append((row, value))
+        if mins[0][0] <= leaving:
+            mins.popleft()
+        while maxs and maxs[-1][1] <= value:
+            maxs.pop()
+        maxs.append((row, value))
+        if maxs[0][0] <= leaving:
+            maxs.popleft()
+        if row % values.maxlen == 0:
+            # 加减法会累积浮点误差，每隔 window 行重新精确求一次和，均摊下来仍然是 O(1)
+            self.total = math.fsum(values)
+
+
+class MetricHistory:
+    """
+    固定容量的列式环形缓冲区：每个指标一个 NumPy 数组，只保留最近 capacity 个值。
+    每个数组的长度是 2 * capacity，每个值同时写在 i 和 i + capacity 两个位置，
+    这样最近的任意 n 个值在内存中总是连续的，取窗口时可以直接返回视图，不需要复制。
+    同时增量维护最近 window 个值的滚动均值、最小值和最大值。
+    """
+    def __init__(self, keys, capacity=1024, window=10):
+        if not 0 < window <= capacity:
+            raise ValueError(f"window 必须在 1 到 capacity ({capacity}) 之间: {window}")
+        self.keys = tuple(keys)
+        self.capacity = capacity
+        self.window = window
+        self.count = 0  # 一共追加过多少行
+        self._columns = [np.full(2 * capacity, np.nan) for _ in self.keys]
+        self._rolling = [_Rolling(window) for _ in self.keys]
+        self._index = {key: i for i, key in enumerate(self.keys)}
+
+    def append(self, *values):
+        """按 keys 的顺序追加一行，O(1)；不需要为每一行创建字典。"""
+        if len(values) != len(self.keys):
+            # zip 会悄悄截断，少传或多传一个值都会让各列错位
+            raise ValueError(f"需要 {len(self.keys)} 个值 {self.keys}，实际传入了 {len(values)} 个")
+        row = self.count
+        slot = row % self.capacity
+        mirror = slot + self.capacity
+        for column, rolling, value in zip(self._columns, self._rolling, values):
+            column[slot] = column[mirror] = value
+            rolling.push(row, value)
+        self.count = row + 1
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def get_window(self, key, n=None):
+        """最近 n 个值（从旧到新）的只读视图，不复制数据。"""
+        n = len(self) if n is None else min(n, len(self))
+        end = self.count % self.capacity + self.capacity
+        view = self._columns[self._index[key]][end - n:end]
+        view.flags.writeable = False
+        return view
+
+    def latest(self, key):
+        rolling = self._rolling[self._index[key]]
+        return rolling.values[-1] if rolling.values else None
+
+    def rolling(self, key):
+        """最近 window 个值的 (均值, 最小值, 最大值)，O(1)。"""
+        rolling = self._rolling[self._index[key]]
+        if not rolling.values:
+            return None
+        return rolling.total / len(rolling.values), rolling.mins[0][1], rolling.maxs[0][1]
+
+
+# 具体主题：训练监控器 (拉取模式)
+class TrainingMonitor(Subject):
+    def __init__(self, keys=("epoch", "loss", "accuracy", "val_loss", "val_accuracy"), capacity=1024, window=10):
+        self._observers = []
+        self.history = MetricHistory(keys, capacity, window)
+
+    def get_latest_metrics(self):
+        """兼容原来的接口：只在被调用时才组装一个字典。"""
+        if not self.history.count:
+            return None
+        return {key: self.history.latest(key) for key in self.history.keys}
+
+    def get_window(self, key, n=None):
+        return self.history.get_window(key, n)
+
+    def rolling(self, key):
+        return self.history.rolling(key)
+
+    def attach(self, observer: Observer):
+        print(f"观察者 {observer.__class__.__name__} 已注册。")
+        self._observers.append(observer)
+
+    def detach(self, observer: Observer):
+        print(f"观察者 {observer.__class__.__name__} 已移除。")
+        self._observers.remove(observer)
+
+    def notify(self):
+        # 只通知状态改变，不推送具体数据
+        for observer in self._observers:
+            observer.update(self)
+
+    def run_training_step(self, epoch):
+        # 模拟生成一些训练指标：损失逐渐下降，之后进入平台期
+        loss = 0.1 + 0.4 / (1 + epoch / 500) + random.uniform(-0.02, 0.02)
+        val_loss = loss + 0.05 + random.uniform(-0.02, 0.02)
+        self.history.append(epoch, loss, 1 - loss, val_loss, 1 - val_loss)
+        # 指标更新后，通知所有观察者
+        self.notify()
+
+# 具体观察者1：日志记录器，每 5000 个 epoch 打印一次滚动统计
+class Logger(Observer):
+    def update(self, subject: Subject):
+        epoch = int(subject.history.latest("epoch"))
+        if epoch % 5000 == 0:
+            mean, low, high = subject.rolling("val_loss")
+            print(f"Logger 拉取数据: Epoch {epoch}，最近 {subject.history.window} 个 epoch 的验证损失 "
+                  f"均值 {mean:.4f}，范围 [{low:.4f}, {high:.4f}]")
+
+# 具体观察者2：早停器，不再自己保存历史，直接拉取监控器中的滚动均值
+class EarlyStopper(Observer):
+    def __init__(self, patience=2000, min_delta=1e-3):
+        self.patience = patience
+        self.min_delta = min_delta
+        self.best = float("inf")
+        self.waited = 0
+        self.stop = False
+
+    def update(self, subject: Subject):
+        # 单个 epoch 的验证损失噪声很大，用滚动均值判断是否还在改善
+        mean = subject.rolling("val_loss")[0]
+        if mean < self.best - self.min_delta:
+            self.best, self.waited = mean, 0
+        else:
+            self.waited += 1
+            self.stop = self.waited >= self.patience
+
+
+# ---
+# 对照组：原来的写法，每个 epoch 一个新字典，需要趋势的观察者各自复制一份历史
+
+class DictMonitor(TrainingMonitor):
+    def __init__(self):
+        super().__init__()
+        self._metrics = None
+
+    def get_latest_metrics(self):
+        return self._metrics
+
+    def run_training_step(self, epoch):
+        loss = 0.1 + 0.4 / (1 + epoch / 500) + random.uniform(-0.02, 0.02)
+        val_loss = loss + 0.05 + random.uniform(-0.02, 0.02)
+        self._metrics = {"epoch": epoch, "loss": loss, "accuracy": 1 - loss,
+                         "val_loss": val_loss, "val_accuracy": 1 - val_loss}
+        self.notify()
+
+class CopyingObserver(Observer):
+    """自己保存验证损失的完整历史，每次都对最近 100 个值切片再求统计量。"""
+    def __init__(self):
+        self.val_losses = []
+
+    def update(self, subject: Subject):
+        self.val_losses.append(subject.get_latest_metrics()["val_loss"])
+        recent = self.val_losses[-100:]
+        self.stats = (sum(recent) / len(recent), min(recent), max(recent))
+
+
+def run(build, epochs):
+    """
+    返回 (耗时, 内存峰值, 计时那一遍的监控器)。tracemalloc 会拖慢内存分配，所以计时和测内存分两遍跑。
+    每一遍都用 build() 新建监控器和观察者，两遍之间不共享任何状态；
+    测内存的那一遍先启动 tracemalloc 再构建，预先分配的缓冲区也计入峰值，输出丢弃不再重复打印。
+    """
+    monitor = build()
+    start = time.perf_counter()
+    for i in range(epochs):
+        monitor.run_training_step(i)
+    cost = time.perf_counter() - start
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        tracemalloc.start()
+        measured = build()
+        for i in range(epochs):
+            measured.run_training_step(i)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return cost, peak, monitor
+
+
+def build_baseline():
+    monitor = DictMonitor()
+    for _ in range(2):
+        monitor.attach(CopyingObserver())
+    return monitor
+
+
+def build_ring_buffer():
+    monitor = TrainingMonitor(capacity=4096, window=100)
+    monitor.attach(Logger())
+    monitor.attach(EarlyStopper())
+    return monitor
+
+
+# 客户端代码
+epochs = 50_000
+
+cost, peak, _ = run(build_baseline, epochs)
+print(f"原来的写法（每个 epoch 一个字典，两个观察者各自保存历史）: {cost:.3f} 秒，内存峰值 {peak / 1e6:.2f} MB")
+
+print("---")
+cost, peak, monitor = run(build_ring_buffer, epochs)
+stopper = monitor._observers[1]
+print(f"环形缓冲区: {cost:.3f} 秒，内存峰值 {peak / 1e6:.2f} MB"
+      f"（包括预先分配的缓冲区，只保留最近 {monitor.history.capacity} 个 epoch）")
+print(f"EarlyStopper 是否判断已进入平台期: {stopper.stop}")
+
+print("---")
+window = monitor.get_window("val_loss", 5)
+print(f"最近 5 个验证损失（视图，与缓冲区共享内存: {np.shares_memory(window, monitor.get_window('val_loss'))}）: "
+      f"{np.round(window, 4)}")
+print(f"滚动统计与直接计算一致: "
+      f"{np.allclose(monitor.rolling('val_loss'), [f(monitor.get_window('val_loss', 100)) for f in (np.mean, np.min, np.max)])}")
+print(f"兼容接口 get_latest_metrics(): {monitor.get_latest_metrics()}")
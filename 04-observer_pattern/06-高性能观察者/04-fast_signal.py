@@ -0,0 +1,144 @@
+import gc
+import time
+
+import fast_signal
+from fast_signal import signal
+
+try:
+    import blinker
+except ImportError:  # 没有安装 blinker 时只运行 fast_signal 的部分
+    blinker = None
+
+# 客户端代码：用法与 blinker 相同
+training_update = signal('training-update')
+
+def log_training_status(sender, **kw):
+    print(f"Log: 训练状态已更新。最新准确率: {kw['accuracy']:.2f}")
+
+training_update.connect(log_training_status)
+training_update.send('TrainingMonitor', accuracy=0.95)
+
+print("---")
+# 按发送者过滤：这个槽只接收 worker-3 发出的信号，其他 worker 的 send 根本不会经过它
+@training_update.connect_via('worker-3')
+def watch_worker_3(sender, **kw):
+    print(f"只关注 {sender}: 准确率 {kw['accuracy']:.2f}")
+
+training_update.send('worker-1', accuracy=0.80)
+training_update.send('worker-3', accuracy=0.85)
+training_update.disconnect(log_training_status)
+training_update.disconnect(watch_worker_3, sender='worker-3')
+
+print("---")
+# 弱引用：接收者被回收后自动断开，不会让监听者对象一直活着
+class Dashboard:
+    def on_update(self, sender, **kw):
+        print(f"Dashboard 收到 {sender} 的更新")
+
+dashboard = Dashboard()
+training_update.connect(dashboard.on_update, weak=True)
+training_update.send('TrainingMonitor', accuracy=0.9)
+print(f"回收前: {training_update}")
+del dashboard
+gc.collect()
+print(f"回收后: {training_update}")
+
+print("---")
+# 批量发送：一次交给接收者 1000 条消息
+received = []
+batch_signal = signal('metric-batch')
+# 和 blinker 一样默认是弱引用，临时创建的 lambda 需要 weak=False，否则连接后马上就会被回收
+batch_signal.connect(lambda sender, **kw: received.append(kw['step']), weak=False)
+batch_signal.send_many('TrainingMonitor', [{"step": i, "accuracy": 0.5} for i in range(1000)])
+print(f"send_many 发送了 {len(received)} 条消息，接收顺序与逐条 send 相同: {received == list(range(1000))}")
+
+print("---")
+# 按身份区分的发送者：发送者被回收后，它的连接也会被删除，新对象即使复用了同一个 id 也不会收到旧的信号
+class Worker:
+    pass
+
+worker = Worker()
+training_update.connect(log_training_status, sender=worker)
+print(f"send 的返回值中是接收者本身: {training_update.send(worker, accuracy=0.7)[0][0] is log_training_status}")
+del worker
+gc.collect()
+print(f"发送者被回收后: {training_update}")
+
+print("---")
+# 同一个接收者同时连接到 ANY 和某个发送者时，和 blinker 一样只调用一次
+calls = []
+counted = lambda sender, **kw: calls.append(sender)
+training_update.connect(counted, weak=False)
+training_update.connect(counted, sender='worker-5', weak=False)
+training_update.send('worker-5', accuracy=0.8)
+print(f"同时连接到 ANY 和 'worker-5' 的接收者被调用了 {len(calls)} 次")
+training_update.disconnect(counted)
+training_update.disconnect(counted, sender='worker-5')
+
+
+# ---
+# 基准测试：与 blinker 比较 send 的开销
+
+def best_of(func, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def make_receivers(count):
+    # 每个接收者都是一个不同的函数对象，blinker 和 fast_signal 都按身份区分接收者
+    return [lambda sender, **kw: None for _ in range(count)]
+
+
+def bench(module, sends=200_000):
+    results = {}
+
+    # 场景 1：三个接收者，全部不限发送者
+    sig = module.Signal()
+    receivers = make_receivers(3)
+    for receiver in receivers:
+        sig.connect(receiver, weak=False)
+    send = sig.send
+
+    def send_all():
+        for _ in range(sends):
+            send('TrainingMonitor', accuracy=0.9)
+    results["3 个接收者"] = best_of(send_all)
+
+    # 场景 2：100 个 worker，每个 worker 有一个专属的接收者，外加一个不限发送者的接收者
+    sig = module.Signal()
+    receivers = make_receivers(101)
+    sig.connect(receivers[0], weak=False)
+    workers = [f"worker-{i}" for i in range(100)]
+    for worker, receiver in zip(workers, receivers[1:]):
+        sig.connect(receiver, sender=worker, weak=False)
+    send = sig.send
+
+    def send_filtered():
+        for i in range(sends):
+            send(workers[i % 100], accuracy=0.9)
+    results["按发送者过滤 (100 个 worker)"] = best_of(send_filtered)
+
+    # 场景 3：同样的消息量，逐条 send 与一次 send_many
+    if hasattr(sig, "send_many"):
+        sig = module.Signal()
+        for receiver in make_receivers(3):
+            sig.connect(receiver, weak=False)
+        batch = [{"accuracy": 0.9}] * sends
+        results["send_many"] = best_of(lambda: sig.send_many('TrainingMonitor', batch))
+    return results
+
+
+print("\n--- 基准测试：20 万次 send ---")
+fast = bench(fast_signal)
+slow = bench(blinker) if blinker is not None else {}
+for name, cost in fast.items():
+    line = f"{name:<30} fast_signal {cost:.4f} 秒"
+    if name in slow:
+        line += f"，blinker {slow[name]:.4f} 秒，快 {slow[name] / cost:.1f} 倍"
+    elif name == "send_many":
+        line += f"（逐条 send 为 {fast['3 个接收者']:.4f} 秒）"
+    print(line)
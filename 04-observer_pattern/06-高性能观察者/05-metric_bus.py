@@ -0,0 +1,322 @@
+import time
+import random
+import multiprocessing as mp
+from abc import ABC, abstractmethod
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 抽象观察者
+class Observer(ABC):
+    @abstractmethod
+    def update(self, subject):
+        """当主题状态改变时，此方法会被调用。"""
+        pass
+
+# 抽象主题
+class Subject(ABC):
+    @abstractmethod
+    def attach(self, observer: Observer):
+        """注册一个观察者。"""
+        pass
+
+    @abstractmethod
+    def detach(self, observer: Observer):
+        """移除一个观察者。"""
+        pass
+
+    @abstractmethod
+    def notify(self):
+        """通知所有观察者。"""
+        pass
+
+# 具体主题：训练监控器
+class TrainingMonitor(Subject):
+    def __init__(self):
+        # 存储所有注册的观察者
+        self._observers = []
+        self._status = None  # 训练状态
+
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        self._status = value
+        # 状态改变时，通知所有观察者
+        self.notify()
+
+    def attach(self, observer: Observer):
+        print(f"观察者 {observer.__class__.__name__} 已注册。")
+        self._observers.append(observer)
+
+    def detach(self, observer: Observer):
+        print(f"观察者 {observer.__class__.__name__} 已移除。")
+        self._observers.remove(observer)
+
+    def notify(self):
+        for observer in self._observers:
+            observer.update(self)
+
+# 具体观察者1：日志记录器
+class Logger(Observer):
+    def update(self, subject: Subject):
+        if subject.status:
+            print(f"Logger: Epoch {subject.status['epoch']} 的准确率为 {subject.status['accuracy']:.2f}"
+                  f"（{subject.status['workers']} 个 worker 的均值，最高 {subject.status['accuracy_max']:.2f}）")
+
+# 具体观察者2：早停器
+class EarlyStopper(Observer):
+    def update(self, subject: Subject):
+        if subject.status and subject.status['accuracy'] > 0.90:
+            print(f"EarlyStopper: 准确率 {subject.status['accuracy']:.2f} 已超过阈值，准备停止训练。")
+
+# ---
+# 共享内存指标总线：每个 worker 独占一个固定格式的槽位，用顺序锁 (seqlock) 保证读到的记录是完整的
+
+class MetricBus:
+    """
+    共享内存的布局：
+      seqs   : int64[n_workers]           每个槽位的序号，奇数表示正在写入
+      values : float64[n_workers, n_keys] 每个槽位最新的一条记录，列的顺序由 keys 决定
+    每个槽位只有一个写者（对应的 worker），所以写入不需要任何锁。
+    """
+    def __init__(self, keys, n_workers, name=None):
+        self.keys = tuple(keys)
+        self.n_workers = n_workers
+        size = n_workers * 8 * (1 + len(self.keys))
+        self._owner = name is None
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name)
+        self.seqs = np.ndarray((n_workers,), dtype=np.int64, buffer=self._shm.buf)
+        self.values = np.ndarray((n_workers, len(self.keys)), dtype=np.float64,
+                                 buffer=self._shm.buf, offset=n_workers * 8)
+        if self._owner:
+            self.seqs[:] = 0
+            self.values[:] = np.nan
+
+    @property
+    def spec(self):
+        """其他进程连接这条总线所需的全部信息，只在启动进程时传递一次。"""
+        return self.keys, self.n_workers, self._shm.name
+
+    @classmethod
+    def attach(cls, spec):
+        keys, n_workers, name = spec
+        return cls(keys, n_workers, name)
+
+    def close(self):
+        # 关闭共享内存之前，必须先释放所有引用它的数组视图；删除 (unlink) 由创建它的进程负责
+        del self.seqs, self.values
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class MetricPublisher:
+    """worker 端：把一条记录写进自己的槽位。热路径上只有几次内存写入，没有锁、套接字和 pickle。"""
+    def __init__(self, bus, worker_id):
+        self.bus = bus
+        self.worker_id = worker_id
+        self._row = bus.values[worker_id]
+        seq = int(bus.seqs[worker_id])
+        # 上一个 worker 可能在写入中途退出，留下一个奇数序号。直接沿用它会让奇偶性永远颠倒：
+        # 读者会接受写了一半的记录、反复重试完整的记录。所以先向上取整到偶数；
+        # 槽位在第一次 publish 完成之前仍然是奇数，写了一半的旧记录不会被读到
+        self._seq = seq + (seq & 1)
+
+    def publish(self, *values):
+        """按总线 keys 的顺序写入一条记录。"""
+        seqs, i = self.bus.seqs, self.worker_id
+        self._seq += 1
+        seqs[i] = self._seq  # 奇数：正在写入，读者会重试
+        self._row[:] = values
+        self._seq += 1
+        seqs[i] = self._seq  # 偶数：写入完成
+
+
+class MetricAggregator:
+    """
+    聚合端：拉取所有槽位的最新记录，跨 worker 归约（均值和最大值），
+    再作为状态交给一个普通的 TrainingMonitor，由它通知已有的观察者。
+    """
+    def __init__(self, bus, monitor, max_retries=100):
+        self.bus = bus
+        self.monitor = monitor
+        self.max_retries = max_retries
+        self._last_seqs = np.zeros(bus.n_workers, dtype=np.int64)
+        # 每个槽位最近一次读到的一致记录：重试次数用完时用它代替，绝不把写了一半的记录交出去
+        self._good_seqs = np.zeros(bus.n_workers, dtype=np.int64)
+        self._good_values = np.full((bus.n_workers, len(bus.keys)), np.nan)
+        # 上一次重试用完时槽位停在的奇数序号：序号一直没变，说明写者已经死在写入中途，不必每一轮都重试
+        self._stuck_seqs = np.full(bus.n_workers, -1, dtype=np.int64)
+        self.stale_workers = []  # 最近一次快照中，用旧记录代替的 worker
+        self.stats = {"polls": 0, "notifications": 0, "retries": 0, "stale_reads": 0}
+
+    def snapshot(self):
+        """
+        读取所有槽位的一致快照，返回 (序号数组, 记录数组)。
+        先读序号，再复制记录，再读一次序号：两次序号相同并且是偶数，说明复制期间没有发生写入。
+        """
+        bus = self.bus
+        seqs = bus.seqs.copy()
+        values = bus.values.copy()
+        torn = (seqs != bus.seqs) | (seqs % 2 == 1)
+        stale = []
+        for worker in np.flatnonzero(torn):
+            # 序号停在上一轮放弃时的奇数上，直接用旧记录，不再白白重试 max_retries 次
+            retries = 0 if int(bus.seqs[worker]) == self._stuck_seqs[worker] else self.max_retries
+            for _ in range(retries):
+                self.stats["retries"] += 1
+                before = int(bus.seqs[worker])
+                row = bus.values[worker].copy()
+                if before % 2 == 0 and before == int(bus.seqs[worker]):
+                    seqs[worker], values[worker] = before, row
+                    self._stuck_seqs[worker] = -1
+                    break
+            else:
+                # 写者太频繁或者已经死在写入中途，这一轮放弃这个槽位，
+                # 沿用上一次读到的一致记录（从没读到过时序号为 0，不参与归约），并把它标记为过期
+                self._stuck_seqs[worker] = int(bus.seqs[worker])
+                seqs[worker] = self._good_seqs[worker]
+                values[worker] = self._good_values[worker]
+                stale.append(int(worker))
+        self.stale_workers = stale
+        self.stats["stale_reads"] += len(stale)
+        self._good_seqs, self._good_values = seqs.copy(), values.copy()
+        return seqs, values
+
+    def poll(self):
+        """有新数据时归约并通知观察者，返回是否发出了通知。"""
+        self.stats["polls"] += 1
+        seqs, values = self.snapshot()
+        if np.array_equal(seqs, self._last_seqs):
+            return False
+        self._last_seqs = seqs
+        live = values[seqs > 0]  # 还没有发布过数据的 worker 不参与归约
+        # stale_workers：这一次用旧记录代替的 worker（例如死在写入中途），观察者可以据此报警
+        status = {"workers": len(live), "stale_workers": list(self.stale_workers)}
+        for key, mean, high in zip(self.bus.keys, live.mean(axis=0), live.max(axis=0)):
+            status[key] = float(mean)
+            status[f"{key}_max"] = float(high)
+        # 所有 worker 都已经完成的 epoch
+        status["epoch"] = int(live[:, self.bus.keys.index("epoch")].min())
+        self.stats["notifications"] += 1
+        self.monitor.status = status
+        return True
+
+    def run(self, stop_event, interval=0.1):
+        while not stop_event.is_set():
+            self.poll()
+            time.sleep(interval)
+        self.poll()  # 停止之前再拉取一次，保证最后的记录被处理
+
+
+# ---
+# 在子进程中执行的函数
+
+def train_worker(spec, worker_id, epochs):
+    bus = MetricBus.attach(spec)
+    publisher = MetricPublisher(bus, worker_id)
+    rng = random.Random(worker_id)
+    for epoch in range(epochs):
+        time.sleep(0.02)  # 模拟一个训练步骤
+        acc = min(0.99, 0.5 + epoch / epochs * 0.45 + rng.uniform(-0.03, 0.03))
+        publisher.publish(epoch, 1 - acc, acc)
+    del publisher
+    bus.close()
+
+
+def hammer(spec, stop_event):
+    """不停地写入 (i, i, i)：只要读到的记录三列不相等，就说明读到了写了一半的记录。"""
+    bus = MetricBus.attach(spec)
+    publisher = MetricPublisher(bus, 0)
+    i = 0
+    while not stop_event.is_set():
+        i += 1
+        publisher.publish(i, i, i)
+    del publisher
+    bus.close()
+
+
+def run_aggregator(spec, stop_event):
+    bus = MetricBus.attach(spec)
+    monitor = TrainingMonitor()
+    monitor.attach(Logger())
+    monitor.attach(EarlyStopper())
+    aggregator = MetricAggregator(bus, monitor)
+    aggregator.run(stop_event, interval=0.1)
+    print(f"聚合进程统计: {aggregator.stats}")
+    del aggregator
+    bus.close()
+
+
+# 客户端代码：使用多进程时必须放在 __main__ 保护中
+if __name__ == "__main__":
+    n_workers, epochs = 4, 50
+    bus = MetricBus(keys=("epoch", "loss", "accuracy"), n_workers=n_workers)
+
+    # 热路径的开销：一次发布只是几次共享内存写入
+    publisher = MetricPublisher(bus, 0)
+    count = 100_000
+    start = time.perf_counter()
+    for i in range(count):
+        publisher.publish(i, 0.5, 0.5)
+    print(f"单次 publish 耗时: {(time.perf_counter() - start) / count * 1e6:.2f} 微秒")
+    bus.seqs[0] = 0  # 清空基准测试写入的数据
+    bus.values[0] = np.nan
+    del publisher
+
+    # 顺序锁的正确性：一个进程疯狂写入，另一个进程反复读取快照
+    stop_event = mp.Event()
+    writer = mp.Process(target=hammer, args=(bus.spec, stop_event))
+    writer.start()
+    reader = MetricAggregator(bus, monitor=None)
+    torn = reads = 0
+    deadline = time.perf_counter() + 0.5
+    while time.perf_counter() < deadline:
+        seqs, values = reader.snapshot()
+        if seqs[0] > 0:
+            reads += 1
+            torn += not (values[0, 0] == values[0, 1] == values[0, 2])
+    stop_event.set()
+    writer.join()
+    print(f"并发读取 {reads} 次快照，读到不完整记录 {torn} 次，重试 {reader.stats['retries']} 次")
+    bus.seqs[0] = 0
+    bus.values[0] = np.nan
+
+    print("---")
+    # worker 死在写入中途：槽位的序号停在奇数上
+    publisher = MetricPublisher(bus, 1)
+    publisher.publish(3, 0.2, 0.8)
+    reader = MetricAggregator(bus, monitor=None)
+    reader.snapshot()  # 读到一条完整的记录
+    bus.seqs[1] += 1
+    bus.values[1] = (-1, -1, -1)  # 写了一半的垃圾数据
+    for _ in range(5):
+        seqs, values = reader.snapshot()
+    print(f"写者死在写入中途: 5 次快照只重试了 {reader.stats['retries']} 次，"
+          f"过期的 worker {reader.stale_workers}，沿用的旧记录 {values[1]}")
+    restarted = MetricPublisher(bus, 1)  # 重启的 worker 把序号向上取整到偶数
+    restarted.publish(4, 0.1, 0.9)
+    seqs, values = reader.snapshot()
+    print(f"重启后: 序号 {seqs[1]}（偶数），记录 {values[1]}，过期的 worker {reader.stale_workers}")
+    del publisher, restarted
+    bus.seqs[1] = 0
+    bus.values[1] = np.nan
+
+    print("---")
+    stop_event = mp.Event()
+    aggregator = mp.Process(target=run_aggregator, args=(bus.spec, stop_event))
+    aggregator.start()
+    workers = [mp.Process(target=train_worker, args=(bus.spec, i, epochs)) for i in range(n_workers)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stop_event.set()
+    aggregator.join()
+    bus.close()
@@ -0,0 +1,327 @@
+import os
+import json
+import time
+import queue
+import random
+import shutil
+import struct
+import tempfile
+import threading
+
+from blinker import signal
+
+FSYNC_POLICIES = ("record", "interval", "close")
+_STOP = object()
+
+
+class BatchedResultWriter:
+    """
+    一个在后台线程中写盘的槽。
+    槽函数本身只把结果放进队列就返回，后台线程把队列中的结果成批追加到日志文件，
+    并在出现更好的结果时，用“写临时文件 + 原子重命名”的方式更新最佳结果快照。
+
+    log_path      : 追加写入的日志文件。
+    snapshot_path : 最佳结果快照文件，None 表示不写快照。
+    format        : "jsonl" 每行一个 JSON；"binary" 每条记录是 (时间戳, 得分, 参数长度) 头 + UTF-8 编码的参数 JSON。
+    fsync         : "record" 每写一条记录就 fsync，刷新了最佳结果的记录会立即更新快照；
+                    "interval" 最多每 fsync_interval_ms 毫秒 fsync 一次；"close" 只在关闭时 fsync。
+                    后两种策略每批只更新一次快照（取这一批中最好的结果）。
+    统计只由后台线程修改，metrics() 读取的是它的一份拷贝。
+    """
+    _binary_header = struct.Struct("<ddI")
+
+    def __init__(self, log_path, snapshot_path=None, format="jsonl", fsync="interval",
+                 fsync_interval_ms=100, batch_size=256, maxsize=10_000):
+        if format not in ("jsonl", "binary"):
+            raise ValueError(f"未知的日志格式: {format}")
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"未知的 fsync 策略: {fsync}")
+        self.log_path = log_path
+        self.snapshot_path = snapshot_path
+        self.format = format
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval_ms / 1000
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize)
+        self._file = open(log_path, "ab")
+        self._best = None
+        self._last_fsync = time.monotonic()
+        self._unsynced = False  # 已经写入文件、但还没有 fsync 的数据
+        self._error = None      # 后台线程出错时记录下来，在 __call__ 和 close 中重新抛出
+        self._stats = {"records": 0, "batches": 0, "fsyncs": 0, "snapshots": 0,
+                       "max_queue_depth": 0, "latency_sum": 0.0, "max_latency": 0.0}
+        self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, sender, **kwargs):
+        """槽函数：只入队，不做任何 I/O。"""
+        self._raise_error()
+        self._queue.put((time.time(), time.perf_counter(), kwargs))
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise RuntimeError(f"后台写入线程已经出错: {self._error!r}") from self._error
+
+    def _run(self):
+        try:
+            self._loop()
+        except BaseException as e:
+            self._error = e
+            # 后台线程退出后不会再有人取队列，清空它，避免正在 put 的发送方永远阻塞
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+    def _loop(self):
+        while True:
+            timeout = None
+            if self._unsynced and self.fsync == "interval":
+                # 有还没 fsync 的数据时最多等到下一次 fsync 的时间点：即使之后没有新的结果，
+                # 这些数据也会在 fsync_interval_ms 之内落盘
+                timeout = max(0.0, self._last_fsync + self.fsync_interval - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._sync()
+                continue
+            batch = [item]
+            # 把队列中已经积压的结果一次取出来，合并成一次写入
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = batch[-1] is _STOP
+            if stop:
+                batch.pop()
+            # 队列深度在后台线程中统计：队列只在后台线程忙于写盘时变长，所以取出时看到的就是这段时间的峰值。
+            # 发送方各自 qsize() 再比较、赋值，多个线程之间会互相覆盖
+            depth = len(batch) + self._queue.qsize()
+            if depth > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = depth
+            if batch:
+                self._write_batch(batch)
+            if stop:
+                return
+
+    def _encode(self, timestamp, kwargs):
+        if self.format == "jsonl":
+            return (json.dumps({"time": timestamp, **kwargs}, ensure_ascii=False) + "\n").encode("utf-8")
+        params = json.dumps(kwargs["hyperparams"]).encode("utf-8")
+        return self._binary_header.pack(timestamp, kwargs["score"], len(params)) + params
+
+    def _write_batch(self, batch):
+        stats = self._stats
+        if self.fsync == "record":
+            # 每条记录落盘之后立即更新快照：快照不会落后于已经 fsync 的日志
+            for timestamp, _, kwargs in batch:
+                self._file.write(self._encode(timestamp, kwargs))
+                self._sync()
+                self._update_best(timestamp, kwargs)
+        else:
+            self._file.write(b"".join(self._encode(timestamp, kwargs) for timestamp, _, kwargs in batch))
+            if self.fsync == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval:
+                self._sync()
+            else:
+                self._file.flush()
+                self._unsynced = True
+            best = max(batch, key=lambda item: item[2]["score"])
+            self._update_best(best[0], best[2])
+        now = time.perf_counter()
+        for _, enqueued_at, _ in batch:
+            latency = now - enqueued_at
+            stats["latency_sum"] += latency
+            if latency > stats["max_latency"]:
+                stats["max_latency"] = latency
+        stats["records"] += len(batch)
+        stats["batches"] += 1
+
+    def _update_best(self, timestamp, kwargs):
+        if self._best is None or kwargs["score"] > self._best["score"]:
+            self._best = dict(kwargs, time=timestamp)
+            self._write_snapshot()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+        self._stats["fsyncs"] += 1
+
+    def _write_snapshot(self):
+        """
+        先写到同一目录下的临时文件并 fsync，再用 os.replace 原子地替换，读者永远看不到写了一半的文件。
+        重命名本身记录在目录里，最后还要 fsync 目录，否则断电后快照可能仍然是旧的。
+        """
+        if self.snapshot_path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".best_", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._best, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        _fsync_directory(directory)
+        self._stats["snapshots"] += 1
+
+    def metrics(self):
+        """当前的队列深度，以及从入队到写入文件的延迟统计。"""
+        stats = dict(self._stats)
+        latency_sum = stats.pop("latency_sum")
+        stats["queue_depth"] = self._queue.qsize()
+        stats["mean_latency"] = latency_sum / stats["records"] if stats["records"] else 0.0
+        return stats
+
+    def close(self):
+        """写完队列中剩余的结果，fsync 后关闭文件。后台线程出过错时，关闭文件后重新抛出这个错误。"""
+        if self._file.closed:
+            return
+        # 后台线程已经退出时队列不会再被取空，所以不能一直阻塞在 put 上
+        while self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+        self._thread.join()
+        try:
+            if self._error is None:
+                self._sync()
+        finally:
+            self._file.close()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _fsync_directory(path):
+    """fsync 目录本身，让目录中的重命名落盘。Windows 不能打开目录，也不需要这一步。"""
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def read_binary_log(path):
+    """
+    读取 binary 格式的日志，逐条产出 (时间戳, 得分, 参数)。
+    进程在写入途中崩溃时，文件末尾可能只有半条记录（头不完整、参数不够长或者不是合法的 JSON），
+    读到这样的尾巴时停止，前面完整的记录照常返回。
+    """
+    header = BatchedResultWriter._binary_header
+    with open(path, "rb") as f:
+        while True:
+            head = f.read(header.size)
+            if len(head) < header.size:
+                return
+            timestamp, score, length = header.unpack(head)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            try:
+                params = json.loads(payload)
+            except ValueError:
+                return
+            yield timestamp, score, params
+
+
+# ---
+
+# 对照组：原来设想的同步写法，在槽函数里直接写文件并 fsync
+def make_sync_slot(log_path):
+    def save_result_to_file(sender, **kwargs):
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(kwargs) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+    return save_result_to_file
+
+
+def run_hyperparameter_search(trials):
+    """模拟一个超参数搜索过程，得分整体上升，所以大部分试验都会刷新最佳结果并发出信号。"""
+    best_score = 0
+    start = time.perf_counter()
+    for i in range(trials):
+        score = 0.7 + 0.25 * i / trials + random.uniform(-0.002, 0.002)
+        params = {'learning_rate': round(0.01 + i * 1e-4, 6), 'batch_size': 32}
+        if score > best_score:
+            best_score = score
+            new_best_score.send('HyperparameterSearcher', score=best_score, hyperparams=params)
+    return time.perf_counter() - start
+
+
+# 客户端代码
+new_best_score = signal('new-best-score')
+workdir = tempfile.mkdtemp(prefix="best_results_")
+trials = 2000
+
+sync_slot = make_sync_slot(os.path.join(workdir, "sync.jsonl"))
+new_best_score.connect(sync_slot)
+print(f"同步写文件的槽: 搜索循环耗时 {run_hyperparameter_search(trials):.3f} 秒")
+new_best_score.disconnect(sync_slot)
+
+print("---")
+for fsync_policy in FSYNC_POLICIES:
+    log_path = os.path.join(workdir, f"results_{fsync_policy}.jsonl")
+    snapshot_path = os.path.join(workdir, "best_result.json")
+    with BatchedResultWriter(log_path, snapshot_path, fsync=fsync_policy) as writer:
+        new_best_score.connect(writer)
+        cost = run_hyperparameter_search(trials)
+        new_best_score.disconnect(writer)
+    m = writer.metrics()
+    print(f"后台写入 (fsync={fsync_policy!r}): 搜索循环耗时 {cost:.3f} 秒，写入 {m['records']} 条 / {m['batches']} 批，"
+          f"fsync {m['fsyncs']} 次，最大队列深度 {m['max_queue_depth']}，"
+          f"平均写入延迟 {m['mean_latency'] * 1000:.2f} 毫秒")
+
+with open(snapshot_path, encoding="utf-8") as f:
+    print(f"最佳结果快照: {json.load(f)}")
+
+print("---")
+binary_path = os.path.join(workdir, "results.bin")
+with BatchedResultWriter(binary_path, format="binary", fsync="close") as writer:
+    new_best_score.connect(writer)
+    run_hyperparameter_search(trials)
+    new_best_score.disconnect(writer)
+records = list(read_binary_log(binary_path))
+print(f"binary 日志: {os.path.getsize(binary_path)} 字节，{len(records)} 条，最后一条得分 {records[-1][1]:.4f}")
+# 模拟写到一半时崩溃：截掉最后几个字节，读取时停在最后一条完整的记录
+with open(binary_path, "r+b") as f:
+    f.truncate(os.path.getsize(binary_path) - 5)
+print(f"截掉末尾 5 个字节后读到 {len(list(read_binary_log(binary_path)))} 条（不完整的最后一条被跳过）")
+
+print("---")
+# interval 策略：之后没有新的结果时，最后一批数据也会在 fsync_interval_ms 之内落盘，而不是等到 close
+with BatchedResultWriter(os.path.join(workdir, "idle.jsonl"), fsync="interval", fsync_interval_ms=50) as writer:
+    writer('HyperparameterSearcher', score=0.9, hyperparams={'learning_rate': 0.01})
+    time.sleep(0.2)
+    print(f"只写入一条结果，空闲 0.2 秒后 fsync 次数: {writer.metrics()['fsyncs']}")
+
+# 后台线程出错（binary 格式缺少 hyperparams）时，错误会在下一次发送或 close 时抛出，而不是悄悄丢掉结果
+writer = BatchedResultWriter(os.path.join(workdir, "broken.bin"), format="binary", maxsize=1)
+writer('HyperparameterSearcher', score=0.9)
+try:
+    for _ in range(10):
+        writer('HyperparameterSearcher', score=0.9)
+        time.sleep(0.01)
+except RuntimeError as e:
+    print(f"发送时: {e}")
+try:
+    writer.close()
+except RuntimeError as e:
+    print(f"close 时: {e}")
+
+shutil.rmtree(workdir)
@@ -0,0 +1,186 @@
+"""
+一个轻量的信号槽实现，接口与 blinker 的常用部分保持一致：
+signal(name)、connect / connect_via / disconnect、send(sender, **kwargs)。
+
+与 blinker 的区别在于，send 的路径上不做任何查找和组装：
+每个发送者对应的接收者元组在连接关系变化时预先编译好，send 只需要一次字典查找。
+"""
+import inspect
+import weakref
+
+ANY = object()  # 连接到 ANY 的接收者会收到所有发送者发出的信号
+
+
+def _sender_key(obj):
+    """
+    字符串和整数按值区分，其他对象按身份区分（与 blinker 相同）。
+    对象的键是 (id,) 元组，不会和值恰好等于某个 id 的整数发送者冲突。
+    """
+    if isinstance(obj, (str, int)):
+        return obj
+    return (id(obj),)
+
+
+def _receiver_key(receiver):
+    # 每次访问 obj.method 都会得到一个新的绑定方法对象，所以要用 (函数, 实例) 来标识
+    if inspect.ismethod(receiver):
+        return id(receiver.__func__), id(receiver.__self__)
+    return id(receiver)
+
+
+class _WeakReceiver:
+    """弱引用的接收者：不阻止接收者被回收，被回收后自动断开连接。"""
+    __slots__ = ("ref", "__weakref__")
+
+    def __init__(self, receiver, on_dead):
+        if inspect.ismethod(receiver):
+            self.ref = weakref.WeakMethod(receiver, on_dead)
+        else:
+            self.ref = weakref.ref(receiver, on_dead)
+
+    def __call__(self, sender, **kwargs):
+        receiver = self.ref()
+        if receiver is not None:
+            return receiver(sender, **kwargs)
+
+
+class Signal:
+    def __init__(self, name=None):
+        self.name = name
+        # 发送者键 -> {接收者键: 可调用对象}；ANY 对应的是不限发送者的接收者
+        self._connections = {ANY: {}}
+        # 预先编译好的结果：发送者键 -> 接收者元组（已经包含了连接到 ANY 的接收者）
+        self._compiled = {}
+        self._any_receivers = ()
+        self._has_weak = False
+        # 按身份区分的发送者键 -> 发送者的弱引用（不支持弱引用时是发送者本身）
+        self._sender_refs = {}
+
+    def connect(self, receiver, sender=ANY, weak=True):
+        """
+        连接一个接收者；sender 不是 ANY 时，只接收这个发送者发出的信号。返回 receiver 本身。
+        与 blinker 相同，默认只持有接收者的弱引用。
+        """
+        sender_key = ANY if sender is ANY else _sender_key(sender)
+        receiver_key = _receiver_key(receiver)
+        if weak:
+            signal_ref = weakref.ref(self)
+
+            def on_dead(_, receiver_key=receiver_key, sender_key=sender_key):
+                signal = signal_ref()
+                if signal is not None:
+                    signal._remove(receiver_key, sender_key)
+
+            callable_ = _WeakReceiver(receiver, on_dead)
+        else:
+            callable_ = receiver
+        self._connections.setdefault(sender_key, {})[receiver_key] = callable_
+        if isinstance(sender_key, tuple):
+            self._track_sender(sender, sender_key)
+        self._compile()
+        return receiver
+
+    def _track_sender(self, sender, sender_key):
+        """
+        按身份区分的发送者被回收后，它的 id 可能被新对象复用。
+        和 blinker 一样持有发送者的弱引用，发送者被回收时由回调删除它的全部连接。
+        """
+        if sender_key in self._sender_refs:
+            return
+        signal_ref = weakref.ref(self)
+
+        def on_dead(_, sender_key=sender_key):
+            signal = signal_ref()
+            if signal is not None:
+                signal._drop_sender(sender_key)
+
+        try:
+            self._sender_refs[sender_key] = weakref.ref(sender, on_dead)
+        except TypeError:
+            # 不支持弱引用的对象：持有强引用，保证它的 id 在连接期间不会被其他对象复用
+            self._sender_refs[sender_key] = sender
+
+    def _drop_sender(self, sender_key):
+        self._sender_refs.pop(sender_key, None)
+        if self._connections.pop(sender_key, None) is not None:
+            self._compile()
+
+    def connect_via(self, sender, weak=False):
+        """装饰器形式的 connect：只接收指定发送者的信号。与 blinker 相同，默认持有强引用。"""
+        def decorator(receiver):
+            return self.connect(receiver, sender, weak)
+        return decorator
+
+    def disconnect(self, receiver, sender=ANY):
+        self._remove(_receiver_key(receiver), ANY if sender is ANY else _sender_key(sender))
+
+    def _remove(self, receiver_key, sender_key):
+        receivers = self._connections.get(sender_key)
+        if receivers is None or receivers.pop(receiver_key, None) is None:
+            return
+        if not receivers and sender_key is not ANY:
+            del self._connections[sender_key]
+            self._sender_refs.pop(sender_key, None)
+        self._compile()
+
+    def _compile(self):
+        """连接关系变化时才执行：为每个发送者预先算好完整的接收者元组。"""
+        any_receivers = tuple(self._connections[ANY].values())
+        self._has_weak = any(isinstance(receiver, _WeakReceiver)
+                             for receivers in self._connections.values() for receiver in receivers.values())
+        self._any_receivers = any_receivers
+        # 同一个接收者同时连接到 ANY 和某个发送者时只调用一次（与 blinker 相同），所以按接收者键合并，而不是直接拼接元组
+        any_connections = self._connections[ANY]
+        self._compiled = {sender_key: tuple({**any_connections, **receivers}.values())
+                          for sender_key, receivers in self._connections.items() if sender_key is not ANY}
+
+    @property
+    def receivers(self):
+        return sum(len(receivers) for receivers in self._connections.values())
+
+    def receivers_for(self, sender):
+        return self._compiled.get(_sender_key(sender), self._any_receivers)
+
+    def send(self, sender=None, **kwargs):
+        """调用所有相关的接收者，返回 [(接收者, 返回值), ...]，与 blinker 相同。"""
+        receivers = self._compiled.get(sender if sender.__class__ is str else _sender_key(sender),
+                                       self._any_receivers)
+        if not self._has_weak:
+            return [(receiver, receiver(sender, **kwargs)) for receiver in receivers]
+        results = []
+        for receiver in receivers:
+            if receiver.__class__ is _WeakReceiver:
+                # 返回值中给出接收者本身，而不是内部的弱引用包装
+                receiver = receiver.ref()
+                if receiver is None:
+                    continue
+            results.append((receiver, receiver(sender, **kwargs)))
+        return results
+
+    def send_many(self, sender, batch):
+        """
+        一次发送多条消息，batch 是关键字参数字典的序列。
+        接收者元组只查找一次；调用顺序与逐条 send 完全相同：一条消息交给所有接收者之后，才发送下一条。
+        返回发送的消息条数。
+        """
+        receivers = self.receivers_for(sender)
+        count = 0
+        for kwargs in batch:
+            for receiver in receivers:
+                receiver(sender, **kwargs)
+            count += 1
+        return count
+
+    def __repr__(self):
+        return f"<Signal {self.name!r} receivers={self.receivers}>"
+
+
+_signals = {}
+
+
+def signal(name):
+    """按名字返回同一个 Signal 实例，与 blinker.signal 的用法相同。"""
+    sig = _signals.get(name)
+    if sig is None:
+        sig = _signals[name] = Signal(name)
+    return sig
@@ -1,3 +1,5 @@
+from collections import deque
+
 class TreeNode:
     def __init__(self, value):
         self.value = value
@@ -8,9 +10,10 @@ class TreeNode:
 
     # 使用生成器来实现广度优先遍历 (BFS)
     def __iter__(self):
-        queue = [self]
+        # list.pop(0) 每次都要移动剩下的所有元素，整个遍历会变成 O(n²)；deque.popleft() 是 O(1)
+        queue = deque([self])
         while queue:
-            current_node = queue.pop(0)
+            current_node = queue.popleft()
             yield current_node.value
             queue.extend(current_node.children)
 
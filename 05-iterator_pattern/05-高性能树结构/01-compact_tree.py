@@ -0,0 +1,234 @@
+import os
+import gc
+import ast
+import glob
+import time
+import types
+import random
+import tracemalloc
+from array import array
+from collections import deque
+from itertools import accumulate
+
+# 使用 __slots__、带遍历方法的 TreeNode，与 02-traversals.py 共用
+from treenode import TreeNode
+
+# 对照组：01 节原来的 TreeNode，每个实例都有一个 __dict__。
+# 那个脚本在模块顶层直接运行演示代码，所以只执行其中的 import、函数和类定义，得到和原文完全相同的类
+HERE = os.path.dirname(os.path.abspath(__file__))
+_DEFINITIONS = (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef)
+
+
+def _load_definitions(name, path):
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    tree.body = [node for node in tree.body if isinstance(node, _DEFINITIONS)]
+    module = types.ModuleType(name)
+    module.__file__ = path
+    exec(compile(tree, path, "exec"), module.__dict__)
+    return module
+
+
+DictTreeNode = _load_definitions(
+    "original_treenode", glob.glob(os.path.join(os.path.dirname(HERE), "01-*", "01-treenode.py"))[0]).TreeNode
+
+# ---
+
+class CompactTree:
+    """
+    扁平存储的树：节点不再是对象，而是按 BFS 顺序编号的整数 0..n-1，根节点是 0。
+      values  : 节点的值，按 BFS 顺序排列；指定 typecode 时存成 array，不再为每个值保留一个 Python 对象
+      parents : array('i')，每个节点的父节点编号，根节点为 -1
+      offsets : array('i')，长度 n + 1 的 CSR 偏移；节点 k 的子节点是 offsets[k] .. offsets[k + 1] - 1
+    编号用 32 位整数保存，每个节点只占 8 字节的结构信息，最多可以容纳约 21 亿个节点。
+    按 BFS 顺序编号时，同一个父节点的子节点编号总是连续的，所以子节点列表只需要一对偏移。
+    """
+    __slots__ = ("values", "parents", "offsets")
+
+    def __init__(self, values, parents, offsets):
+        if not len(values) == len(parents) == len(offsets) - 1:
+            raise ValueError("values、parents 的长度必须等于 offsets 的长度减一")
+        self.values = values
+        self.parents = parents
+        self.offsets = offsets
+
+    @classmethod
+    def from_treenode(cls, root, typecode=None):
+        """按 BFS 顺序给 TreeNode 树中的节点编号，O(n)。"""
+        nodes = [root]
+        values, parents, offsets = [], [-1], [1]
+        # nodes 在循环中不断变长，for 循环会一直走到它的末尾，这本身就是一次 BFS
+        for k, node in enumerate(nodes):
+            children = node.children
+            values.append(node.value)
+            nodes.extend(children)
+            parents.extend([k] * len(children))
+            offsets.append(offsets[-1] + len(children))
+        return cls(values if typecode is None else array(typecode, values),
+                   array("i", parents), array("i", offsets))
+
+    @classmethod
+    def from_parents(cls, parents, values, typecode=None):
+        """
+        从父节点数组直接构建，不需要先创建节点对象。parents[0] 必须是 -1（根节点），
+        其他节点的编号可以是任意顺序。先按父节点做一次计数排序得到子节点表，再按 BFS 顺序重新编号，O(n)。
+        """
+        n = len(parents)
+        if n == 0:
+            raise ValueError("parents 不能为空，至少要有一个根节点")
+        if parents[0] != -1:
+            raise ValueError(f"parents[0] 必须是 -1（根节点），实际是 {parents[0]}")
+        if len(values) != n:
+            raise ValueError(f"values 的长度 ({len(values)}) 与 parents 的长度 ({n}) 不一致")
+        counts = [0] * (n + 1)
+        for i, p in enumerate(parents[1:], 1):
+            # 第二个 -1 或越界的编号会被负数下标悄悄接受，必须在这里拦下来
+            if not 0 <= p < n:
+                raise ValueError(f"parents[{i}] = {p} 不是有效的父节点编号（只有 parents[0] 可以是 -1）")
+            counts[p + 1] += 1
+        start = list(accumulate(counts))
+        fill = start[:]
+        children = [0] * (n - 1)
+        for i in range(1, n):
+            p = parents[i]
+            children[fill[p]] = i
+            fill[p] += 1
+        order = [0]  # order[新编号] = 原编号
+        for old in order:
+            order.extend(children[start[old]:start[old + 1]])
+        if len(order) != n:
+            raise ValueError("parents 中有节点无法从根节点到达")
+        new_id = [0] * n
+        for k, old in enumerate(order):
+            new_id[old] = k
+        new_parents = array("i", [-1])
+        new_parents.extend(new_id[parents[old]] for old in order[1:])
+        offsets = array("i", accumulate((start[old + 1] - start[old] for old in order), initial=1))
+        new_values = [values[old] for old in order]
+        return cls(new_values if typecode is None else array(typecode, new_values), new_parents, offsets)
+
+    def to_treenode(self, node_cls=TreeNode):
+        """
+        转换回对象形式的树，返回根节点。通过 add_child 连接，父节点、深度和缓存都由 TreeNode 自己维护；
+        按 BFS 顺序连接时父节点的深度已经确定、子节点还没有子树，每次 add_child 都是 O(1)。
+        """
+        nodes = [node_cls(value) for value in self.values]
+        offsets = self.offsets
+        for k, node in enumerate(nodes):
+            for child in nodes[offsets[k]:offsets[k + 1]]:
+                node.add_child(child)
+        return nodes[0]
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        # 节点本来就是按 BFS 顺序存放的，遍历整棵树就是顺序读取 values
+        return iter(self.values)
+
+    def children(self, k):
+        return range(self.offsets[k], self.offsets[k + 1])
+
+    def parent(self, k):
+        return self.parents[k]
+
+    def subtree(self, k):
+        """以节点 k 为根的子树的 BFS 遍历，产出节点编号。子树在数组中并不连续，所以这里仍然需要队列。"""
+        offsets = self.offsets
+        queue = deque([k])
+        while queue:
+            k = queue.popleft()
+            yield k
+            queue.extend(range(offsets[k], offsets[k + 1]))
+
+    def depths(self):
+        """所有节点的深度。父节点的编号总是比子节点小，所以一次顺序扫描就够了。"""
+        depths = array("i", [0]) * len(self)
+        parents = self.parents
+        for k in range(1, len(self)):
+            depths[k] = depths[parents[k]] + 1
+        return depths
+
+
+# ---
+# 基准测试
+
+def random_parents(n, seed=0):
+    """每个节点的父节点从它之前的节点中随机选，得到一棵又宽又浅的树。"""
+    rng = random.Random(seed)
+    return [-1] + [rng.randrange(i) for i in range(1, n)]
+
+
+def build_nodes(node_cls, parents, values):
+    nodes = [node_cls(value) for value in values]
+    for i in range(1, len(parents)):
+        nodes[parents[i]].add_child(nodes[i])
+    return nodes[0]
+
+
+def measure(name, build, n):
+    """
+    先不开 tracemalloc 计时构建和遍历，再单独构建一次测量内存：tracemalloc 会明显拖慢内存分配。
+    返回 BFS 遍历得到的值序列，用来逐个比较几种存储方式的结果（只比较总和发现不了顺序错误）。
+    """
+    gc.collect()
+    start = time.perf_counter()
+    tree = build()
+    build_cost = time.perf_counter() - start
+    start = time.perf_counter()
+    total = 0
+    for value in tree:
+        total += value
+    traverse_cost = time.perf_counter() - start
+    order = list(tree)
+    del tree
+    tracemalloc.start()
+    tree = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{name:<28} 内存 {size / 1e6:6.1f} MB（每个节点 {size / n:5.1f} 字节），"
+          f"构建 {build_cost:.3f} 秒，BFS 遍历 {traverse_cost:.3f} 秒")
+    return order
+
+
+# 客户端代码：用法和 TreeNode 一样
+root = TreeNode("A")
+b, c = TreeNode("B"), TreeNode("C")
+root.add_child(b)
+root.add_child(c)
+b.add_child(TreeNode("D"))
+b.add_child(TreeNode("E"))
+c.add_child(TreeNode("F"))
+
+tree = CompactTree.from_treenode(root)
+print("CompactTree 的广度优先遍历 (BFS) 结果:")
+for value in tree:
+    print(value, end=" ")
+print()
+print(f"节点 1 ({tree.values[1]}) 的子节点: {[tree.values[k] for k in tree.children(1)]}，"
+      f"节点 5 ({tree.values[5]}) 的父节点: {tree.values[tree.parent(5)]}")
+back = tree.to_treenode()
+print(f"转换回 TreeNode 后遍历: {list(back)}，先序: {[node.value for node in back.preorder()]}，"
+      f"F 的深度: {back.level(2)[-1].depth}")
+
+print("\n--- 基准测试 ---")
+n = 500_000
+parents = random_parents(n)
+values = list(range(n))  # 值对象提前创建，几种存储方式共享，不计入内存
+
+results = {
+    "原来的 TreeNode (__dict__)": measure("原来的 TreeNode (__dict__)", lambda: build_nodes(DictTreeNode, parents, values), n),
+    "TreeNode (__slots__)": measure("TreeNode (__slots__)", lambda: build_nodes(TreeNode, parents, values), n),
+    "CompactTree (值为 list)": measure("CompactTree (值为 list)", lambda: CompactTree.from_parents(parents, values), n),
+    "CompactTree (值为 array('q'))": measure("CompactTree (值为 array('q'))",
+                                           lambda: CompactTree.from_parents(parents, values, typecode="q"), n),
+}
+expected = results["原来的 TreeNode (__dict__)"]
+mismatched = [name for name, order in results.items() if order != expected]
+
+compact = CompactTree.from_parents(parents, values)
+round_trip = CompactTree.from_treenode(compact.to_treenode())
+print(f"BFS 值序列逐个一致: {not mismatched}{'' if not mismatched else f'（不一致: {mismatched}）'}，"
+      f"转换成 TreeNode 再转换回来后一致: "
+      f"{list(round_trip) == list(compact) and round_trip.offsets == compact.offsets}")
+print(f"树的最大深度: {max(compact.depths())}")
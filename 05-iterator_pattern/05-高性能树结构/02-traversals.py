@@ -0,0 +1,101 @@
+import sys
+import time
+from collections import deque
+
+# 带遍历工具的 TreeNode 放在 treenode.py 中，01-compact_tree.py 也使用同一个类
+from treenode import TreeNode
+
+
+# ---
+# 对照组：原来的生成器写法，list.pop(0) 让 BFS 变成 O(n²)
+
+def bfs_pop0(root):
+    queue = [root]
+    while queue:
+        current_node = queue.pop(0)
+        yield current_node.value
+        queue.extend(current_node.children)
+
+
+def bfs_deque(root):
+    queue = deque([root])
+    while queue:
+        current_node = queue.popleft()
+        yield current_node.value
+        queue.extend(current_node.children)
+
+
+def preorder_recursive(node):
+    yield node.value
+    for child in node.children:
+        yield from preorder_recursive(child)
+
+
+def wide_tree(n, fanout):
+    """每个节点有 fanout 个子节点的完全树，BFS 队列中会同时存放大量节点。"""
+    nodes = [TreeNode(0)]
+    for i in range(1, n):
+        node = TreeNode(i)
+        nodes[(i - 1) // fanout].add_child(node)
+        nodes.append(node)
+    return nodes[0]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+# 客户端代码
+root = TreeNode("A")
+b, c = TreeNode("B"), TreeNode("C")
+root.add_child(b)
+root.add_child(c)
+b.add_child(TreeNode("D"))
+b.add_child(TreeNode("E"))
+c.add_child(TreeNode("F"))
+
+def values(nodes):
+    return " ".join(node.value for node in nodes)
+
+print(f"广度优先 (BFS):   {' '.join(root)}")
+print(f"先序 (pre-order): {values(root.preorder())}")
+print(f"后序 (post-order): {values(root.postorder())}")
+print(f"逐层:             {[[node.value for node in level] for level in root.levels()]}")
+print(f"只遍历 1 层:       {values(root.depth_limited(1))}")
+print(f"剪掉 B 的子树:     {values(root.preorder(prune=lambda node: node.value == 'B'))}")
+print(f"len(root) = {len(root)}, len(b) = {len(b)}, 第 2 层: {root.level(2)}, 高度: {root.height()}")
+
+# 先建好子树再挂到树上，深度和子树大小会自动修正
+g = TreeNode("G")
+g.add_child(TreeNode("H"))
+c.add_child(g)
+print(f"挂上子树 G 之后: len(root) = {len(root)}, H 的深度 = {g.children[0].depth}, 第 3 层: {root.level(3)}")
+
+print("\n--- 基准测试：宽树的 BFS ---")
+tree = wide_tree(200_000, fanout=1000)
+expected, pop0_cost = timed(lambda: list(bfs_pop0(tree)))
+result, deque_cost = timed(lambda: list(bfs_deque(tree)))
+print(f"{len(tree)} 个节点: list.pop(0) {pop0_cost:.3f} 秒，deque.popleft() {deque_cost:.3f} 秒，"
+      f"结果一致: {result == expected}")
+_, cost = timed(lambda: sum(1 for _ in tree.preorder()))
+print(f"先序遍历 {cost:.3f} 秒，第 2 层节点数 {len(tree.level(2))}（第一次查询需要建立缓存）")
+_, cost = timed(lambda: [len(tree.level(d)) for d in range(3) for _ in range(10_000)])
+print(f"缓存建立后 30000 次层查询 {cost:.4f} 秒")
+
+print("\n--- 基准测试：很深的树 ---")
+depth = 50_000
+chain = TreeNode(0)
+node = chain
+for i in range(1, depth):
+    child = TreeNode(i)
+    node.add_child(child)
+    node = child
+try:
+    sum(preorder_recursive(chain))
+except RecursionError:
+    print(f"递归先序遍历: RecursionError（递归深度上限 {sys.getrecursionlimit()}）")
+_, cost = timed(lambda: sum(node.value for node in chain.preorder()))
+print(f"迭代先序遍历 {depth} 层: {cost:.3f} 秒；后序遍历的第一个节点: {next(chain.postorder()).value}；"
+      f"len(chain) = {len(chain)}，最深节点的深度 = {node.depth}")
@@ -0,0 +1,152 @@
+"""
+本节所有脚本共用的 TreeNode：接口与 01 节的 TreeNode 相同（value、children、add_child，for 循环按 BFS 顺序产出值），
+用 __slots__ 去掉每个实例的 __dict__，并带上 02-traversals.py 中演示的各种遍历方法。
+01-compact_tree.py 的 from_treenode / to_treenode 转换的也是这个类。
+"""
+from collections import deque
+
+
+class TreeNode:
+    """
+    带遍历工具的 TreeNode。除了值和子节点，每个节点还维护父节点 parent 和深度 depth（从整棵树的根节点算起），
+    以及子树大小和逐层索引的缓存，len(node) 和 level(d) 在缓存有效时都是 O(1)。
+    所有遍历都是迭代实现，不使用递归，再深的树也不会触发 RecursionError。
+    遍历方法产出的是节点本身；prune 是一个接收节点的函数，返回 True 时跳过这个节点和它的整棵子树。
+    """
+    __slots__ = ("value", "children", "parent", "depth", "_size", "_levels", "_dirty")
+
+    def __init__(self, value):
+        self.value = value
+        self.children = []
+        self.parent = None
+        self.depth = 0
+        self._size = 1
+        self._levels = None  # level() 的缓存
+        # _dirty 为 True 表示子树有改动，_size 需要重新计算。约定：脏节点的祖先一定也是脏的
+        self._dirty = True
+
+    def add_child(self, node):
+        self.children.append(node)
+        node.parent = self
+        if node.depth != self.depth + 1:
+            # 挂上来的是一棵已经有子节点的子树时，要修正整棵子树的深度
+            shift = self.depth + 1 - node.depth
+            for descendant in node.preorder():
+                descendant.depth += shift
+        # 沿着祖先链标记改动，遇到已经是脏的祖先就停下：它上面的祖先一定也已经是脏的。
+        # 所以连续添加节点时每次只需要 O(1)，不会因为树很深而变成 O(depth)
+        ancestor = self
+        while ancestor is not None and not ancestor._dirty:
+            ancestor._dirty = True
+            ancestor._levels = None
+            ancestor = ancestor.parent
+
+    def _refresh(self):
+        """重新计算有改动的子树的大小。没有改动的子树直接剪掉，大小沿用缓存。"""
+        for node in self.postorder(prune=lambda node: not node._dirty):
+            size = 1
+            for child in node.children:
+                size += child._size
+            node._size = size
+            node._dirty = False
+
+    def __len__(self):
+        """子树的节点数。修改之后第一次调用需要 O(改动的节点数)，之后是 O(1)。"""
+        if self._dirty:
+            self._refresh()
+        return self._size
+
+    def __iter__(self):
+        # 与原来的约定相同：按 BFS 顺序产出节点的值
+        return (node.value for node in self.bfs())
+
+    def __repr__(self):
+        return f"TreeNode({self.value})"
+
+    def bfs(self, prune=None):
+        """广度优先遍历。队列中最多同时存放两层节点，O(width) 内存。"""
+        if prune is not None and prune(self):
+            return
+        queue = deque([self])
+        while queue:
+            node = queue.popleft()
+            yield node
+            if prune is None:
+                queue.extend(node.children)
+            else:
+                queue.extend(child for child in node.children if not prune(child))
+
+    def preorder(self, prune=None, max_depth=None):
+        """
+        先序遍历（深度优先，先访问父节点）。max_depth 是相对于当前节点的最大层数，None 表示不限制。
+        栈中保存的是每一层子节点列表的迭代器，而不是所有待访问的兄弟节点，所以只需要 O(depth) 内存。
+        """
+        if prune is not None and prune(self):
+            return
+        yield self
+        if max_depth is not None and max_depth < 1:
+            return
+        stack = [iter(self.children)]
+        while stack:
+            for child in stack[-1]:
+                if prune is not None and prune(child):
+                    continue
+                yield child
+                # child 位于第 len(stack) 层，它的子节点位于第 len(stack) + 1 层
+                if max_depth is None or len(stack) < max_depth:
+                    stack.append(iter(child.children))
+                break
+            else:
+                stack.pop()
+
+    def depth_limited(self, max_depth, prune=None):
+        """只访问当前节点以下 max_depth 层以内的节点（先序），被截掉的部分完全不会被访问。"""
+        return self.preorder(prune, max_depth)
+
+    def postorder(self, prune=None):
+        """后序遍历（先访问所有子节点，再访问父节点），O(depth) 内存。"""
+        if prune is not None and prune(self):
+            return
+        stack = [(self, iter(self.children))]
+        while stack:
+            node, children = stack[-1]
+            for child in children:
+                if prune is not None and prune(child):
+                    continue
+                stack.append((child, iter(child.children)))
+                break
+            else:
+                stack.pop()
+                yield node
+
+    def levels(self, prune=None, max_depth=None):
+        """逐层遍历，每次产出一层节点的列表；当前节点是第 0 层。O(width) 内存。"""
+        if prune is not None and prune(self):
+            return
+        level = [self]
+        depth = 0
+        while level:
+            yield level
+            if max_depth is not None and depth >= max_depth:
+                return
+            if prune is None:
+                level = [child for node in level for child in node.children]
+            else:
+                level = [child for node in level for child in node.children if not prune(child)]
+            depth += 1
+
+    def level(self, d):
+        """
+        当前节点以下第 d 层的所有节点。第一次调用时做一次 O(n) 的逐层遍历并缓存，之后每次查询都是 O(1)；
+        子树中添加节点时，add_child 会作废这份缓存。
+        """
+        if self._dirty:
+            self._refresh()
+        if self._levels is None:
+            self._levels = [tuple(level) for level in self.levels()]
+        return self._levels[d] if 0 <= d < len(self._levels) else ()
+
+    def height(self):
+        """子树的高度（最深的叶子节点相对于当前节点的层数）。"""
+        self.level(0)
+        return len(self._levels) - 1